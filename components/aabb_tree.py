@@ -0,0 +1,328 @@
+from .broadphase import bounds_of, bounds_overlap
+
+import math
+
+"""
+A dynamic bounding volume hierarchy of axis-aligned bounding boxes.
+
+Unlike the SpatialHash of broadphase, the tree adapts to the sizes of the
+objects in it, so it stays fast when a scene mixes tiny and huge objects.
+"""
+
+class AABBTree(object):
+    """
+    A binary tree whose leaves hold objects and whose inner nodes hold the
+    union of the boxes below them. Queries skip every subtree whose box misses
+    what is looked for.
+
+    The box of a leaf is the bounding box of its object fattened by `margin`
+    on every side. Objects that move by less than that do not have to be
+    reinserted, which makes `move` cheap for objects that jiggle around. The
+    tree is kept balanced with rotations, as insertions and removals happen.
+
+    Objects are identified by identity, so they need not be hashable.
+    """
+
+    class Node(object):
+
+        def __init__(self, bounds, obj=None, tight=None):
+            # The fat box for leaves, the union of the children otherwise.
+            self.bounds = bounds
+            self.obj = obj
+            # The actual bounding box of obj
+            self.tight = tight
+            self.parent = None
+            self.left = None
+            self.right = None
+            self.height = 0
+
+        @property
+        def is_leaf(self):
+            return self.left is None
+
+    def __init__(self, margin=4, bounds=bounds_of):
+        """
+        @param margin
+          How much the boxes of the leaves are fattened, in pixels.
+        @param bounds
+          The function that gives the (left, top, right, bottom) of an
+          object. Defaults to `broadphase.bounds_of`.
+        """
+        self.margin = margin
+        self.bounds = bounds
+        self.root = None
+        # id(obj) -> leaf Node
+        self.__leaves = {}
+
+    def __len__(self):
+        return len(self.__leaves)
+
+    def __contains__(self, obj):
+        return id(obj) in self.__leaves
+
+    def __iter__(self):
+        return (leaf.obj for leaf in self.__leaves.values())
+
+    @property
+    def height(self):
+        return self.root.height if self.root is not None else 0
+
+    @staticmethod
+    def __union(a, b):
+        return (min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3]))
+
+    @staticmethod
+    def __perimeter(bounds):
+        return 2 * ((bounds[2] - bounds[0]) + (bounds[3] - bounds[1]))
+
+    @staticmethod
+    def __encloses(outer, inner):
+        return outer[0] <= inner[0] and outer[1] <= inner[1] and \
+            inner[2] <= outer[2] and inner[3] <= outer[3]
+
+    def __fatten(self, bounds):
+        m = self.margin
+        return (bounds[0] - m, bounds[1] - m, bounds[2] + m, bounds[3] + m)
+
+    def insert(self, obj):
+        key = id(obj)
+        if key in self.__leaves:
+            self.move(obj)
+            return
+
+        tight = self.bounds(obj)
+        leaf = AABBTree.Node(self.__fatten(tight), obj, tight)
+        self.__leaves[key] = leaf
+        self.__insert_leaf(leaf)
+
+    def remove(self, obj):
+        """
+        Removes `obj` from the tree. Removing an object that is not in the
+        tree does nothing.
+        """
+        leaf = self.__leaves.pop(id(obj), None)
+        if leaf is not None:
+            self.__remove_leaf(leaf)
+
+    def move(self, obj):
+        """
+        Updates the tree after `obj` moved or changed size. Returns whether
+        the object had to be reinserted, which only happens when it left its
+        fattened box.
+        """
+        leaf = self.__leaves.get(id(obj))
+        if leaf is None:
+            self.insert(obj)
+            return True
+
+        tight = self.bounds(obj)
+        leaf.tight = tight
+        if AABBTree.__encloses(leaf.bounds, tight):
+            return False
+
+        self.__remove_leaf(leaf)
+        leaf.bounds = self.__fatten(tight)
+        self.__insert_leaf(leaf)
+        return True
+
+    def clear(self):
+        self.root = None
+        self.__leaves.clear()
+
+    def __insert_leaf(self, leaf):
+        if self.root is None:
+            self.root = leaf
+            leaf.parent = None
+            return
+
+        # Go down to the sibling that makes for the smallest tree, where the
+        # size of a tree is the sum of the perimeters of its inner nodes.
+        box = leaf.bounds
+        node = self.root
+        while not node.is_leaf:
+            combined = AABBTree.__perimeter(AABBTree.__union(node.bounds, box))
+            # Pairing up with node creates a parent this big...
+            cost = 2 * combined
+            # ...while going further down grows node by this much.
+            inherited = 2 * (combined - AABBTree.__perimeter(node.bounds))
+
+            costs = []
+            for child in (node.left, node.right):
+                grown = AABBTree.__perimeter(AABBTree.__union(child.bounds, box))
+                if not child.is_leaf:
+                    grown -= AABBTree.__perimeter(child.bounds)
+                costs.append(grown + inherited)
+
+            if cost < costs[0] and cost < costs[1]:
+                break
+            node = node.left if costs[0] < costs[1] else node.right
+
+        sibling = node
+        old_parent = sibling.parent
+        parent = AABBTree.Node(AABBTree.__union(box, sibling.bounds))
+        parent.parent = old_parent
+        parent.height = sibling.height + 1
+        self.__replace_child(old_parent, sibling, parent)
+
+        parent.left = sibling
+        parent.right = leaf
+        sibling.parent = parent
+        leaf.parent = parent
+        self.__refit(old_parent)
+
+    def __remove_leaf(self, leaf):
+        if leaf is self.root:
+            self.root = None
+            return
+
+        parent = leaf.parent
+        grandparent = parent.parent
+        sibling = parent.right if parent.left is leaf else parent.left
+        self.__replace_child(grandparent, parent, sibling)
+        sibling.parent = grandparent
+        leaf.parent = None
+        self.__refit(grandparent)
+
+    def __replace_child(self, parent, old, new):
+        if parent is None:
+            self.root = new
+        elif parent.left is old:
+            parent.left = new
+        else:
+            parent.right = new
+
+    def __refit(self, node):
+        """
+        Rebalances and recomputes the boxes and heights from `node` up to the
+        root.
+        """
+        while node is not None:
+            node = self.__balance(node)
+            node.height = 1 + max(node.left.height, node.right.height)
+            node.bounds = AABBTree.__union(node.left.bounds, node.right.bounds)
+            node = node.parent
+
+    def __balance(self, node):
+        """
+        If one subtree of `node` is more than one level taller than the other,
+        rotates the taller one up. Returns the node now in the place of `node`.
+        """
+        if node.is_leaf:
+            return node
+
+        balance = node.right.height - node.left.height
+        if balance > 1:
+            return self.__rotate(node, node.right)
+        if balance < -1:
+            return self.__rotate(node, node.left)
+        return node
+
+    def __rotate(self, node, heavy):
+        self.__replace_child(node.parent, node, heavy)
+        heavy.parent = node.parent
+
+        # The taller grandchild stays with `heavy`, the other one moves under
+        # `node` in the place `heavy` left.
+        if heavy.left.height > heavy.right.height:
+            keep, give = heavy.left, heavy.right
+        else:
+            keep, give = heavy.right, heavy.left
+
+        if node.left is heavy:
+            node.left = give
+        else:
+            node.right = give
+        give.parent = node
+        node.bounds = AABBTree.__union(node.left.bounds, node.right.bounds)
+        node.height = 1 + max(node.left.height, node.right.height)
+
+        heavy.left = node
+        heavy.right = keep
+        node.parent = heavy
+        heavy.bounds = AABBTree.__union(node.bounds, keep.bounds)
+        heavy.height = 1 + max(node.height, keep.height)
+        return heavy
+
+    def __search(self, prune, accept):
+        """
+        Returns the leaves that pass `accept(leaf)`, looking
+        only into the subtrees whose boxes pass `prune(bounds)`.
+        """
+        found = []
+        stack = [self.root] if self.root is not None else []
+        while stack:
+            node = stack.pop()
+            if not prune(node.bounds):
+                continue
+
+            if node.is_leaf:
+                if accept(node):
+                    found.append(node)
+            else:
+                stack.append(node.left)
+                stack.append(node.right)
+
+        return found
+
+    def query(self, bounds):
+        """
+        Returns a list of the objects whose bounding boxes overlap the
+        (left, top, right, bottom) box `bounds`.
+        """
+        leaves = self.__search(
+            lambda box: bounds_overlap(box, bounds),
+            lambda leaf: bounds_overlap(leaf.tight, bounds)
+        )
+        return [leaf.obj for leaf in leaves]
+
+    def query_point(self, x, y):
+        """
+        Returns a list of the objects whose bounding boxes contain (x, y),
+        edges included.
+        """
+        contains = lambda box: box[0] <= x <= box[2] and box[1] <= y <= box[3]
+        return [leaf.obj for leaf in self.__search(contains, lambda leaf: contains(leaf.tight))]
+
+    def ray_cast(self, origin, direction, max_distance=None):
+        """
+        Casts a ray from the (x, y) `origin` towards `direction`, an (x, y)
+        vector of any nonzero length. Returns the (distance, obj) pairs of the
+        objects whose bounding boxes the ray hits within `max_distance`
+        pixels, nearest first. Objects containing the origin are at distance
+        0.
+        """
+        length = math.hypot(direction[0], direction[1])
+        if length == 0:
+            raise ValueError("The direction of a ray must not be zero.")
+
+        dx = direction[0] / length
+        dy = direction[1] / length
+        limit = float("inf") if max_distance is None else max_distance
+
+        def entry(box):
+            near = 0.0
+            far = limit
+            for start, step, low, high in ((origin[0], dx, box[0], box[2]), (origin[1], dy, box[1], box[3])):
+                if step == 0:
+                    if start < low or start > high:
+                        return None
+                    continue
+
+                t_low = (low - start) / step
+                t_high = (high - start) / step
+                if t_low > t_high:
+                    t_low, t_high = t_high, t_low
+                near = max(near, t_low)
+                far = min(far, t_high)
+                if near > far:
+                    return None
+            return near
+
+        hits = []
+        for leaf in self.__search(lambda box: entry(box) is not None, lambda leaf: True):
+            distance = entry(leaf.tight)
+            if distance is not None:
+                hits.append((distance, leaf.obj))
+
+        hits.sort(key=lambda hit: hit[0])
+        return hits
@@ -0,0 +1,296 @@
+from .core import Colors
+from .drawable import Drawable
+from .shapes import CollisionBox, FrozenPoint, Point
+
+import math
+import pygame
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+"""
+Shapes whose points are kept in a NumPy array, for when many vertices change
+every frame. NumPy is optional for the framework; only this module needs it.
+
+PointArray is the bulk counterpart of Point. Transforms are 3x3 affine
+matrices acting on (x, y, 1) column vectors. Build them with `translation`,
+`scaling` and `rotation` and chain them with `compose`.
+"""
+
+def affine(a, b, c, d, e, f):
+    """
+    Returns the affine transform mapping (x, y) to
+    (a * x + b * y + c, d * x + e * y + f).
+    """
+    if numpy is None:
+        raise ImportError("Affine transforms require NumPy.")
+
+    return numpy.array([[a, b, c], [d, e, f], [0, 0, 1]], dtype=numpy.float64)
+
+def translation(dx, dy):
+    return affine(1, 0, dx, 0, 1, dy)
+
+def scaling(sx, sy=None, origin=(0, 0)):
+    """
+    Scales by `sx` along x and `sy` along y, which defaults to `sx`, keeping
+    the (x, y) `origin` in place.
+    """
+    sy = sx if sy is None else sy
+    return affine(sx, 0, origin[0] * (1 - sx), 0, sy, origin[1] * (1 - sy))
+
+def rotation(angle, origin=(0, 0)):
+    """
+    Rotates by `angle` radians around the (x, y) `origin`. Since y grows
+    downwards on screen, positive angles turn clockwise.
+    """
+    cos = math.cos(angle)
+    sin = math.sin(angle)
+    ox, oy = origin
+    return affine(
+        cos, -sin, ox - cos * ox + sin * oy,
+        sin, cos, oy - sin * ox - cos * oy
+    )
+
+def compose(*transforms):
+    """
+    Returns the transform that applies `transforms` in order, the first one
+    first.
+    """
+    composed = affine(1, 0, 0, 0, 1, 0)
+    for transform in transforms:
+        composed = numpy.dot(transform, composed)
+    return composed
+
+class PointArray(object):
+    """
+    Many points in an (N, 2) float array, one (x, y) row per point, with the
+    operations of Point done on all of them at once.
+    """
+
+    def __init__(self, points=None):
+        """
+        @param points
+          Either a sequence of Points, a sequence of (x, y) pairs, an (N, 2)
+          array or another PointArray. The points are copied.
+        """
+        if numpy is None:
+            raise ImportError("PointArray requires NumPy.")
+
+        if points is None:
+            points = []
+        elif isinstance(points, PointArray):
+            points = points.array
+        elif len(points) and isinstance(points[0], Point):
+            points = [(p.x, p.y) for p in points]
+
+        self.array = numpy.array(points, dtype=numpy.float64).reshape(-1, 2)
+
+    def __len__(self):
+        return len(self.array)
+
+    def __getitem__(self, index):
+        """
+        A FrozenPoint for an integer index, a PointArray for anything else
+        NumPy takes (slices, masks, index arrays).
+        """
+        if isinstance(index, (int, numpy.integer)):
+            x, y = self.array[index].tolist()
+            return FrozenPoint(x, y)
+
+        selected = PointArray()
+        selected.array = self.array[index].reshape(-1, 2)
+        return selected
+
+    def __iter__(self):
+        return (FrozenPoint(x, y) for x, y in self.array.tolist())
+
+    @property
+    def xs(self):
+        return self.array[:, 0]
+
+    @property
+    def ys(self):
+        return self.array[:, 1]
+
+    def to_points(self):
+        return [Point(x, y) for x, y in self.array.tolist()]
+
+    def distance(self, another_point, take_root=True):
+        """
+        The array of the distances of every point to `another_point`, a Point
+        or an (x, y) pair. See Point.distance for `take_root`.
+        """
+        offsets = self.array - (another_point[0], another_point[1])
+        square_sums = numpy.einsum("ij,ij->i", offsets, offsets)
+        return numpy.sqrt(square_sums) if take_root else square_sums
+
+    def pairwise_distances(self, other, take_root=True):
+        """
+        The (len(self), len(other)) array of the distances between every
+        point of this PointArray and every point of the PointArray `other`.
+        """
+        offsets = self.array[:, numpy.newaxis, :] - other.array[numpy.newaxis, :, :]
+        square_sums = numpy.einsum("ijk,ijk->ij", offsets, offsets)
+        return numpy.sqrt(square_sums) if take_root else square_sums
+
+    def nearest(self, another_point):
+        """
+        The index of the point closest to `another_point`, or None if there
+        are no points.
+        """
+        if not len(self.array):
+            return None
+        return int(numpy.argmin(self.distance(another_point, take_root=False)))
+
+    def translate(self, dx, dy):
+        self.array[:, 0] += dx
+        self.array[:, 1] += dy
+
+    def transform(self, matrix):
+        """
+        Applies the 3x3 affine `matrix` to every point, in place.
+        """
+        self.array[...] = numpy.dot(self.array, matrix[:2, :2].T) + matrix[:2, 2]
+
+class ArrayShape(Drawable):
+    """
+    A closed figure like PointShape, but with its points in an (N, 2) float
+    array, one (x, y) row per point.
+
+    Transforms work on the array in place, through buffers allocated once, so
+    animating a shape creates no objects per point. The bounding box is also
+    kept up to date as the shape is transformed: translations and scalings
+    just move its corners, and only transforms that rotate or shear have to
+    look at the points again. The CollisionBox is only built when asked for.
+    """
+
+    def __init__(self, points=None, line_color=Colors.MAX_BLACK, draw_offset=None):
+        """
+        @param points
+          Either a sequence of Points, a sequence of (x, y) pairs, an (N, 2)
+          array or a PointArray. The points are copied.
+        """
+        if numpy is None:
+            raise ImportError("ArrayShape requires NumPy.")
+
+        super(ArrayShape, self).__init__(draw_offset if draw_offset is not None else (0, 0))
+        self.line_color = line_color
+        # (left, top, right, bottom)
+        self.__box = numpy.zeros(4, dtype=numpy.float64)
+        self.__points = None
+        self.__set_points([] if points is None else points)
+
+    @staticmethod
+    def from_point_shape(shape):
+        return ArrayShape(shape.point_list, shape.line_color, shape.draw_offset)
+
+    def __set_points(self, points):
+        self.__points = PointArray(points).array
+        self.__scratch = numpy.empty_like(self.__points)
+        self.refresh_box()
+
+    def __len__(self):
+        return len(self.__points)
+
+    @property
+    def points(self):
+        """
+        The (N, 2) array of points. If you modify it directly, call
+        `refresh_box` afterwards.
+        """
+        return self.__points
+
+    @property
+    def point_list(self):
+        """
+        The points as a new list of Points, like in PointShape.
+        """
+        return [Point(x, y) for x, y in self.__points.tolist()]
+
+    def add_points(self, points):
+        """
+        Appends `points`, in any of the forms the constructor takes. Unlike
+        transforms, this reallocates the array.
+        """
+        self.__set_points(numpy.concatenate((self.__points, PointArray(points).array)))
+
+    @property
+    def bounds(self):
+        """
+        The (left, top, right, bottom) of the bounding box of this shape, or
+        None if it has no points.
+        """
+        if not len(self.__points):
+            return None
+        return tuple(self.__box.tolist())
+
+    @property
+    def collision_box(self):
+        if not len(self.__points):
+            # Like PointShape, this box does not exist in the visible screen.
+            return CollisionBox(Point(-1, -1), Point(-1, -1))
+
+        left, top, right, bottom = self.__box.tolist()
+        return CollisionBox(Point(left, top), Point(right, bottom))
+
+    def refresh_box(self):
+        """
+        Recomputes the bounding box from the points.
+        """
+        if len(self.__points):
+            self.__points.min(axis=0, out=self.__box[:2])
+            self.__points.max(axis=0, out=self.__box[2:])
+
+    def transform(self, matrix):
+        """
+        Applies the 3x3 affine `matrix` to every point, in place.
+        """
+        numpy.dot(self.__points, matrix[:2, :2].T, out=self.__scratch)
+        numpy.add(self.__scratch, matrix[:2, 2], out=self.__points)
+
+        if matrix[0, 1] == 0 and matrix[1, 0] == 0:
+            # Axis-aligned: the corners of the box map to the corners of the
+            # new box, although a negative scale swaps them.
+            box = self.__box
+            box[0::2] *= matrix[0, 0]
+            box[0::2] += matrix[0, 2]
+            box[1::2] *= matrix[1, 1]
+            box[1::2] += matrix[1, 2]
+            if matrix[0, 0] < 0:
+                box[0], box[2] = box[2], box[0]
+            if matrix[1, 1] < 0:
+                box[1], box[3] = box[3], box[1]
+        else:
+            self.refresh_box()
+
+    def translate(self, dx, dy):
+        self.__points[:, 0] += dx
+        self.__points[:, 1] += dy
+        self.__box[0::2] += dx
+        self.__box[1::2] += dy
+
+    def scale(self, sx, sy=None, origin=(0, 0)):
+        self.transform(scaling(sx, sy, origin))
+
+    def rotate(self, angle, origin=(0, 0)):
+        self.transform(rotation(angle, origin))
+
+    def invariant_scale(self, scale_factor):
+        """
+        Performs a scale linear transformation on this shape, like
+        PointShape.invariant_scale.
+        """
+        self.scale(scale_factor)
+
+    def draw(self, screen):
+        """
+        Draws the outline of this shape, closing it. Like PointShape, shapes
+        with less than two points are not drawn.
+
+        @param screen
+            The window to which we draw this ArrayShape.
+        """
+        if len(self.__points) > 1:
+            pygame.draw.lines(screen, self.line_color, True, self.__points.tolist())
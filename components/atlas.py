@@ -0,0 +1,319 @@
+from .config import JsonConfigParser
+
+import json
+import os
+import pygame
+import sys
+
+"""
+Texture atlases: many images packed into one Surface.
+
+Sprites drawn out of a single atlas Surface read from one block of memory
+instead of one Surface each, and an atlas of many small tiles wastes less
+memory than as many separate Surfaces. Use `Image.from_atlas` to make Images,
+and through them PyRoSprites, out of atlas regions.
+
+Atlases can be packed at runtime with `TextureAtlas.from_files` and
+`TextureAtlas.from_directory`, or packed ahead of time and saved with
+`TextureAtlas.save`, which writes the packed image along with a JSON file of
+its regions. For instance,
+
+    python -m components.atlas tiles.png sample_sprites/tiles/png
+
+Saved atlases are read back with `TextureAtlas.load`.
+"""
+
+def _png_files(directory):
+    """
+    The name -> path mapping of the PNG images of `directory`, each named
+    after its file without the extension.
+    """
+    files = {}
+    for filename in sorted(os.listdir(directory)):
+        name, extension = os.path.splitext(filename)
+        if extension.lower() == ".png":
+            files[name] = os.path.join(directory, filename)
+    return files
+
+class SkylinePacker(object):
+    """
+    Packs rectangles in a `width` by `height` area with the skyline
+    bottom-left heuristic: each rectangle goes where its bottom edge ends up
+    highest up, on top of the outline left by the rectangles before it.
+    Packs best when given rectangles from tallest to shortest.
+    """
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        # (x, y, width) segments of the outline, from left to right.
+        self.__skyline = [(0, 0, width)]
+
+    @property
+    def used_height(self):
+        """
+        How far down the packed rectangles reach.
+        """
+        return max(y for x, y, width in self.__skyline)
+
+    def cover(self, rects):
+        """
+        Raises the skyline over `rects`, (x, y, width, height) rectangles
+        already taken by some other packing, so that nothing gets packed on
+        top of them.
+        """
+        edges = set([0, self.width])
+        for x, y, width, height in rects:
+            edges.update((min(max(x, 0), self.width), min(max(x + width, 0), self.width)))
+        edges = sorted(edges)
+
+        skyline = []
+        for left, right in zip(edges, edges[1:]):
+            bottom = self.__height_over(left, right)
+            for x, y, width, height in rects:
+                if x < right and left < x + width:
+                    bottom = max(bottom, y + height)
+            if skyline and skyline[-1][1] == bottom:
+                skyline[-1] = (skyline[-1][0], bottom, skyline[-1][2] + right - left)
+            else:
+                skyline.append((left, bottom, right - left))
+        self.__skyline = skyline
+
+    def __height_over(self, left, right):
+        return max(
+            y for x, y, width in self.__skyline if x < right and left < x + width
+        )
+
+    def __fit(self, idx, width, height):
+        """
+        The y at which a `width` by `height` rectangle placed at the start of
+        the segment `idx` would sit, or None if it does not fit there.
+        """
+        x = self.__skyline[idx][0]
+        if x + width > self.width:
+            return None
+
+        y = 0
+        remaining = width
+        while remaining > 0:
+            segment_x, segment_y, segment_width = self.__skyline[idx]
+            y = max(y, segment_y)
+            remaining -= segment_width
+            idx += 1
+
+        return y if y + height <= self.height else None
+
+    def pack(self, width, height):
+        """
+        Finds a spot for a `width` by `height` rectangle and returns its
+        upper-left corner (x, y), or None if it does not fit anymore.
+        """
+        best = None
+        for idx in range(len(self.__skyline)):
+            y = self.__fit(idx, width, height)
+            if y is None:
+                continue
+            score = (y + height, self.__skyline[idx][2])
+            if best is None or score < best[0]:
+                best = (score, idx, y)
+
+        if best is None:
+            return None
+
+        score, idx, y = best
+        x = self.__skyline[idx][0]
+        self.__place(idx, x, y + height, width)
+        return (x, y)
+
+    def __place(self, idx, x, y, width):
+        skyline = self.__skyline
+        skyline.insert(idx, (x, y, width))
+        right = x + width
+
+        # Cut the segments now under the new one.
+        idx += 1
+        while idx < len(skyline) and skyline[idx][0] < right:
+            segment_x, segment_y, segment_width = skyline[idx]
+            segment_right = segment_x + segment_width
+            if segment_right <= right:
+                del skyline[idx]
+            else:
+                skyline[idx] = (right, segment_y, segment_right - right)
+                break
+
+        # Merge neighbours at the same height.
+        idx = 0
+        while idx < len(skyline) - 1:
+            if skyline[idx][1] == skyline[idx + 1][1]:
+                skyline[idx] = (skyline[idx][0], skyline[idx][1], skyline[idx][2] + skyline[idx + 1][2])
+                del skyline[idx + 1]
+            else:
+                idx += 1
+
+class TextureAtlas(object):
+    """
+    A Surface holding many images, each in its own named region.
+
+    Regions are handed out as subsurfaces, which share their pixels with the
+    atlas Surface. Like the Surfaces of `Image.surface_cache`, treat them as
+    read-only.
+    """
+
+    def __init__(self, width, height, padding=1):
+        """
+        @param padding
+          The transparent pixels left between regions, so that scaling or
+          rotating a region does not bleed its neighbours into it.
+        """
+        self.padding = padding
+        self.surface = pygame.Surface((width, height), pygame.SRCALPHA)
+        # name -> pygame.Rect
+        self.regions = {}
+        self.__packer = SkylinePacker(width, height)
+        self.__subsurfaces = {}
+
+    def __len__(self):
+        return len(self.regions)
+
+    def __contains__(self, name):
+        return name in self.regions
+
+    def __getitem__(self, name):
+        """
+        The subsurface of the region `name`.
+        """
+        subsurface = self.__subsurfaces.get(name)
+        if subsurface is None:
+            subsurface = self.surface.subsurface(self.regions[name])
+            self.__subsurfaces[name] = subsurface
+        return subsurface
+
+    def add(self, name, surface):
+        """
+        Packs a copy of `surface` into the atlas as the region `name`, and
+        returns the Rect of the region. Raises ValueError if it does not fit.
+        """
+        if name in self.regions:
+            raise ValueError("The atlas already has a region named %r." % name)
+
+        width, height = surface.get_size()
+        spot = self.__packer.pack(width + self.padding, height + self.padding)
+        if spot is None:
+            raise ValueError("No room left in the atlas for %r." % name)
+
+        region = pygame.Rect(spot, (width, height))
+        self.surface.blit(surface, region)
+        self.regions[name] = region
+        return region
+
+    @property
+    def used_height(self):
+        return self.__packer.used_height
+
+    def trimmed(self):
+        """
+        A copy of this atlas cut down to the height its regions use.
+        """
+        height = max(1, min(self.surface.get_height(), self.used_height))
+        trimmed = TextureAtlas(self.surface.get_width(), height, self.padding)
+        trimmed.surface.blit(self.surface, (0, 0))
+        trimmed.__set_regions(self.regions)
+        return trimmed
+
+    def __set_regions(self, regions):
+        """
+        Takes over the name -> rect mapping `regions`, whose pixels are
+        already on the atlas Surface, keeping later `add`s clear of them.
+        """
+        self.regions = dict((name, pygame.Rect(rect)) for name, rect in regions.items())
+        self.__packer.cover([
+            (rect.x, rect.y, rect.width + self.padding, rect.height + self.padding)
+            for rect in self.regions.values()
+        ])
+        self.__subsurfaces = {}
+
+    def convert(self):
+        """
+        Converts the atlas Surface for the display, which must be set. Do this
+        before handing out regions.
+        """
+        self.surface = self.surface.convert_alpha()
+        self.__subsurfaces = {}
+
+    @classmethod
+    def from_surfaces(cls, surfaces, width=2048, height=2048, padding=1):
+        """
+        Packs the name -> Surface mapping `surfaces`, tallest first, into an
+        atlas `width` pixels wide, trimmed to the height it needs. Converts the
+        atlas for the display if one is set.
+        """
+        order = sorted(surfaces, key=lambda name: (-surfaces[name].get_height(), -surfaces[name].get_width(), name))
+        atlas = cls(width, height, padding)
+        for name in order:
+            atlas.add(name, surfaces[name])
+
+        atlas = atlas.trimmed()
+        if pygame.display.get_surface() is not None:
+            atlas.convert()
+        return atlas
+
+    @classmethod
+    def from_files(cls, files, width=2048, height=2048, padding=1):
+        """
+        Packs the images of the name -> path mapping `files`, like
+        `AssetManifest.images`, into an atlas. See `from_surfaces`.
+        """
+        surfaces = dict((name, pygame.image.load(path)) for name, path in files.items())
+        return cls.from_surfaces(surfaces, width, height, padding)
+
+    @classmethod
+    def from_directory(cls, directory, width=2048, height=2048, padding=1):
+        """
+        Packs the PNG images of `directory` into an atlas, naming each region
+        after its file without the extension. See `from_surfaces`.
+        """
+        return cls.from_files(_png_files(directory), width, height, padding)
+
+    @staticmethod
+    def regions_path(image_path):
+        return os.path.splitext(image_path)[0] + ".json"
+
+    def save(self, image_path):
+        """
+        Writes the atlas Surface to `image_path` and its regions to a JSON
+        file next to it, named like `regions_path` says.
+        """
+        pygame.image.save(self.surface, image_path)
+        regions = dict((name, list(rect)) for name, rect in self.regions.items())
+        with open(TextureAtlas.regions_path(image_path), "w") as f:
+            json.dump({"padding": self.padding, "regions": regions}, f, indent=2, sort_keys=True)
+
+    @classmethod
+    def load(cls, image_path):
+        """
+        Reads back an atlas written by `save`.
+        """
+        parser = JsonConfigParser()
+        with open(TextureAtlas.regions_path(image_path)) as f:
+            parser.parse_config(f)
+
+        surface = pygame.image.load(image_path)
+        if pygame.display.get_surface() is not None:
+            surface = surface.convert_alpha()
+        atlas = cls(surface.get_width(), surface.get_height(), parser.config_vals["padding"])
+        atlas.surface = surface
+        atlas.__set_regions(parser.config_vals["regions"])
+        return atlas
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print("Usage: python -m components.atlas <atlas.png> <directory>...")
+        sys.exit(1)
+
+    files = {}
+    for directory in sys.argv[2:]:
+        files.update(_png_files(directory))
+
+    atlas = TextureAtlas.from_files(files)
+    atlas.save(sys.argv[1])
+    print("Packed %d images into %s (%dx%d)." % ((len(atlas), sys.argv[1]) + atlas.surface.get_size()))
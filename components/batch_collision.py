@@ -0,0 +1,176 @@
+from . import broadphase
+from .broadphase import bounds_of
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+"""
+Collision detection between many boxes at once, with NumPy.
+
+Boxes are given as (N, 4) arrays of (left, top, right, bottom) rows, which
+`boxes_array` builds out of rects, sprites, CollisionBoxes or PointShapes. As
+elsewhere in the framework, boxes that only touch do not collide. NumPy is
+optional for the framework; only this module needs it.
+"""
+
+BROADCAST_LIMIT = 1 << 16
+"""
+Up to this many box comparisons, `box_pairs` compares every box against every
+other box; beyond that it sweeps and prunes.
+"""
+
+def boxes_array(objs, bounds=bounds_of):
+    """
+    The (len(objs), 4) float array of the (left, top, right, bottom) bounds
+    of `objs`, as given by `bounds`.
+    """
+    if numpy is None:
+        raise ImportError("boxes_array requires NumPy.")
+
+    boxes = numpy.array([bounds(obj) for obj in objs], dtype=numpy.float64)
+    return boxes.reshape(-1, 4)
+
+def _overlapping(boxes_a, boxes_b, idx_a, idx_b):
+    a = boxes_a[idx_a]
+    b = boxes_b[idx_b]
+    return (a[:, 0] < b[:, 2]) & (b[:, 0] < a[:, 2]) & (a[:, 1] < b[:, 3]) & (b[:, 1] < a[:, 3])
+
+def _nonempty(boxes):
+    return (boxes[:, 0] < boxes[:, 2]) & (boxes[:, 1] < boxes[:, 3])
+
+def _expand(starts, stops):
+    """
+    For ranges [starts[k], stops[k]), returns the arrays (k, i) of every
+    index i in the k-th range.
+    """
+    counts = numpy.maximum(stops - starts, 0)
+    owners = numpy.repeat(numpy.arange(len(starts)), counts)
+    firsts = numpy.repeat(starts - numpy.cumsum(counts) + counts, counts)
+    return owners, firsts + numpy.arange(len(owners))
+
+def _broadcast_pairs(boxes_a, boxes_b, same):
+    # Compare a few rows at a time to keep the boolean matrices small.
+    rows = max(1, BROADCAST_LIMIT // max(1, len(boxes_b)))
+    found_a = []
+    found_b = []
+    for start in range(0, len(boxes_a), rows):
+        a = boxes_a[start:start + rows, numpy.newaxis, :]
+        hits = (a[..., 0] < boxes_b[:, 2]) & (boxes_b[:, 0] < a[..., 2]) & \
+            (a[..., 1] < boxes_b[:, 3]) & (boxes_b[:, 1] < a[..., 3])
+        if same:
+            hits &= numpy.arange(start, start + len(a))[:, numpy.newaxis] < numpy.arange(len(boxes_b))
+        idx_a, idx_b = numpy.nonzero(hits)
+        found_a.append(idx_a + start)
+        found_b.append(idx_b)
+
+    return numpy.concatenate(found_a), numpy.concatenate(found_b)
+
+def _sweep_pairs(boxes_a, boxes_b, same):
+    order_b = numpy.argsort(boxes_b[:, 0], kind="stable")
+    lefts_b = boxes_b[order_b, 0]
+
+    if same:
+        # Every box against the boxes after it in left order that start
+        # before it ends.
+        positions = numpy.arange(len(order_b))
+        stops = numpy.searchsorted(lefts_b, boxes_b[order_b, 2], "left")
+        owners, others = _expand(positions + 1, stops)
+        idx_a = order_b[owners]
+        idx_b = order_b[others]
+        swap = idx_a > idx_b
+        idx_a, idx_b = numpy.where(swap, idx_b, idx_a), numpy.where(swap, idx_a, idx_b)
+    else:
+        order_a = numpy.argsort(boxes_a[:, 0], kind="stable")
+        lefts_a = boxes_a[order_a, 0]
+        # The boxes of b that start within a box of a...
+        starts = numpy.searchsorted(lefts_b, boxes_a[:, 0], "left")
+        stops = numpy.searchsorted(lefts_b, boxes_a[:, 2], "left")
+        owners, others = _expand(starts, stops)
+        first_a, first_b = owners, order_b[others]
+        # ...and the boxes of a that start strictly within a box of b.
+        starts = numpy.searchsorted(lefts_a, boxes_b[:, 0], "right")
+        stops = numpy.searchsorted(lefts_a, boxes_b[:, 2], "left")
+        owners, others = _expand(starts, stops)
+        idx_a = numpy.concatenate((first_a, order_a[others]))
+        idx_b = numpy.concatenate((first_b, owners))
+
+    keep = _overlapping(boxes_a, boxes_b, idx_a, idx_b)
+    return idx_a[keep], idx_b[keep]
+
+def box_pairs(boxes_a, boxes_b=None, method=None):
+    """
+    Finds the colliding pairs between the boxes of the (N, 4) array
+    `boxes_a` and those of the (M, 4) array `boxes_b`. If `boxes_b` is None,
+    finds the colliding pairs within `boxes_a` instead, each pair once.
+
+    Returns two int arrays (idx_a, idx_b) such that boxes_a[idx_a[k]]
+    collides with boxes_b[idx_b[k]] (or boxes_a[idx_b[k]]), sorted by idx_a
+    then idx_b. Within one group, idx_a[k] < idx_b[k].
+
+    @param method
+      "broadcast" to compare every pair of boxes at once, "sweep" to sort
+      the boxes along x and only compare those whose x ranges overlap. By
+      default, picks "broadcast" for up to BROADCAST_LIMIT comparisons.
+    """
+    if numpy is None:
+        raise ImportError("box_pairs requires NumPy.")
+
+    same = boxes_b is None
+    boxes_a = numpy.asarray(boxes_a, dtype=numpy.float64).reshape(-1, 4)
+    boxes_b = boxes_a if same else numpy.asarray(boxes_b, dtype=numpy.float64).reshape(-1, 4)
+
+    if method is None:
+        method = "broadcast" if len(boxes_a) * len(boxes_b) <= BROADCAST_LIMIT else "sweep"
+
+    if not len(boxes_a) or not len(boxes_b):
+        idx_a = idx_b = numpy.zeros(0, dtype=numpy.intp)
+    elif method == "broadcast":
+        idx_a, idx_b = _broadcast_pairs(boxes_a, boxes_b, same)
+    elif method == "sweep":
+        idx_a, idx_b = _sweep_pairs(boxes_a, boxes_b, same)
+    else:
+        raise ValueError("Unknown method %r." % method)
+
+    order = numpy.lexsort((idx_b, idx_a))
+    return idx_a[order], idx_b[order]
+
+def groupcollide(group_a, group_b, dokill_a, dokill_b, method=None):
+    """
+    A drop-in replacement for pygame.sprite.groupcollide, with the same
+    results and kill semantics, which finds all colliding rects in one
+    `box_pairs` call. Without NumPy, falls back to broadphase.groupcollide.
+    """
+    if numpy is None:
+        return broadphase.groupcollide(group_a, group_b, dokill_a, dokill_b)
+
+    sprites_a = group_a.sprites()
+    sprites_b = group_b.sprites()
+    boxes_a = boxes_array(sprites_a)
+    boxes_b = boxes_array(sprites_b)
+    idx_a, idx_b = box_pairs(boxes_a, boxes_b, method)
+    # As in pygame, empty rects collide with nothing.
+    keep = _nonempty(boxes_a)[idx_a] & _nonempty(boxes_b)[idx_b]
+    idx_a = idx_a[keep]
+    idx_b = idx_b[keep]
+
+    collisions = {}
+    killed = set()
+    for a, b in zip(idx_a.tolist(), idx_b.tolist()):
+        # Like pygame, sprites of group_b are killed as soon as they are hit,
+        # so later sprites of group_a do not get to hit them.
+        if b in killed:
+            continue
+
+        sprite = sprites_a[a]
+        collisions.setdefault(sprite, []).append(sprites_b[b])
+        if dokill_b:
+            killed.add(b)
+            sprites_b[b].kill()
+
+    if dokill_a:
+        for sprite in collisions:
+            sprite.kill()
+
+    return collisions
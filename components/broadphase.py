@@ -0,0 +1,249 @@
+import math
+
+"""
+Broadphase collision detection. Instead of testing every pair of objects,
+objects are bucketed by the cells of a uniform grid they overlap and only
+objects sharing a cell are tested against each other. The cost of finding
+collisions then depends on how crowded each cell is rather than on the total
+number of objects.
+"""
+
+def bounds_of(obj):
+    """
+    Returns the (left, top, right, bottom) of the axis-aligned bounding box of
+    `obj`, which may be a pygame.Rect, a sprite (anything with a `rect`), a
+    CollisionBox, a PointShape (anything with a `collision_box`) or a Drawable
+    with a bounding rect.
+    """
+    rect = getattr(obj, "rect", obj)
+    if hasattr(rect, "right") and hasattr(rect, "bottom"):
+        return (rect.x, rect.y, rect.right, rect.bottom)
+
+    box = getattr(obj, "collision_box", obj)
+    if hasattr(box, "upper_left") and hasattr(box, "lower_right"):
+        xs = (box.upper_left.x, box.lower_right.x)
+        ys = (box.upper_left.y, box.lower_right.y)
+        return (min(xs), min(ys), max(xs), max(ys))
+
+    if callable(getattr(obj, "bounding_rect", None)):
+        rect = obj.bounding_rect()
+        if rect is not None:
+            return (rect[0], rect[1], rect[0] + rect[2], rect[1] + rect[3])
+
+    raise TypeError("Cannot compute the bounds of %r." % obj)
+
+def bounds_overlap(a, b):
+    """
+    Whether the (left, top, right, bottom) boxes `a` and `b` overlap. Boxes
+    that only share an edge do not.
+    """
+    return a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
+
+class SpatialHash(object):
+    """
+    Indexes objects by the cells of a uniform grid of `cell_size` pixels that
+    their bounding boxes overlap. Only the cells with objects in them are
+    stored, so the grid is unbounded.
+
+    Objects are identified by identity, so they need not be hashable. After
+    an object moves, call `move` to update the index.
+
+    The cell size is best set to about the size of the typical object: much
+    smaller and objects span many cells, much larger and cells get crowded.
+    """
+
+    def __init__(self, cell_size=64, bounds=bounds_of):
+        """
+        @param cell_size
+          The width and height of a cell, in pixels.
+        @param bounds
+          The function that gives the (left, top, right, bottom) of an
+          object. Defaults to `bounds_of`.
+        """
+        self.cell_size = cell_size
+        self.bounds = bounds
+        self.__cells = {}
+        # id(obj) -> [obj, bounds, cell range]
+        self.__entries = {}
+
+    def __len__(self):
+        return len(self.__entries)
+
+    def __contains__(self, obj):
+        return id(obj) in self.__entries
+
+    def __iter__(self):
+        return (entry[0] for entry in self.__entries.values())
+
+    def __cell_range(self, bounds):
+        size = self.cell_size
+        return (
+            int(math.floor(bounds[0] / size)), int(math.floor(bounds[1] / size)),
+            int(math.floor(bounds[2] / size)), int(math.floor(bounds[3] / size))
+        )
+
+    @staticmethod
+    def __cells_in(cell_range):
+        for cx in range(cell_range[0], cell_range[2] + 1):
+            for cy in range(cell_range[1], cell_range[3] + 1):
+                yield (cx, cy)
+
+    def __add_to_cells(self, key, obj, cell_range):
+        for cell in SpatialHash.__cells_in(cell_range):
+            bucket = self.__cells.get(cell)
+            if bucket is None:
+                bucket = {}
+                self.__cells[cell] = bucket
+            bucket[key] = obj
+
+    def __remove_from_cells(self, key, cell_range):
+        for cell in SpatialHash.__cells_in(cell_range):
+            bucket = self.__cells[cell]
+            del bucket[key]
+            if not bucket:
+                del self.__cells[cell]
+
+    def insert(self, obj):
+        key = id(obj)
+        if key in self.__entries:
+            self.move(obj)
+            return
+
+        bounds = self.bounds(obj)
+        cell_range = self.__cell_range(bounds)
+        self.__entries[key] = [obj, bounds, cell_range]
+        self.__add_to_cells(key, obj, cell_range)
+
+    def remove(self, obj):
+        """
+        Removes `obj` from the index. Removing an object that is not in the
+        index does nothing.
+        """
+        entry = self.__entries.pop(id(obj), None)
+        if entry is not None:
+            self.__remove_from_cells(id(obj), entry[2])
+
+    def move(self, obj):
+        """
+        Updates the index after `obj` moved or changed size. Only touches the
+        cells if the object crossed into other cells.
+        """
+        key = id(obj)
+        entry = self.__entries.get(key)
+        if entry is None:
+            self.insert(obj)
+            return
+
+        bounds = self.bounds(obj)
+        cell_range = self.__cell_range(bounds)
+        entry[1] = bounds
+        if cell_range != entry[2]:
+            self.__remove_from_cells(key, entry[2])
+            self.__add_to_cells(key, obj, cell_range)
+            entry[2] = cell_range
+
+    def clear(self):
+        self.__cells.clear()
+        self.__entries.clear()
+
+    def query(self, bounds):
+        """
+        Returns a list of the objects whose bounding boxes overlap the
+        (left, top, right, bottom) box `bounds`.
+        """
+        seen = set()
+        found = []
+        for cell in SpatialHash.__cells_in(self.__cell_range(bounds)):
+            for key, obj in self.__cells.get(cell, {}).items():
+                if key not in seen:
+                    seen.add(key)
+                    if bounds_overlap(bounds, self.__entries[key][1]):
+                        found.append(obj)
+        return found
+
+    def query_point(self, x, y):
+        """
+        Returns a list of the objects whose bounding boxes contain (x, y).
+        """
+        cell = (int(math.floor(x / self.cell_size)), int(math.floor(y / self.cell_size)))
+        found = []
+        for key, obj in self.__cells.get(cell, {}).items():
+            left, top, right, bottom = self.__entries[key][1]
+            if left <= x < right and top <= y < bottom:
+                found.append(obj)
+        return found
+
+    def candidate_pairs(self):
+        """
+        Returns a list of the (obj_a, obj_b) pairs of objects that share at
+        least one cell, each pair once. These are the only pairs that may
+        collide.
+        """
+        seen = set()
+        pairs = []
+        for bucket in self.__cells.values():
+            if len(bucket) < 2:
+                continue
+
+            keys = sorted(bucket)
+            for idx, key_a in enumerate(keys):
+                for key_b in keys[idx + 1:]:
+                    if (key_a, key_b) not in seen:
+                        seen.add((key_a, key_b))
+                        pairs.append((bucket[key_a], bucket[key_b]))
+        return pairs
+
+    def colliding_pairs(self, test=None):
+        """
+        Returns a list of the (obj_a, obj_b) pairs whose bounding boxes
+        overlap and, if given, for which `test(obj_a, obj_b)` is True (for
+        instance, a more precise narrowphase test).
+        """
+        entries = self.__entries
+        pairs = []
+        for obj_a, obj_b in self.candidate_pairs():
+            if bounds_overlap(entries[id(obj_a)][1], entries[id(obj_b)][1]):
+                if test is None or test(obj_a, obj_b):
+                    pairs.append((obj_a, obj_b))
+        return pairs
+
+def groupcollide(group_a, group_b, dokill_a, dokill_b, cell_size=64):
+    """
+    A drop-in replacement for pygame.sprite.groupcollide: returns a dict
+    mapping each sprite of `group_a` that collides with sprites of `group_b`
+    to the list of those sprites, killing the collided sprites of either group
+    as asked. Sprites collide if their rects overlap.
+
+    Instead of testing every pair of sprites, `group_b` is indexed in a
+    SpatialHash, so this takes time proportional to the sizes of the groups
+    and the number of nearby sprites.
+    """
+    index = SpatialHash(cell_size)
+    order = {}
+    for sprite in group_b:
+        order[id(sprite)] = len(order)
+        # As in pygame, empty rects collide with nothing.
+        if sprite.rect.width and sprite.rect.height:
+            index.insert(sprite)
+
+    collisions = {}
+    for sprite in group_a.sprites():
+        if not (sprite.rect.width and sprite.rect.height):
+            continue
+
+        hits = index.query(bounds_of(sprite))
+        if not hits:
+            continue
+
+        # Like pygame, list the hits in the order of group_b and kill them
+        # right away, so that later sprites of group_a cannot hit them.
+        hits.sort(key=lambda hit: order[id(hit)])
+        collisions[sprite] = hits
+        if dokill_b:
+            for hit in hits:
+                index.remove(hit)
+                hit.kill()
+        if dokill_a:
+            sprite.kill()
+
+    return collisions
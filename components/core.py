@@ -1,11 +1,15 @@
 
 
+from .aabb_tree import AABBTree
 from .config import JsonConfigParser
+from .drawable import Drawable
+from .profiler import FrameProfiler
 from .subscriber_pattern import Publisher
 from .subscriber_pattern import Subscriber
 
 import logging
 import math
+import os
 import pygame
 
 """
@@ -77,7 +81,8 @@ class GameConfig(Publisher):
     HEIGHT_INDEX = 1
     
     def __init__(self, clock_rate=0, window_size=None, window_title=None,
-      debug_mode=False, log_to_terminal=False):
+      debug_mode=False, log_to_terminal=False, headless=False,
+      dirty_rendering=False):
         super(GameConfig, self).__init__()
         self.__values = {}
         self.__values["window_size"] = window_size if window_size else (0, 0)
@@ -85,6 +90,8 @@ class GameConfig(Publisher):
         self.__values["clock_rate"] = clock_rate
         self.__values["debug_mode"] = debug_mode
         self.__values["log_to_terminal"] = log_to_terminal
+        self.__values["headless"] = headless
+        self.__values["dirty_rendering"] = dirty_rendering
 
     def set_config_val(self, config_key, val):
         arg_bundle = {}
@@ -112,20 +119,50 @@ class GameConfig(Publisher):
 class GameLoop(object):
     """
     A basic PyGame Game Loop.
+
+    Every frame, `sim_time` advances by the config value `sim_timestep` (in
+    milliseconds). When `sim_timestep` is not set, it is derived from
+    `clock_rate`. Both are set on the GameLoopEvents before `loop_event` so
+    that games can step their simulation by them.
+
+    If the GameConfig has `headless` set, the loop runs as a fixed-timestep
+    simulation: the window is an offscreen Surface, nothing is presented and
+    frames are not throttled to wall-clock time.
+
+    If the GameConfig has `dirty_rendering` set, only the regions reported
+    through `GameScreen.mark_dirty` are pushed to the display and frames where
+    nothing was reported are not presented at all.
+
+    Frame phases are timed into the GameLoopEvents' `profiler` when
+    `debug_mode` or `profile_frames` is set. If the config value
+    `profile_export` holds a path, the timings are written there once the loop
+    ends (see FrameProfiler.export).
     
     @author Chad Estioco
     """
+
+    TEST_FRAME_LIMIT = 5
     
-    def __init__(self, loop_events, is_test=False):
+    def __init__(self, loop_events, is_test=False, frame_limit=None):
         """
         Initializes a GameLoop.
         
         @param loop_events
           An instance of GameLoopEvents.
+        @param is_test
+          If set, the loop stops after GameLoop.TEST_FRAME_LIMIT frames.
+        @param frame_limit
+          The maximum number of frames to run. Takes precedence over is_test.
+          Defaults to None, which means the loop only stops when
+          `loop_invariant` says so.
         """
         self.loop_events = loop_events
         self.game_configurations = loop_events.config
-        self.__is_test = is_test
+        if frame_limit is None and is_test:
+            frame_limit = GameLoop.TEST_FRAME_LIMIT
+        self.frame_limit = frame_limit
+        self.frame_count = 0
+        self.sim_time = 0
     
     def __handle_event(self, event):
         event_code = event.type
@@ -133,6 +170,17 @@ class GameLoop(object):
             #TODO: Passing arguments?
             for evh in self.loop_events.event_handlers[event_code]:
                 evh(event)
+
+    def __sim_timestep(self):
+        """
+        The amount of simulated time, in milliseconds, that passes per frame.
+        """
+        timestep = self.game_configurations.get_config_val("sim_timestep")
+        if timestep:
+            return timestep
+
+        clock_rate = self.game_configurations.get_config_val("clock_rate")
+        return 1000.0 / clock_rate if clock_rate else 0
     
     def go(self):
         """
@@ -143,33 +191,69 @@ class GameLoop(object):
           (2) Window invocation (GameLoopEvents.invoke_window()); background
               color set-up and caption set-up
         """
+        headless = self.game_configurations.get_config_val("headless")
+        dirty_rendering = self.game_configurations.get_config_val("dirty_rendering")
         try:
             print("pygame init")
+            if headless:
+                # So that the event queue still works without an X server.
+                os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
             pygame.init()
             pygame.font.init()
             clock = pygame.time.Clock()
+            timestep = self.__sim_timestep()
             
             self.loop_events.loop_setup()
-            i = 0
+            self.frame_count = 0
+            self.sim_time = 0
+            self.loop_events.sim_time = 0
+            self.loop_events.sim_timestep = timestep
             
             while self.loop_events.loop_invariant():
-                clock.tick(self.loop_events.config.get_config_val("clock_rate"))
-                for event in pygame.event.get():
+                if not headless:
+                    clock.tick(self.loop_events.config.get_config_val("clock_rate"))
+                self.sim_time += timestep
+                self.loop_events.sim_time = self.sim_time
+
+                # Read every frame since the events may hand over to others.
+                profiler = self.loop_events.profiler
+                profiler.begin_frame()
+                profiler.begin("event_pump")
+                events = pygame.event.get()
+                profiler.end("event_pump")
+
+                profiler.begin("event_dispatch")
+                for event in events:
                     self.__handle_event(event)
+                profiler.end("event_dispatch")
                 
+                profiler.begin("loop_event")
                 self.loop_events.loop_event()
-                pygame.display.flip()
-
-                if self.__is_test:
-                    i += 1
-                    if i > 4: # FIXME: Magic number!
-                        break
+                profiler.end("loop_event")
+
+                profiler.begin("present")
+                if dirty_rendering:
+                    dirty_rects = self.loop_events.game_screen.consume_dirty_rects()
+                    if dirty_rects and not headless:
+                        pygame.display.update(dirty_rects)
+                elif not headless:
+                    pygame.display.flip()
+                profiler.end("present")
+                profiler.end_frame()
+
+                self.frame_count += 1
+                if self.frame_limit is not None and self.frame_count >= self.frame_limit:
+                    break
         except (KeyboardInterrupt, SystemExit):
             raise
         except:
             import traceback
             traceback.print_exc()
         finally:
+            export_path = self.game_configurations.get_config_val("profile_export")
+            profiler = self.loop_events.profiler
+            if profiler.enabled and export_path:
+                profiler.export(export_path)
             pygame.quit()
             pygame.font.quit()
 
@@ -201,6 +285,8 @@ class GameScreen(Subscriber):
         self.model = model
         self.model.subscribe(self)
         self.ui_elements = set()
+        self.__dirty_rects = []
+        self.__clickables = AABBTree()
     
     @property
     def screen_size(self):
@@ -223,6 +309,91 @@ class GameScreen(Subscriber):
         in_height = drawable.draw_offset[0] <= pos[1] <= height_limit
 
         return in_width and in_height
+
+    def add_clickable(self, drawable):
+        """
+        Make `drawable` show up in `clicked_drawables`. The Drawable must have
+        a bounded size. If it moves or is resized afterwards, call
+        `update_clickable`.
+        """
+        self.__clickables.insert(drawable)
+
+    def update_clickable(self, drawable):
+        self.__clickables.move(drawable)
+
+    def remove_clickable(self, drawable):
+        self.__clickables.remove(drawable)
+
+    def clicked_drawables(self, pos):
+        """
+        Returns the clickable Drawables under `pos`, which is taken straight
+        from `pygame.mouse.get_pos()` like in `_is_drawable_clicked`. Unlike
+        checking every Drawable, this only looks at the ones near `pos`.
+        """
+        return self.__clickables.query_point(pos[0], pos[1])
+
+    @property
+    def is_dirty(self):
+        """
+        Whether some region has been marked dirty since the last time the
+        dirty rects were consumed.
+        """
+        return len(self.__dirty_rects) > 0
+
+    def mark_dirty(self, region=None):
+        """
+        Report a region of the window that changed in this frame so that the
+        GameLoop pushes it to the display. This does nothing unless the config
+        value `dirty_rendering` is set.
+
+        @param region
+          Either an (x, y, width, height) rect-style object or a Drawable. If
+          None, or if the Drawable has no bounded size, the whole screen is
+          considered dirty.
+        """
+        if not self.config.get_config_val("dirty_rendering"):
+            return
+
+        if isinstance(region, Drawable):
+            region = region.bounding_rect()
+
+        if region is None:
+            region = (0, 0, self.screen_dimensions[0], self.screen_dimensions[1])
+
+        self.__dirty_rects.append(pygame.Rect(region))
+
+    def consume_dirty_rects(self):
+        """
+        Returns the regions marked dirty since the last call, with overlapping
+        and touching rects merged, and clears them.
+        """
+        merged = GameScreen.merge_rects(self.__dirty_rects)
+        self.__dirty_rects = []
+        return merged
+
+    @staticmethod
+    def merge_rects(rects):
+        """
+        Merge the given pygame.Rects until no two of them overlap or touch.
+        Returns a new list.
+        """
+        merged = []
+        for rect in rects:
+            rect = pygame.Rect(rect)
+            # A merge grows the rect so it may now reach rects it previously
+            # did not. Keep going until it settles.
+            absorbed = True
+            while absorbed:
+                absorbed = False
+                for idx, other in enumerate(merged):
+                    if rect.inflate(2, 2).colliderect(other):
+                        rect.union_ip(merged.pop(idx))
+                        absorbed = True
+                        break
+
+            merged.append(rect)
+
+        return merged
     
     def setup(self):
         """
@@ -264,12 +435,10 @@ class DebugQueue(Subscriber):
     DISPLAY_PADDING = 4
     LINE_DISTANCE = 2
     FONT_SIZE = 18
-    # TODO Handle case where font is not available.
-    try:
-        FONT = pygame.font.Font("/usr/local/pygame-fonts/Inconsolata-Regular.ttf", FONT_SIZE)
-    except IOError:
-        FONT = pygame.font.Font(None, FONT_SIZE)
+    FONT_PATH = "/usr/local/pygame-fonts/Inconsolata-Regular.ttf"
     LOG_FORMAT = "%(asctime)s %(levelname)s %(message)s"
+    # Re-render the profiler overlay only every this many calls.
+    PROFILE_REFRESH = 30
 
     LOG_COLORS = {
         logging.CRITICAL: Colors.MAX_RED,
@@ -286,6 +455,10 @@ class DebugQueue(Subscriber):
         self.fps_rate = self.game_screen.config.get_config_val("frame_rate")
         self.original_dims = self.game_screen.config.get_config_val("window_size")
         self.max_q_size = self.__get_max_log_display()
+        self.__q_changed = False
+        self.__profile_renders = []
+        self.__profile_calls = 0
+        self.__font = None
 
         # This will be properly set in GameLoopEvents.configurable_setup
         self.window = None
@@ -310,6 +483,22 @@ class DebugQueue(Subscriber):
             if len(self.q) == self.max_q_size:
                 self.q.pop(0)
             self.q.append(DebugQueue.LogLine(log, level))
+            self.__q_changed = True
+
+    @property
+    def font(self):
+        """
+        Fonts die with the pygame.font session they were made in, and GameLoop
+        quits pygame.font when it ends, so this is only created once we are
+        actually rendering.
+        """
+        if self.__font is None:
+            try:
+                self.__font = pygame.font.Font(DebugQueue.FONT_PATH, DebugQueue.FONT_SIZE)
+            except IOError:
+                self.__font = pygame.font.Font(None, DebugQueue.FONT_SIZE)
+
+        return self.__font
 
     def __yposgen(self, x):
         return (DebugQueue.LINE_DISTANCE * (x - 1)) + (DebugQueue.FONT_SIZE * x) + self.original_dims[1] + DebugQueue.DISPLAY_PADDING
@@ -325,17 +514,66 @@ class DebugQueue(Subscriber):
             
     def display_logs(self):
         if self.window and self.q:
+            if self.game_screen.config.get_config_val("dirty_rendering"):
+                # Nobody repaints the window every frame in this mode so we
+                # clear our own area, and only when there is something new.
+                if not self.__q_changed:
+                    return
+
+                debug_area = (
+                    0, self.original_dims[1], self.game_screen.screen_dimensions[0],
+                    GameScreen.DEBUG_SPACE_PROVISIONS
+                )
+                self.window.fill(Colors.MAX_WHITE, debug_area)
+                self.game_screen.mark_dirty(debug_area)
+
+            self.__q_changed = False
             for idx, val in enumerate(self.q):
                 mul = idx + 1
                 color = DebugQueue.LOG_COLORS[val.level]
-                log_render = DebugQueue.FONT.render(val.log, True, color)
+                log_render = self.font.render(val.log, True, color)
                 self.window.blit(log_render, (DebugQueue.DISPLAY_PADDING, self.__yposgen(mul)))
+
+    def display_profile(self, profiler):
+        """
+        Draws the summary of the given FrameProfiler on the right half of the
+        debug area.
+        """
+        if not self.window or not profiler.frames:
+            return
+
+        refresh = self.__profile_calls % DebugQueue.PROFILE_REFRESH == 0
+        self.__profile_calls += 1
+        half_width = int(self.game_screen.screen_dimensions[0] / 2)
+
+        if refresh:
+            self.__profile_renders = [
+                self.font.render(line, True, Colors.DIM_GRAY)
+                for line in profiler.report_lines()
+            ]
+            overlay_area = (
+                half_width, self.original_dims[1], half_width,
+                GameScreen.DEBUG_SPACE_PROVISIONS
+            )
+            self.window.fill(Colors.MAX_WHITE, overlay_area)
+            self.game_screen.mark_dirty(overlay_area)
+        elif self.game_screen.config.get_config_val("dirty_rendering"):
+            # What we drew last time is still on screen.
+            return
+
+        xpos = half_width + DebugQueue.DISPLAY_PADDING
+        for idx, render in enumerate(self.__profile_renders):
+            self.window.blit(render, (xpos, self.__yposgen(idx + 1)))
     
 class GameLoopEvents(Subscriber):
     """
     The controller.
     
     Encapsulates the stuff that happens inside a game loop.
+
+    The GameLoop keeps `sim_time` and `sim_timestep`, in milliseconds, up to
+    date for `loop_event`: `sim_time` is the simulated time up to and
+    including the current frame, which lasts `sim_timestep`.
     """
 
     class KeyControls(object):
@@ -357,6 +595,8 @@ class GameLoopEvents(Subscriber):
             if handler:
                 handler(event)
     
+    CLICK_EVENTS = (pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP)
+
     def __init__(self, game_screen):
         """
         Initializes a GameLoopEvents object. It is important that subclasses
@@ -370,6 +610,16 @@ class GameLoopEvents(Subscriber):
         self.__game_screen = game_screen
 
         self.debug_queue = DebugQueue(game_screen)
+        self.sim_time = 0
+        self.sim_timestep = 0
+        clock_rate = self.__config.get_config_val("clock_rate")
+        self.profiler = FrameProfiler(
+            frame_budget=1000.0 / clock_rate if clock_rate else None,
+            enabled=bool(
+                self.__config.get_config_val("debug_mode") or
+                self.__config.get_config_val("profile_frames")
+            )
+        )
         
         self.__config.subscribe(self)
         self.__event_handlers = {}
@@ -433,8 +683,30 @@ class GameLoopEvents(Subscriber):
         GameLoopEvents.loop_setup.
         """
         for common_ui in self.game_screen.ui_elements:
+            # CommonUIs without size limits have no bounds to click in, so
+            # they get every click like before.
+            clickable = common_ui.bounding_rect() is not None
+            if clickable:
+                self.game_screen.add_clickable(common_ui)
+
             for ev_code, ev_handler in common_ui._event_handlers.items():
+                if clickable and ev_code in GameLoopEvents.CLICK_EVENTS:
+                    ev_handler = self.__click_handler(common_ui, ev_handler)
                 self.add_event_handler(pygame.event.Event(ev_code), ev_handler)
+
+    def __click_handler(self, common_ui, handler):
+        """
+        Wraps `handler` so that it only gets the clicks that land on
+        `common_ui`. Events without a position still go through.
+        """
+        def handle(event):
+            pos = getattr(event, "pos", None)
+            if pos is None or any(
+                drawable is common_ui for drawable in self.game_screen.clicked_drawables(pos)
+            ):
+                handler(event)
+
+        return handle
     
     def loop_invariant(self):
         """
@@ -455,8 +727,13 @@ class GameLoopEvents(Subscriber):
         The basic code for creating and returning a window is already
         written. Override this only when you need extra set-up. Extensions
         of this class can access the created window via the accessor, window.
+
+        When running headless, the window is an offscreen Surface.
         """
-        self.__window = pygame.display.set_mode(window_size)
+        if self.config.get_config_val("headless"):
+            self.__window = pygame.Surface(window_size)
+        else:
+            self.__window = pygame.display.set_mode(window_size)
         return self.__window
     
     @property
@@ -474,18 +751,30 @@ class GameLoopEvents(Subscriber):
         
         By default, this already draws the GameScreen object.
         """
+        self.profiler.begin("draw_unchanging")
         self.game_screen.draw_unchanging(self.window)
+        self.profiler.end("draw_unchanging")
+
+        self.profiler.begin("draw_screen")
         self.game_screen.draw_screen(self.window)
+        self.profiler.end("draw_screen")
+
         if self.debug_queue:
+            self.profiler.begin("display_logs")
             self.debug_queue.display_logs()
+            if self.config.get_config_val("debug_mode"):
+                self.debug_queue.display_profile(self.profiler)
+            self.profiler.end("display_logs")
     
     def configurable_setup(self):
         """
         Holds the set-up code affected by GameConfig.
         """
-        pygame.display.set_caption(self.config.get_config_val("window_title"))
+        if not self.config.get_config_val("headless"):
+            pygame.display.set_caption(self.config.get_config_val("window_title"))
         window = self.invoke_window(self.game_screen.screen_dimensions)
         window.fill(Colors.MAX_WHITE)
+        self.game_screen.mark_dirty()
 
         if self.config.get_config_val("debug_mode"):
             self.debug_queue.window = window
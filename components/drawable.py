@@ -20,6 +20,16 @@ class Drawable(object):
         # the screen's height.
         self.max_size = (width_limit, height_limit)
     
+    def bounding_rect(self):
+        """
+        The (x, y, width, height) region of the window this Drawable occupies.
+        Returns None if either of its size limits is not set.
+        """
+        if self.max_size[0] is None or self.max_size[1] is None:
+            return None
+
+        return (self.draw_offset[1], self.draw_offset[0], self.max_size[0], self.max_size[1])
+    
     def draw(self, window, screen, **kwargs):
         """
         Implement all drawing logic here!
@@ -0,0 +1,134 @@
+from components.helpers.grid import QuadraticGrid
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+"""
+A QuadraticGrid backed by a NumPy array, for grids too big to walk cell by cell
+in Python. NumPy is optional for the framework; only this module needs it.
+"""
+
+class ArrayGrid(QuadraticGrid):
+    """
+    A QuadraticGrid whose `grid` property is a typed 2D NumPy array, indexed
+    `grid[row][col]` (or `grid[row, col]`) like the list-based grid. Drawing,
+    `get_adjacent` and `get_clicked_cell` work as in QuadraticGrid. On top of
+    that, this class offers vectorized operations over all the cells at once.
+    """
+
+    def __init__(
+         self, grid_width, grid_height, width_limit=None, height_limit=None,
+         hv_neighbors=True, diag_neighbors=True, draw_offset=None,
+         border_properties=None, dtype=None, fill_value=0
+    ):
+        """
+        Takes the same parameters as QuadraticGrid plus the following.
+
+        @param dtype
+          The NumPy dtype of the cells. Defaults to what NumPy infers from
+          fill_value.
+        @param fill_value
+          The initial value of every cell. Defaults to 0.
+        """
+        if numpy is None:
+            raise ImportError("ArrayGrid requires NumPy.")
+
+        # Needed by _cons_grid, which QuadraticGrid.__init__ calls.
+        self.__dtype = dtype
+        self.__fill_value = fill_value
+        super(ArrayGrid, self).__init__(
+            grid_width, grid_height, width_limit, height_limit, hv_neighbors,
+            diag_neighbors, draw_offset, border_properties
+        )
+
+    def _cons_grid(self, grid_width, grid_height):
+        return numpy.full((grid_height, grid_width), self.__fill_value, dtype=self.__dtype)
+
+    def fill(self, value, mask=None):
+        """
+        Set every cell, or only the cells where the boolean array `mask` is
+        True, to `value`.
+        """
+        if mask is None:
+            self.grid[...] = value
+        else:
+            self.grid[mask] = value
+
+    def mask(self, value):
+        """
+        Returns a boolean array that is True where the cell equals `value`.
+        """
+        return self.grid == value
+
+    def count(self, value=None, mask=None):
+        """
+        Count the cells equal to `value`, or the True cells of `mask`.
+        """
+        if mask is None:
+            mask = self.mask(value)
+
+        return int(numpy.count_nonzero(mask))
+
+    def cells(self, mask):
+        """
+        Returns a list of (row, col) tuples of the True cells of `mask`.
+        """
+        return [tuple(int(i) for i in cell) for cell in numpy.argwhere(mask)]
+
+    def shift(self, drow, dcol, fill_value=None):
+        """
+        Shift the contents of the grid in place by `drow` rows and `dcol`
+        columns. Cells shifted off the edge are lost; cells left uncovered get
+        `fill_value` (defaults to the initial fill value of the grid).
+        """
+        if fill_value is None:
+            fill_value = self.__fill_value
+
+        height, width = self.grid.shape
+        shifted = numpy.full_like(self.grid, fill_value)
+        src_rows, dst_rows = ArrayGrid.__shift_slices(drow, height)
+        src_cols, dst_cols = ArrayGrid.__shift_slices(dcol, width)
+        shifted[dst_rows, dst_cols] = self.grid[src_rows, src_cols]
+        self.grid[...] = shifted
+
+    @staticmethod
+    def __shift_slices(delta, length):
+        """
+        The source and destination slices of a shift by `delta` along an axis
+        of the given length.
+        """
+        if delta >= 0:
+            return slice(0, max(length - delta, 0)), slice(min(delta, length), length)
+        else:
+            return slice(min(-delta, length), length), slice(0, max(length + delta, 0))
+
+    def neighbor_offsets(self):
+        """
+        The (drow, dcol) offsets of the neighbors of a cell, as decided by
+        `hv_neighbors` and `diag_neighbors`.
+        """
+        offsets = []
+        if self.hv_neighbors:
+            offsets.extend((QuadraticGrid.Movements.UP, QuadraticGrid.Movements.DOWN,
+              QuadraticGrid.Movements.LEFT, QuadraticGrid.Movements.RIGHT))
+        if self.diag_neighbors:
+            offsets.extend(((-1, -1), (-1, 1), (1, -1), (1, 1)))
+        return offsets
+
+    def neighbor_count(self, mask):
+        """
+        For every cell, count how many of its neighbors are True in `mask`.
+        This is a convolution of `mask` with the neighborhood kernel, with
+        everything outside the grid counting as False.
+        """
+        height, width = mask.shape
+        padded = numpy.zeros((height + 2, width + 2), dtype=numpy.int32)
+        padded[1:-1, 1:-1] = mask
+        counts = numpy.zeros((height, width), dtype=numpy.int32)
+
+        for drow, dcol in self.neighbor_offsets():
+            counts += padded[1 + drow:1 + drow + height, 1 + dcol:1 + dcol + width]
+
+        return counts
@@ -4,9 +4,13 @@
 from components.core import Colors, GameScreen
 from components.drawable import Drawable
 from components.framework_exceptions import VectorDirectionException
+from components.subscriber_pattern import Subscriber
 
+import array
+import collections
 import math
 import pygame
+import weakref
 
 """
 This file contains models for grids.
@@ -25,6 +29,34 @@ class BorderProperties(object):
         self.color = color
         self.thickness = thickness
 
+class LayoutInvalidator(Subscriber):
+    """
+    Subscribes to a GameConfig on behalf of a QuadraticGrid so that the grid
+    drops its cached geometry when the window size changes.
+
+    Only a weak reference to the grid is kept so that the GameConfig does not
+    keep discarded grids alive. Once the grid is gone, this unsubscribes
+    itself the next time it is notified.
+    """
+
+    def __init__(self, grid):
+        super(LayoutInvalidator, self).__init__()
+        self.__grid = weakref.ref(grid)
+
+    @property
+    def grid(self):
+        """
+        The QuadraticGrid, or None if it has been garbage collected.
+        """
+        return self.__grid()
+
+    def notify(self, observed, arg_bundle=None):
+        grid = self.grid
+        if grid is None:
+            observed.unsubscribe(self)
+        elif arg_bundle and arg_bundle.get("config_key") == "window_size":
+            grid.invalidate_layout()
+
 class Grid(Drawable):
     """
     A grid must be drawable (and traversable)!
@@ -123,10 +155,23 @@ class QuadraticGrid(Grid):
         if grid_width <= 0 or grid_height <= 0:
             raise ValueError("Grid dimensions must be positive.")
         
-        self.__grid = [[i for i in range(grid_width)] for j in range(grid_height)]
+        self.__grid = self._cons_grid(grid_width, grid_height)
+        self.__adjacency = None
         self.hv_neighbors = hv_neighbors
         self.diag_neighbors = diag_neighbors
         self.border_properties = border_properties
+        self.__layout_config = None
+        self.__layout_invalidator = LayoutInvalidator(self)
+        self.__border_layer = None
+        self.__border_layer_key = None
+
+    def _cons_grid(self, grid_width, grid_height):
+        """
+        Creates the object held by the `grid` property. Subclasses may override
+        this to store cells differently as long as the result can be indexed as
+        `grid[row][col]` and `len` gives the number of rows.
+        """
+        return [[i for i in range(grid_width)] for j in range(grid_height)]
 
     def __compute_block_dimension(self, config, dim):
         """
@@ -151,47 +196,151 @@ class QuadraticGrid(Grid):
 
         return dimension_size
     
+    @property
+    def draw_offset(self):
+        return self.__draw_offset
+
+    @draw_offset.setter
+    def draw_offset(self, draw_offset):
+        self.__draw_offset = draw_offset
+        self.invalidate_layout()
+
+    def invalidate_layout(self):
+        """
+        Drop the cached cell geometry so it gets recomputed on the next draw.
+        This already happens when `draw_offset` or the window size in the
+        GameConfig changes; call this if you change anything else affecting
+        the geometry, like `max_size`.
+        """
+        self.__layout = None
+
+    def detach_layout(self):
+        """
+        Stop listening to the GameConfig this grid was last drawn with and drop
+        the cached cell geometry. Drawing the grid again reattaches it.
+        """
+        if self.__layout_config is not None:
+            self.__layout_config.unsubscribe(self.__layout_invalidator)
+            self.__layout_config = None
+        self.__layout = None
+
+    def __get_layout(self, config):
+        """
+        Returns (block_width, block_height, rects) where rects lists the rect of
+        every cell, row by row, in the format used by `cons_rect_list`.
+        """
+        if self.__layout_config is not config:
+            if self.__layout_config is not None:
+                self.__layout_config.unsubscribe(self.__layout_invalidator)
+            config.subscribe(self.__layout_invalidator)
+            self.__layout_config = config
+            self.__layout = None
+
+        if self.__layout is None:
+            block_width = self.__compute_block_dimension(config, "width")
+            block_height = self.__compute_block_dimension(config, "height")
+            rects = [
+                QuadraticGrid.make_rect(
+                    (i, j), block_width, block_height, self.draw_offset[1],
+                    self.draw_offset[0]
+                )
+                for i in range(len(self.grid)) for j in range(len(self.grid[0]))
+            ]
+            self.__layout = (block_width, block_height, rects)
+
+        return self.__layout
+    
     def draw(self, window, screen, **kwargs):
         """
         window - A Surface instance to draw on.
         screen - A GameScreen instance.
-        """
-        block_width = self.__compute_block_dimension(screen.config, "width")
-        block_height = self.__compute_block_dimension(screen.config, "height")
-        rects, renders = QuadraticGrid.cons_rect_list(
-          self, screen.model, block_width, block_height, self.draw_offset
-        )
 
-        for rct, rndr in zip(rects, renders):
-            pygame.draw.rect(window, rndr, rct, 0)
+        Pass the keyword argument `cells`, an iterable of (row, col) tuples, to
+        redraw only those cells. Only the rendering of the drawn cells is
+        queried from the model. Drawn areas are reported to
+        `GameScreen.mark_dirty`.
+        """
+        block_width, block_height, rects = self.__get_layout(screen.config)
+        width = len(self.grid[0])
+        cells = kwargs.get("cells")
+
+        if cells is None:
+            idx = 0
+            for i in range(len(self.grid)):
+                for j in range(width):
+                    pygame.draw.rect(window, screen.model.render(row=i, col=j), rects[idx], 0)
+                    idx += 1
+
+            screen.mark_dirty((
+                self.draw_offset[1], self.draw_offset[0], block_width * width,
+                block_height * len(self.grid)
+            ))
+        else:
+            for i, j in cells:
+                rct = rects[i * width + j]
+                pygame.draw.rect(window, screen.model.render(row=i, col=j), rct, 0)
+                screen.mark_dirty(rct)
 
-        # Draw the borders
         if self.border_properties:
+            layer = self.__get_border_layer(block_width, block_height)
+            pad = self.border_properties.thickness
+            layer_x = self.draw_offset[1] - pad
+            layer_y = self.draw_offset[0] - pad
+
+            if cells is None:
+                screen.mark_dirty(window.blit(layer, (layer_x, layer_y)))
+            else:
+                # Filling a cell paints over its share of the borders.
+                for i, j in cells:
+                    rct = rects[i * width + j]
+                    area = (rct[0] - layer_x - pad, rct[1] - layer_y - pad,
+                      rct[2] + 2 * pad, rct[3] + 2 * pad)
+                    screen.mark_dirty(window.blit(layer, (rct[0] - pad, rct[1] - pad), area))
+
+    def __get_border_layer(self, block_width, block_height):
+        """
+        Returns a transparent Surface with all the borders of the grid drawn on
+        it, re-rendering it only if the geometry or the border properties
+        changed. The Surface is padded by the border thickness on all sides so
+        thick end borders are not clipped. So, its upper-left corner goes at
+        `draw_offset` minus the thickness.
+        """
+        color = self.border_properties.color
+        thickness = self.border_properties.thickness
+        key = (block_width, block_height, tuple(color), thickness)
+
+        if self.__border_layer is None or self.__border_layer_key != key:
+            rows = len(self.grid)
+            cols = len(self.grid[0])
+            grid_width = block_width * cols
+            grid_height = block_height * rows
+            pad = thickness
+            layer = pygame.Surface(
+                (grid_width + 2 * pad, grid_height + 2 * pad), pygame.SRCALPHA
+            )
+
             # There will always be n + 1 borders to be drawn on either direction
             # since we need to draw the end borders too. (Where n is the grid
             # dimension.)
-            vborders_limit = len(self.grid[0]) + 1
-            vgrid_pos_limit = (block_height * len(self.grid[0])) + self.draw_offset[0]
-
-            for vborders_offset in range(vborders_limit):
-                v_offset = block_width * vborders_offset + self.draw_offset[1]
+            for vborders_offset in range(cols + 1):
+                v_offset = block_width * vborders_offset + pad
                 pygame.draw.line(
-                    window, self.border_properties.color,
-                    (v_offset, self.draw_offset[0]), (v_offset, vgrid_pos_limit),
-                    self.border_properties.thickness
+                    layer, color, (v_offset, pad), (v_offset, grid_height + pad),
+                    thickness
                 )
 
-            hborders_limit = len(self.grid) + 1
-            hgrid_pos_limit = (block_width * len(self.grid)) + self.draw_offset[1]
-
-            for hborders_offset in range(hborders_limit):
-                h_offset = block_height * hborders_offset + self.draw_offset[0]
+            for hborders_offset in range(rows + 1):
+                h_offset = block_height * hborders_offset + pad
                 pygame.draw.line(
-                    window, self.border_properties.color,
-                    (self.draw_offset[1], h_offset), (hgrid_pos_limit, h_offset),
-                    self.border_properties.thickness
+                    layer, color, (pad, h_offset), (grid_width + pad, h_offset),
+                    thickness
                 )
 
+            self.__border_layer = layer
+            self.__border_layer_key = key
+
+        return self.__border_layer
+
     @property
     def grid(self):
         return self.__grid
@@ -244,8 +393,7 @@ class QuadraticGrid(Grid):
         in the QuadraticGrid. If the click is outside the bounds of the grid,
         return None.
         """
-        block_height = self.__compute_block_dimension(screen.config, "height")
-        block_width = self.__compute_block_dimension(screen.config, "width")
+        block_width, block_height, _ = self.__get_layout(screen.config)
         row_index = int(math.floor((pos[1] - self.draw_offset[0]) / block_height))
         col_index = int(math.floor((pos[0] - self.draw_offset[1]) / block_width))
 
@@ -254,90 +402,56 @@ class QuadraticGrid(Grid):
 
         return (row_index, col_index)
     
-    def __incr(self, index, dimension_length):
-        if index == (dimension_length - 1):
-            return index
-        else:
-            return index + 1
-    
-    def __decr(self, index):
-        if index == 0:
-            return index
-        else:
-            return index - 1
-    
-    def __list_unique(self, *items):
-        """
-        More Pythonically, list(set(items)) but this preserves the order in which
-        the unique items first appeared.
-        """
-        unique = []
-        
-        for i in items:
-            if i not in unique:
-                unique.append(i)
-        
-        return unique
-    
-    def __hv_adj(self, current_block, is_height):
+    @property
+    def hv_neighbors(self):
+        return self.__hv_neighbors
+
+    @hv_neighbors.setter
+    def hv_neighbors(self, hv_neighbors):
+        self.__hv_neighbors = hv_neighbors
+        self.__adjacency = None
+
+    @property
+    def diag_neighbors(self):
+        return self.__diag_neighbors
+
+    @diag_neighbors.setter
+    def diag_neighbors(self, diag_neighbors):
+        self.__diag_neighbors = diag_neighbors
+        self.__adjacency = None
+
+    @property
+    def adjacency(self):
         """
-        Returns the adjacent list for only one dimension as determined
-        by argument is_height.
-        
-        The return value is a list of tuples.
+        The AdjacencyIndex for the current shape and neighbor settings of this
+        grid, or None if the grid has more than AdjacencyIndex.MAX_CELLS cells.
         """
-        adjacent = []
-        
-        if is_height:
-            dim_len = len(self.grid)
-            static_index = 1
-            trans_index = 0
-        else:
-            dim_len = len(self.grid[0])
-            static_index = 0
-            trans_index = 1
-        
-        move_dim = current_block[trans_index]
-        
-        increased = self.__incr(move_dim, dim_len)
-        decreased = self.__decr(move_dim)
-        
-        if increased == move_dim:
-            pass
-        else:
-            t = []
-            t.insert(trans_index, increased)
-            t.insert(static_index, current_block[static_index])
-            adjacent.append(tuple(t))
-        
-        if decreased == move_dim:
-            pass
-        else:
-            t = []
-            t.insert(trans_index, decreased)
-            t.insert(static_index, current_block[static_index])
-            adjacent.append(tuple(t))
-        
-        return adjacent
-    
-    def __diag_adj(self, current_block):
+        if self.__adjacency is None:
+            width, height = len(self.grid[0]), len(self.grid)
+            if width * height <= AdjacencyIndex.MAX_CELLS:
+                self.__adjacency = AdjacencyIndex.get(
+                    width, height, self.__hv_neighbors, self.__diag_neighbors
+                )
+
+        return self.__adjacency
+
+    def neighbors(self, row, col):
         """
-        Returns _the whole_ adjacent list of diagonals (in contrast to
-        __hv_adj) above.
+        Like `get_adjacent` but returns a tuple. No bounds checking is done
+        here.
+
+        This still builds a tuple of (row, col) tuples on every call. Hot
+        loops should go through `adjacency.flat_neighbors` instead, which
+        only slices a view of the index.
         """
-        row = current_block[0]
-        col = current_block[1]
-        
-        rows = self.__list_unique(self.__incr(row, len(self.grid)), self.__decr(row))
-        cols = self.__list_unique(self.__incr(col, len(self.grid[0])), self.__decr(col))
-        adjacent = []
-        
-        for i in range(len(rows)):
-            for j in range(len(cols)):
-                if rows[i] != row and cols[j] != col:
-                    adjacent.append((rows[i], cols[j]))
-        
-        return adjacent
+        adjacency = self.adjacency
+        if adjacency is None:
+            return tuple(adjacent_cells(
+                row, col, len(self.grid[0]), len(self.grid), self.__hv_neighbors,
+                self.__diag_neighbors
+            ))
+
+        return adjacency.neighbors(row, col)
     
     def get_adjacent(self, row, col):
         """
@@ -349,31 +463,101 @@ class QuadraticGrid(Grid):
         if type(row) != type(0) or type(col) != type(0):
             raise TypeError("Parameters should be of type int.")
         
-        if row > len(self.grid) or col > len(self.grid[0]) or row < 0 or col < 0:
+        if row >= len(self.grid) or col >= len(self.grid[0]) or row < 0 or col < 0:
             raise IndexError("Invalid index!")
         
-        current_block = (row, col)
-        hv_adj = []
-        diag_adj = []
-        
-        if self.hv_neighbors:
-            hv_rows = self.__hv_adj(current_block, True)
-            hv_cols = self.__hv_adj(current_block, False)
-            hv_adj = hv_rows
-            limit = len(hv_cols)
-            
-            for i in range(limit):
-                hv_adj.append(hv_cols[i])
-        
-        if self.diag_neighbors:
-            diag_adj = self.__diag_adj(current_block)
-        
-        limit = len(hv_adj)
-        for i in range(limit):
-            if hv_adj[i] not in diag_adj and hv_adj[i] != current_block:
-                diag_adj.append(hv_adj[i])
-        
-        return diag_adj
+        return list(self.neighbors(row, col))
+
+def adjacent_cells(row, col, grid_width, grid_height, hv_neighbors, diag_neighbors):
+    """
+    The (row, col) neighbors of a cell of a `grid_width` by `grid_height`
+    QuadraticGrid, diagonal neighbors first, then the horizontal/vertical
+    ones.
+    """
+    adjacent = []
+
+    if diag_neighbors:
+        for r in (row + 1, row - 1):
+            for c in (col + 1, col - 1):
+                if 0 <= r < grid_height and 0 <= c < grid_width:
+                    adjacent.append((r, c))
+
+    if hv_neighbors:
+        for r, c in ((row + 1, col), (row - 1, col), (row, col + 1), (row, col - 1)):
+            if 0 <= r < grid_height and 0 <= c < grid_width:
+                adjacent.append((r, c))
+
+    return adjacent
+
+class AdjacencyIndex(object):
+    """
+    The neighbors of every cell of a QuadraticGrid with a given shape and
+    neighbor settings, computed once and shared by all grids like it. Get
+    instances through `AdjacencyIndex.get`, which keeps the CACHE_SIZE most
+    recently used ones.
+
+    Neighbors are stored in a CSR-like flat form: if cells are numbered
+    `row * width + col`, the neighbors of cell `i` are
+    `indices[indptr[i]:indptr[i + 1]]`. `flat_neighbors` gives that slice
+    without copying, while `neighbors` builds (row, col) tuples out of it on
+    every call.
+
+    QuadraticGrids with more than MAX_CELLS cells compute neighbors on demand
+    instead of building an index.
+    """
+
+    MAX_CELLS = 1 << 16
+    CACHE_SIZE = 8
+
+    __cache = collections.OrderedDict()
+
+    def __init__(self, grid_width, grid_height, hv_neighbors, diag_neighbors):
+        self.grid_width = grid_width
+        self.grid_height = grid_height
+        self.hv_neighbors = hv_neighbors
+        self.diag_neighbors = diag_neighbors
+        self.indptr = array.array("l", [0])
+        self.indices = array.array("l")
+
+        for row in range(grid_height):
+            for col in range(grid_width):
+                adjacent = adjacent_cells(
+                    row, col, grid_width, grid_height, hv_neighbors, diag_neighbors
+                )
+                self.indices.extend(r * grid_width + c for r, c in adjacent)
+                self.indptr.append(len(self.indices))
+
+        self.__indices_view = memoryview(self.indices)
+
+    @classmethod
+    def get(cls, grid_width, grid_height, hv_neighbors, diag_neighbors):
+        key = (grid_width, grid_height, bool(hv_neighbors), bool(diag_neighbors))
+        index = cls.__cache.get(key)
+
+        if index is None:
+            index = AdjacencyIndex(*key)
+            cls.__cache[key] = index
+            if len(cls.__cache) > cls.CACHE_SIZE:
+                cls.__cache.popitem(last=False)
+        else:
+            cls.__cache.move_to_end(key)
+
+        return index
+
+    def neighbors(self, row, col):
+        """
+        Returns a tuple of the (row, col) neighbors of the given cell. Unlike
+        `flat_neighbors`, this builds new tuples on every call.
+        """
+        width = self.grid_width
+        return tuple(divmod(i, width) for i in self.flat_neighbors(row * width + col))
+
+    def flat_neighbors(self, index):
+        """
+        Returns a memoryview of the flat indices of the neighbors of the cell
+        with flat index `index`.
+        """
+        return self.__indices_view[self.indptr[index]:self.indptr[index + 1]]
 
 class TriangularGrid(Grid):
     """
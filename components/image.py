@@ -4,8 +4,99 @@ from .subscriber_pattern import Publisher as Observable
 
 from .shapes import Point
 
+import collections
+import os
 import pygame
 
+class SurfaceCache(object):
+    """
+    Keeps decoded image Surfaces so that loading the same file again costs no
+    disk access nor decoding. Surfaces are keyed by the absolute path of the
+    file and whether they were converted for the display.
+
+    The cache holds at most `byte_budget` bytes of pixel data; past that, the
+    least recently used Surfaces are dropped. A single Surface bigger than the
+    budget is still kept until the next one comes in.
+
+    The Surfaces are shared by everyone who loads the same file, so treat them
+    as read-only: copy one before drawing on it.
+    """
+
+    def __init__(self, byte_budget=64 * 1024 * 1024):
+        self.byte_budget = byte_budget
+        self.hits = 0
+        self.misses = 0
+        self.__surfaces = collections.OrderedDict()
+        self.__bytes = 0
+
+    def __len__(self):
+        return len(self.__surfaces)
+
+    @property
+    def bytes(self):
+        """
+        The bytes of pixel data currently held.
+        """
+        return self.__bytes
+
+    @staticmethod
+    def surface_bytes(surface):
+        return surface.get_pitch() * surface.get_height()
+
+    def load(self, filename):
+        """
+        Returns the Surface of the image file `filename`, converted with
+        alpha transparency if a display mode is set. Headless GameLoops never
+        set one, which `convert_alpha` requires.
+        """
+        key = SurfaceCache.key(filename)
+        surface = self.__surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            self.__surfaces.move_to_end(key)
+            return surface
+
+        self.misses += 1
+        return self.add(filename, pygame.image.load(filename))
+
+    @staticmethod
+    def key(filename):
+        return (os.path.abspath(filename), pygame.display.get_surface() is not None)
+
+    def add(self, filename, surface):
+        """
+        Caches `surface`, freshly decoded from the image file `filename`
+        elsewhere, as `load` would have. Must be called from the main thread
+        since it converts the Surface for the display. Returns the cached
+        Surface.
+        """
+        key = SurfaceCache.key(filename)
+        if key[1]:
+            surface = surface.convert_alpha()
+        self.put(key, surface)
+        return surface
+
+    def put(self, key, surface):
+        """
+        Caches `surface` under `key`, evicting older Surfaces as needed.
+        """
+        self.discard(key)
+        self.__surfaces[key] = surface
+        self.__bytes += SurfaceCache.surface_bytes(surface)
+
+        while self.__bytes > self.byte_budget and len(self.__surfaces) > 1:
+            oldest_key, oldest = self.__surfaces.popitem(last=False)
+            self.__bytes -= SurfaceCache.surface_bytes(oldest)
+
+    def discard(self, key):
+        surface = self.__surfaces.pop(key, None)
+        if surface is not None:
+            self.__bytes -= SurfaceCache.surface_bytes(surface)
+
+    def clear(self):
+        self.__surfaces.clear()
+        self.__bytes = 0
+
 class Image(Observable, Drawable):
     """
     This class notifies its observers when the following happens:
@@ -13,9 +104,15 @@ class Image(Observable, Drawable):
      - The object's position attribute changes.
     
     This class was made Observable for Sprites.
+
+    Images of the same file share one Surface, loaded once through
+    `Image.surface_cache`. Transforms like `flip` make a new Surface instead
+    of changing the shared one.
     
     @author Chad Estioco
     """
+
+    surface_cache = SurfaceCache()
     
     def __init__(self, filename, position=None):
         """
@@ -29,11 +126,31 @@ class Image(Observable, Drawable):
         """
         super(Image, self).__init__()
         self.__filename = filename
-        self.__img = pygame.image.load(filename).convert_alpha()
+        self.__img = Image.surface_cache.load(filename) if filename is not None else None
         self.__position = position if position else Point(0, 0)
 
+    @classmethod
+    def from_atlas(cls, atlas, name, position=None):
+        """
+        An Image of the region `name` of the TextureAtlas `atlas`. Its Surface
+        is a subsurface of the atlas, so Images and PyRoSprites made this way
+        all draw out of the one atlas Surface.
+        """
+        image = cls(None, position)
+        image.__img = atlas[name]
+        return image
+
     def clone(self, position=None):
-        return Image(self.__filename, self.position)
+        """
+        A new Image sharing the Surface of this one, as it is now (flips
+        included). Its position is `position` if given, otherwise a copy of
+        this one's position.
+        """
+        if position is None:
+            position = Point(self.position.x, self.position.y)
+        cloned = Image(self.__filename, position)
+        cloned.__img = self.__img
+        return cloned
     
     @property
     def img(self):
@@ -89,4 +206,4 @@ class Image(Observable, Drawable):
         at point (0, 0) by default.
         """
         super(Image, self).draw(screen)
-        screen.blit(self.img, self.position.get_list())
+        screen.blit(self.img, self.position)
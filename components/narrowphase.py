@@ -0,0 +1,319 @@
+from .broadphase import bounds_of, bounds_overlap
+
+import math
+
+"""
+Narrowphase collision detection: exact tests between polygons and circles,
+for the pairs that a broadphase (or a CollisionBox check) says may collide.
+
+Polygons are sequences of points, either Points or (x, y) pairs, in order
+around the polygon. The tests use the separating axis theorem, which only
+holds for convex polygons; concave ones are first split into convex pieces
+with `convex_decomposition`.
+
+The tests return a Contact when the figures overlap and None otherwise.
+Figures that only touch do not overlap.
+"""
+
+class Contact(object):
+    """
+    Describes how two figures overlap: moving the second one by `depth`
+    pixels along `normal`, an (x, y) unit vector, separates them.
+    """
+
+    def __init__(self, normal, depth):
+        self.normal = normal
+        self.depth = depth
+
+    def __str__(self):
+        return "Contact(normal=(%s, %s), depth=%s)" % (self.normal[0], self.normal[1], self.depth)
+
+def _cross(o, a, b):
+    """
+    The z component of (a - o) x (b - o): positive if o, a, b turn
+    counterclockwise in a y-up frame.
+    """
+    return (a[0] - o[0]) * (b[1] - o[1]) - (a[1] - o[1]) * (b[0] - o[0])
+
+def signed_area(points):
+    """
+    Positive for counterclockwise polygons in a y-up frame, which look
+    clockwise on screen since y grows downwards there.
+    """
+    area = 0.0
+    count = len(points)
+    for idx in range(count):
+        x0, y0 = points[idx - 1][0], points[idx - 1][1]
+        x1, y1 = points[idx][0], points[idx][1]
+        area += x0 * y1 - x1 * y0
+    return area / 2
+
+def is_convex(points):
+    """
+    Whether the simple polygon `points` is convex. Collinear points are
+    allowed.
+    """
+    count = len(points)
+    sign = 0
+    for idx in range(count):
+        turn = _cross(points[idx - 2], points[idx - 1], points[idx])
+        if turn:
+            if sign and (turn > 0) != (sign > 0):
+                return False
+            sign = turn
+    return True
+
+def _in_triangle(p, a, b, c):
+    """
+    Whether p is in the counterclockwise triangle abc, edges included.
+    """
+    return _cross(a, b, p) >= 0 and _cross(b, c, p) >= 0 and _cross(c, a, p) >= 0
+
+def triangulate(points):
+    """
+    Splits the simple polygon `points` into triangles by ear clipping.
+    Returns a list of triangles, each a list of three (x, y) tuples in
+    counterclockwise order (in a y-up frame). Zero-area leftovers, as from
+    collinear points, are dropped.
+
+    The polygon must not intersect itself. If clipping gets stuck on such a
+    polygon, a ValueError is raised.
+    """
+    points = [(p[0], p[1]) for p in points]
+    if len(points) < 3:
+        return []
+
+    indices = list(range(len(points)))
+    if signed_area(points) < 0:
+        indices.reverse()
+
+    triangles = []
+    while len(indices) > 3:
+        count = len(indices)
+        for pos in range(count):
+            prev, ear, nxt = indices[pos - 1], indices[pos], indices[(pos + 1) % count]
+            a, b, c = points[prev], points[ear], points[nxt]
+            if _cross(a, b, c) <= 0:
+                continue
+
+            blocked = False
+            for other in indices:
+                p = points[other]
+                if p != a and p != b and p != c and _in_triangle(p, a, b, c):
+                    blocked = True
+                    break
+
+            if not blocked:
+                triangles.append([a, b, c])
+                del indices[pos]
+                break
+        else:
+            # No ear: what is left is either flat or tangled.
+            remaining = [points[idx] for idx in indices]
+            if any(_cross(remaining[i - 2], remaining[i - 1], remaining[i]) for i in range(count)):
+                raise ValueError("Cannot triangulate a self-intersecting polygon.")
+            return triangles
+
+    last = [points[idx] for idx in indices]
+    if _cross(*last) > 0:
+        triangles.append(last)
+    return triangles
+
+def _merge(piece, other):
+    """
+    If the polygons `piece` and `other` share an edge, returns the polygon
+    covering both of them. Returns None otherwise.
+    """
+    count = len(piece)
+    other_count = len(other)
+    for idx in range(count):
+        u, v = piece[idx], piece[(idx + 1) % count]
+        for other_idx in range(other_count):
+            if other[other_idx] == v and other[(other_idx + 1) % other_count] == u:
+                # Go around piece from v to u, then around other from u to v.
+                merged = [piece[(idx + 1 + step) % count] for step in range(count)]
+                merged.extend(other[(other_idx + 2 + step) % other_count] for step in range(other_count - 2))
+                return merged
+    return None
+
+def convex_decomposition(points):
+    """
+    Splits the simple polygon `points` into convex polygons. Convex polygons
+    are returned as they are; others are triangulated and the triangles are
+    then greedily merged as long as the result stays convex (the
+    Hertel-Mehlhorn algorithm), giving at most four times the minimum number
+    of pieces.
+
+    Returns a list of polygons, each a list of (x, y) tuples.
+    """
+    points = [(p[0], p[1]) for p in points]
+    if is_convex(points):
+        return [points]
+
+    pieces = triangulate(points)
+    merged = True
+    while merged:
+        merged = False
+        for idx, piece in enumerate(pieces):
+            for other_idx in range(idx + 1, len(pieces)):
+                union = _merge(piece, pieces[other_idx])
+                if union is not None and is_convex(union):
+                    pieces[idx] = union
+                    del pieces[other_idx]
+                    merged = True
+                    break
+            if merged:
+                break
+
+    return pieces
+
+def _project(points, axis):
+    low = high = points[0][0] * axis[0] + points[0][1] * axis[1]
+    for p in points:
+        dot = p[0] * axis[0] + p[1] * axis[1]
+        if dot < low:
+            low = dot
+        elif dot > high:
+            high = dot
+    return low, high
+
+def _overlap(a_low, a_high, b_low, b_high):
+    overlap = min(a_high, b_high) - max(a_low, b_low)
+    # If one projection contains the other, getting out takes going past
+    # the nearer end.
+    if (a_low <= b_low and b_high <= a_high) or (b_low <= a_low and a_high <= b_high):
+        overlap += min(abs(a_low - b_low), abs(a_high - b_high))
+    return overlap
+
+def _edge_normals(points):
+    count = len(points)
+    for idx in range(count):
+        ex = points[(idx + 1) % count][0] - points[idx][0]
+        ey = points[(idx + 1) % count][1] - points[idx][1]
+        length = math.hypot(ex, ey)
+        if length:
+            yield (-ey / length, ex / length)
+
+def _centroid(points):
+    count = float(len(points))
+    return (sum(p[0] for p in points) / count, sum(p[1] for p in points) / count)
+
+def _contact(axes, project_a, project_b, center_a, center_b):
+    """
+    Tests every axis of `axes`. Returns the Contact along the axis of least
+    overlap, pointing from a to b, or None if some axis separates them.
+    """
+    best_depth = None
+    best_axis = None
+    for axis in axes:
+        depth = _overlap(*(project_a(axis) + project_b(axis)))
+        if depth <= 0:
+            return None
+        if best_depth is None or depth < best_depth:
+            best_depth = depth
+            best_axis = axis
+
+    if best_axis is None:
+        return None
+
+    direction = (center_b[0] - center_a[0]) * best_axis[0] + (center_b[1] - center_a[1]) * best_axis[1]
+    if direction < 0:
+        best_axis = (-best_axis[0], -best_axis[1])
+    return Contact(best_axis, best_depth)
+
+def polygon_collision(polygon_a, polygon_b):
+    """
+    Tests two convex polygons. Returns a Contact whose normal points from
+    `polygon_a` towards `polygon_b`, or None if they do not overlap.
+    """
+    if len(polygon_a) < 3 or len(polygon_b) < 3:
+        return None
+
+    axes = list(_edge_normals(polygon_a)) + list(_edge_normals(polygon_b))
+    return _contact(
+        axes, lambda axis: _project(polygon_a, axis), lambda axis: _project(polygon_b, axis),
+        _centroid(polygon_a), _centroid(polygon_b)
+    )
+
+def polygon_circle_collision(polygon, center, radius):
+    """
+    Tests a convex polygon against the circle of the given (x, y) `center`
+    and `radius`. Returns a Contact whose normal points from the polygon
+    towards the circle, or None if they do not overlap.
+    """
+    if len(polygon) < 3:
+        return None
+
+    axes = list(_edge_normals(polygon))
+    # The other candidate axis goes through the vertex closest to the center.
+    closest = min(polygon, key=lambda p: (p[0] - center[0]) ** 2 + (p[1] - center[1]) ** 2)
+    dx = center[0] - closest[0]
+    dy = center[1] - closest[1]
+    distance = math.hypot(dx, dy)
+    if distance:
+        axes.append((dx / distance, dy / distance))
+
+    def project_circle(axis):
+        dot = center[0] * axis[0] + center[1] * axis[1]
+        return (dot - radius, dot + radius)
+
+    return _contact(
+        axes, lambda axis: _project(polygon, axis), project_circle,
+        _centroid(polygon), center
+    )
+
+def _pieces(shape):
+    pieces = getattr(shape, "convex_pieces", None)
+    return pieces if pieces is not None else convex_decomposition(shape.point_list)
+
+def _deepest(contacts):
+    deepest = None
+    for contact in contacts:
+        if contact is not None and (deepest is None or contact.depth > deepest.depth):
+            deepest = contact
+    return deepest
+
+def shape_collision(shape_a, shape_b):
+    """
+    Tests two PointShapes, which may be concave. Their bounding boxes are
+    compared first, then the bounding boxes of their convex pieces, and only
+    pieces whose boxes overlap go through the separating axis test.
+
+    Returns the deepest Contact between the pieces, with its normal pointing
+    from `shape_a` towards `shape_b`, or None if the shapes do not overlap.
+    This can serve as the `test` of SpatialHash.colliding_pairs:
+
+        index.colliding_pairs(lambda a, b: shape_collision(a, b) is not None)
+    """
+    if not bounds_overlap(bounds_of(shape_a), bounds_of(shape_b)):
+        return None
+
+    pieces_b = [(piece, _polygon_bounds(piece)) for piece in _pieces(shape_b)]
+    contacts = []
+    for piece_a in _pieces(shape_a):
+        bounds_a = _polygon_bounds(piece_a)
+        for piece_b, bounds_b in pieces_b:
+            if bounds_overlap(bounds_a, bounds_b):
+                contacts.append(polygon_collision(piece_a, piece_b))
+    return _deepest(contacts)
+
+def shape_circle_collision(shape, center, radius):
+    """
+    Tests a PointShape, which may be concave, against a circle, with the
+    same pre-rejection as `shape_collision`. The normal of the Contact points
+    from the shape towards the circle.
+    """
+    circle = (center[0] - radius, center[1] - radius, center[0] + radius, center[1] + radius)
+    if not bounds_overlap(bounds_of(shape), circle):
+        return None
+
+    return _deepest(
+        polygon_circle_collision(piece, center, radius)
+        for piece in _pieces(shape)
+        if bounds_overlap(_polygon_bounds(piece), circle)
+    )
+
+def _polygon_bounds(points):
+    xs = [p[0] for p in points]
+    ys = [p[1] for p in points]
+    return (min(xs), min(ys), max(xs), max(ys))
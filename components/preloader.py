@@ -0,0 +1,266 @@
+from .config import JsonConfigParser
+from .core import Colors, GameLoopEvents, GameModel, GameScreen
+from .image import Image
+
+import concurrent.futures
+import io
+import pygame
+
+"""
+Loads the assets of a game in the background while a loading screen shows the
+progress, instead of blocking in `GameScreen.setup`.
+
+Usage
+  (1) List the images and fonts of your game in an AssetManifest.
+  (2) Create a Preloader for it and a LoadingScreen showing the Preloader.
+  (3) Wrap the GameLoopEvents of your game in a PreloadingEvents with the
+      LoadingScreen and give that to the GameLoop.
+
+Once everything is loaded, `Image(path)` for any image of the manifest is
+served from `Image.surface_cache` without touching the disk.
+"""
+
+class AssetManifest(object):
+    """
+    The images and fonts to load, by name.
+    """
+
+    def __init__(self):
+        # name -> path
+        self.images = {}
+        # name -> (path, size); a path of None means pygame's default font.
+        self.fonts = {}
+
+    def __len__(self):
+        return len(self.images) + len(self.fonts)
+
+    def add_image(self, name, path):
+        self.images[name] = path
+
+    def add_font(self, name, path, size):
+        self.fonts[name] = (path, size)
+
+    def load_from_file(self, f):
+        """
+        Adds the assets listed in the JSON file `f`, which looks like
+
+            {
+                "images": {"hero": "sprites/hero.png"},
+                "fonts": {"score": [null, 25]}
+            }
+        """
+        parser = JsonConfigParser()
+        parser.parse_config(f)
+        for name, path in parser.config_vals.get("images", {}).items():
+            self.add_image(name, path)
+        for name, (path, size) in parser.config_vals.get("fonts", {}).items():
+            self.add_font(name, path, size)
+
+class Preloader(object):
+    """
+    Decodes the assets of an AssetManifest on a thread pool. pygame releases
+    the GIL while decoding, so the game loop keeps running meanwhile.
+
+    Converting Surfaces for the display has to happen on the main thread, so
+    decoded images are only finalized, and put in the `surface_cache`, when
+    the main thread calls `poll`. Likewise, only the font files are read on
+    the pool; the Fonts themselves are built by `poll`.
+    """
+
+    def __init__(self, manifest, max_workers=None, surface_cache=None):
+        """
+        @param surface_cache
+          Where the images go. Defaults to `Image.surface_cache`.
+        """
+        self.manifest = manifest
+        self.max_workers = max_workers
+        self.surface_cache = surface_cache if surface_cache is not None else Image.surface_cache
+        # name -> Surface
+        self.surfaces = {}
+        # name -> pygame.font.Font
+        self.fonts = {}
+        # name -> the exception raised while loading it
+        self.errors = {}
+        self.__pool = None
+        self.__pending = []
+        self.__finished = 0
+
+    @property
+    def total(self):
+        return len(self.manifest)
+
+    @property
+    def finished(self):
+        return self.__finished
+
+    @property
+    def progress(self):
+        """
+        The fraction of the assets loaded so far, from 0 to 1.
+        """
+        return float(self.__finished) / self.total if self.total else 1.0
+
+    @property
+    def done(self):
+        return self.__finished == self.total
+
+    def start(self):
+        """
+        Starts decoding. Does nothing if already started.
+        """
+        if self.__pool is not None:
+            return
+
+        self.__pool = concurrent.futures.ThreadPoolExecutor(self.max_workers)
+        for name, path in self.manifest.images.items():
+            future = self.__pool.submit(pygame.image.load, path)
+            self.__pending.append((future, self.__finish_image, name))
+        if self.manifest.fonts:
+            pygame.font.init()
+        for name, (path, size) in self.manifest.fonts.items():
+            future = self.__pool.submit(Preloader.__read_font, path)
+            self.__pending.append((future, self.__finish_font, name))
+        self.__pool.shutdown(wait=False)
+
+    def __finish_image(self, name, surface):
+        path = self.manifest.images[name]
+        self.surfaces[name] = self.surface_cache.add(path, surface)
+
+    @staticmethod
+    def __read_font(path):
+        """
+        The contents of the font file `path`, or None for pygame's default font.
+        """
+        if path is None:
+            return None
+        with open(path, "rb") as f:
+            return f.read()
+
+    def __finish_font(self, name, data):
+        path, size = self.manifest.fonts[name]
+        source = io.BytesIO(data) if data is not None else None
+        self.fonts[name] = pygame.font.Font(source, size)
+
+    def poll(self):
+        """
+        Finalizes the assets decoded since the last call. Call this from the
+        main thread, for instance once per frame. Returns the progress.
+        """
+        self.start()
+        pending = []
+        for future, finish, name in self.__pending:
+            if future.done():
+                self.__finish(future, finish, name)
+            else:
+                pending.append((future, finish, name))
+        self.__pending = pending
+        return self.progress
+
+    def wait(self):
+        """
+        Blocks until every asset is loaded and finalized.
+        """
+        self.start()
+        for future, finish, name in self.__pending:
+            concurrent.futures.wait([future])
+            self.__finish(future, finish, name)
+        self.__pending = []
+
+    def __finish(self, future, finish, name):
+        error = future.exception()
+        if error is None:
+            try:
+                finish(name, future.result())
+            except Exception as finish_error:
+                error = finish_error
+        if error is not None:
+            self.errors[name] = error
+        self.__finished += 1
+
+class LoadingScreen(GameScreen):
+    """
+    Shows a progress bar for a Preloader, which it polls every frame.
+    """
+
+    BAR_HEIGHT = 20
+    BAR_MARGIN = 40
+
+    def __init__(self, game_config, preloader, model=None):
+        super(LoadingScreen, self).__init__(game_config, model if model is not None else GameModel())
+        self.preloader = preloader
+
+    def setup(self):
+        self.preloader.start()
+
+    def draw_screen(self, window):
+        progress = self.preloader.poll()
+        width = self.screen_dimensions[0] - 2 * LoadingScreen.BAR_MARGIN
+        top = (self.screen_dimensions[1] - LoadingScreen.BAR_HEIGHT) // 2
+        outline = (LoadingScreen.BAR_MARGIN, top, width, LoadingScreen.BAR_HEIGHT)
+
+        window.fill(Colors.MAX_WHITE)
+        pygame.draw.rect(window, Colors.NIGHT_BLUE, (outline[0], outline[1], int(width * progress), outline[3]))
+        pygame.draw.rect(window, Colors.MAX_BLACK, outline, 1)
+        if pygame.font.get_init():
+            label = pygame.font.Font(None, 24).render(
+                "Loading... %d%%" % int(progress * 100), True, Colors.MAX_BLACK
+            )
+            window.blit(label, (LoadingScreen.BAR_MARGIN, top - 30))
+        self.mark_dirty()
+
+class PreloadingEvents(GameLoopEvents):
+    """
+    Runs a LoadingScreen until its Preloader is done, then hands the loop
+    over to `next_events`, the GameLoopEvents of the game, which is only set
+    up at that point. From then on, the GameLoop sees the screen, handlers
+    and profiler of `next_events`.
+    """
+
+    def __init__(self, loading_screen, next_events):
+        # GameLoopEvents.__init__ already goes through the properties below.
+        self.__handed_over = False
+        super(PreloadingEvents, self).__init__(loading_screen)
+        self.next_events = next_events
+
+    @property
+    def handed_over(self):
+        return self.__handed_over
+
+    @property
+    def game_screen(self):
+        if self.__handed_over:
+            return self.next_events.game_screen
+        return super(PreloadingEvents, self).game_screen
+
+    @property
+    def event_handlers(self):
+        if self.__handed_over:
+            return self.next_events.event_handlers
+        return super(PreloadingEvents, self).event_handlers
+
+    @property
+    def profiler(self):
+        if self.__handed_over:
+            return self.next_events.profiler
+        return self.__profiler
+
+    @profiler.setter
+    def profiler(self, profiler):
+        self.__profiler = profiler
+
+    def loop_invariant(self):
+        if self.__handed_over:
+            return self.next_events.loop_invariant()
+        return super(PreloadingEvents, self).loop_invariant()
+
+    def loop_event(self):
+        if self.__handed_over:
+            self.next_events.sim_time = self.sim_time
+            self.next_events.sim_timestep = self.sim_timestep
+            self.next_events.loop_event()
+            return
+
+        super(PreloadingEvents, self).loop_event()
+        if self.game_screen.preloader.done:
+            self.next_events.loop_setup()
+            self.__handed_over = True
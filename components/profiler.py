@@ -0,0 +1,183 @@
+import collections
+import csv
+import json
+import math
+import time
+
+"""
+Per-phase frame timing for the game loop. GameLoop and GameLoopEvents feed a
+FrameProfiler as they go through each frame; when `debug_mode` is on, the
+summary is drawn by the DebugQueue.
+
+@author Chad Estioco
+"""
+
+class FrameProfiler(object):
+    """
+    Records how long each phase of a frame takes, in milliseconds. Only the
+    latest `window` frames are kept.
+
+    A frame is counted as dropped when the time spent working on it (which
+    excludes the time spent waiting on the clock) exceeds `frame_budget`.
+    """
+
+    PHASES = (
+        "event_pump", "event_dispatch", "loop_event", "draw_unchanging",
+        "draw_screen", "display_logs", "present"
+    )
+    PERCENTILES = (50, 95, 99)
+
+    def __init__(self, window=300, frame_budget=None, enabled=True):
+        """
+        @param window
+          The number of frames kept for the statistics.
+        @param frame_budget
+          The time, in milliseconds, a frame may take before it is considered
+          dropped. None means no frame is ever dropped.
+        @param enabled
+          A disabled profiler ignores everything it is fed.
+        """
+        self.window = window
+        self.frame_budget = frame_budget
+        self.enabled = enabled
+        self.frames = collections.deque(maxlen=window)
+        self.frame_count = 0
+        self.dropped_frames = 0
+        self.__current = None
+        self.__frame_start = None
+        self.__phase_starts = {}
+
+    def begin_frame(self):
+        if self.enabled:
+            self.__current = {}
+            self.__frame_start = time.perf_counter()
+
+    def end_frame(self):
+        if not self.enabled or self.__current is None:
+            return
+
+        total = (time.perf_counter() - self.__frame_start) * 1000
+        self.__current["total"] = total
+        self.frames.append(self.__current)
+        self.frame_count += 1
+        if self.frame_budget and total > self.frame_budget:
+            self.dropped_frames += 1
+
+        self.__current = None
+
+    def begin(self, phase):
+        if self.enabled:
+            self.__phase_starts[phase] = time.perf_counter()
+
+    def end(self, phase):
+        if self.enabled and phase in self.__phase_starts:
+            elapsed = time.perf_counter() - self.__phase_starts.pop(phase)
+            self.record(phase, elapsed * 1000)
+
+    def record(self, phase, millis):
+        """
+        Add `millis` to the time spent on `phase` in the current frame. Phases
+        recorded outside of a frame are ignored.
+        """
+        if self.enabled and self.__current is not None:
+            self.__current[phase] = self.__current.get(phase, 0) + millis
+
+    def samples(self, phase):
+        return [frame[phase] for frame in self.frames if phase in frame]
+
+    @staticmethod
+    def percentile(sorted_samples, pct):
+        """
+        Nearest-rank percentile of an already sorted list.
+        """
+        if not sorted_samples:
+            return 0
+        rank = int(math.ceil(pct / 100.0 * len(sorted_samples)))
+        return sorted_samples[max(rank, 1) - 1]
+
+    def summary(self, phase):
+        """
+        Returns a dictionary with the count, mean, max and the percentiles in
+        FrameProfiler.PERCENTILES (as "p50" and so on) of the given phase.
+        """
+        samples = sorted(self.samples(phase))
+        stats = {
+            "count": len(samples),
+            "mean": sum(samples) / len(samples) if samples else 0,
+            "max": samples[-1] if samples else 0
+        }
+
+        for pct in FrameProfiler.PERCENTILES:
+            stats["p%d" % pct] = FrameProfiler.percentile(samples, pct)
+
+        return stats
+
+    def histogram(self, phase, bucket_size=1.0):
+        """
+        Returns a dictionary mapping the lower bound of each `bucket_size`-wide
+        bucket, in milliseconds, to the number of samples that fell in it.
+        """
+        buckets = collections.Counter(
+            math.floor(sample / bucket_size) * bucket_size for sample in self.samples(phase)
+        )
+        return dict(buckets)
+
+    def recorded_phases(self):
+        """
+        The phases with samples in the current window, in FrameProfiler.PHASES
+        order followed by any custom phases.
+        """
+        seen = set()
+        for frame in self.frames:
+            seen.update(frame)
+        seen.discard("total")
+        known = [phase for phase in FrameProfiler.PHASES if phase in seen]
+        return known + sorted(seen - set(known)) + ["total"]
+
+    def report_lines(self):
+        """
+        One human-readable line per phase, plus a line for the whole frame.
+        """
+        lines = []
+        for phase in self.recorded_phases():
+            stats = self.summary(phase)
+            lines.append("%-15s p50 %6.2f p95 %6.2f p99 %6.2f" % (
+                phase, stats["p50"], stats["p95"], stats["p99"]
+            ))
+        lines.append("frames %d dropped %d" % (self.frame_count, self.dropped_frames))
+        return lines
+
+    def export_json(self, f):
+        report = {
+            "frame_count": self.frame_count,
+            "dropped_frames": self.dropped_frames,
+            "frame_budget": self.frame_budget,
+            "phases": {},
+            "frames": list(self.frames)
+        }
+        for phase in self.recorded_phases():
+            report["phases"][phase] = self.summary(phase)
+        json.dump(report, f, indent=2)
+
+    def export_csv(self, f):
+        """
+        Writes one row per frame in the window. Phases that did not happen in a
+        frame are left blank.
+        """
+        phases = self.recorded_phases()
+        writer = csv.writer(f)
+        writer.writerow(["frame"] + phases)
+        first_frame = self.frame_count - len(self.frames)
+        for idx, frame in enumerate(self.frames):
+            writer.writerow([first_frame + idx] + [frame.get(phase, "") for phase in phases])
+
+    def export(self, path):
+        """
+        Write the recorded frames to `path`. The format is decided by the
+        extension: ".csv" for CSV, anything else for JSON.
+        """
+        with open(path, "w", newline="") as f:
+            if path.lower().endswith(".csv"):
+                self.export_csv(f)
+            else:
+                self.export_json(f)
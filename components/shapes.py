@@ -3,6 +3,7 @@
 from .core import Colors
 from .drawable import Drawable
 from .collidable import Collidable
+from . import narrowphase
 
 import math
 import pygame
@@ -30,18 +31,43 @@ class PointShape(Drawable):
     Call `add_point` in the order with which you would like them connected. The
     last point will be automatically connected to the first point. Alternatively,
     you can call `add_point` with the `index` argument.
+
+    The figure is drawn as an outline, a filled polygon or an antialiased
+    outline depending on `draw_mode`. Shapes that are drawn many times without
+    changing can be told to `cache` their drawing in a Surface which is then
+    just blitted. The cache is dropped whenever the points are changed through
+    this class; if you modify the Points themselves, call `invalidate_cache`.
     
     @author Chad Estioco
     """
+
+    OUTLINE = "outline"
+    FILLED = "filled"
+    ANTIALIASED = "antialiased"
     
-    def __init__(self, point_list=None, line_color=Colors.MAX_BLACK, draw_offset=None):
+    def __init__(
+        self, point_list=None, line_color=Colors.MAX_BLACK, draw_offset=None,
+        draw_mode=OUTLINE, line_width=1, cache=False
+    ):
         """
         Create a PointShape with the given point_list.
+
+        @param draw_mode
+          One of PointShape.OUTLINE, PointShape.FILLED or
+          PointShape.ANTIALIASED.
+        @param line_width
+          The width of the outline. Antialiased outlines are always one pixel
+          wide.
+        @param cache
+          Whether to keep the drawn shape in a Surface between draws.
         """
         super(PointShape, self).__init__(draw_offset if draw_offset is not None else (0, 0))
         
         # This box does not exist anywhere in the visible screen
         self.__collision_box = CollisionBox(Point(-1,-1), Point(-1,-1))
+        # (Surface, blit position, (line_color, draw_mode, line_width))
+        self.__raster = None
+        self.__convex_pieces = None
         
         if point_list is None or point_list == []:
             self.__point_list = []
@@ -50,6 +76,9 @@ class PointShape(Drawable):
             self.__set_box()
             
         self.line_color = line_color
+        self.draw_mode = draw_mode
+        self.line_width = line_width
+        self.cache = cache
     
     def add_point(self, p, index = None):
         """
@@ -74,7 +103,12 @@ class PointShape(Drawable):
         
         Call this after everytime __point_list is set (through constructor,
         point_list setter, etc.) or modified (through add_point, etc.)
+
+        Since the points changed, this also drops the cached drawing and
+        convex pieces.
         """
+        self.__raster = None
+        self.__convex_pieces = None
         x_list = [point.x for point in self.point_list]
         y_list = [point.y for point in self.point_list]
         
@@ -91,15 +125,45 @@ class PointShape(Drawable):
     @property
     def collision_box(self):
         return self.__collision_box
+
+    @property
+    def convex_pieces(self):
+        """
+        This shape split into convex polygons, for the tests of the
+        narrowphase module. Computed when first needed.
+        """
+        if self.__convex_pieces is None:
+            self.__convex_pieces = narrowphase.convex_decomposition(self.point_list)
+        return self.__convex_pieces
+
+    def collides_with(self, another_shape):
+        """
+        Exact collision test against another PointShape. Returns a
+        narrowphase.Contact whose normal points towards `another_shape`, or
+        None if they do not overlap.
+        """
+        return narrowphase.shape_collision(self, another_shape)
     
     def translate(self, dx, dy):
         """
         Translates this PointShape by dx pixels on the x axis and by
         dy pixels on the y axis irres
         """
-        incr_xs = [Point(p.x + dx, p.y) for p in self.point_list]
-        incr_ys = [Point(p.x, p.y + dy) for p in incr_xs]
-        self.point_list = incr_ys
+        raster = self.__raster
+        pieces = self.__convex_pieces
+        self.point_list = [Point(p.x + dx, p.y + dy) for p in self.point_list]
+
+        # Moving by whole pixels does not change how the shape looks, so the
+        # cached drawing can just be blitted elsewhere.
+        if raster is not None and dx == int(dx) and dy == int(dy):
+            surface, position, key = raster
+            self.__raster = (surface, (position[0] + int(dx), position[1] + int(dy)), key)
+
+        # Neither does moving change how the shape splits into convex pieces.
+        if pieces is not None:
+            self.__convex_pieces = [
+                [(x + dx, y + dy) for x, y in piece] for piece in pieces
+            ]
     
     @property
     def point_list(self):
@@ -134,22 +198,56 @@ class PointShape(Drawable):
         @param screen
             The window to which we draw this PointShape.
         """
-        #point_list = self.translate_point_list()
-        limit = len(self.point_list) - 1
-        i = 0
-        
-        while i < limit:
-            point0 = self.point_list[i]
-            point1 = self.point_list[i + 1]
-            
-            pygame.draw.line(screen, self.line_color, point0.get_list(), point1.get_list())
-            
-            i += 1
-        
-        if limit > 0:
-            # Since we end at limit - 1, limit should now hold the index
-            # to the last point in the point list
-            pygame.draw.line(screen, self.line_color, self.point_list[limit].get_list(), self.point_list[0].get_list())
+        if len(self.point_list) < 2:
+            return
+
+        if not self.cache:
+            self.__draw_points(screen, self.point_list)
+            return
+
+        key = (tuple(self.line_color), self.draw_mode, self.line_width)
+        if self.__raster is None or self.__raster[2] != key:
+            self.__raster = self.__rasterize(key)
+
+        surface, position, key = self.__raster
+        screen.blit(surface, position)
+
+    def invalidate_cache(self):
+        """
+        Drop the cached drawing and convex pieces of this shape. Only needed
+        after modifying the Points of this shape in place.
+        """
+        self.__raster = None
+        self.__convex_pieces = None
+
+    def __draw_points(self, screen, points):
+        """
+        Draws the whole figure in one call.
+        """
+        if self.draw_mode == PointShape.FILLED and len(points) > 2:
+            pygame.draw.polygon(screen, self.line_color, points)
+        elif self.draw_mode == PointShape.ANTIALIASED:
+            pygame.draw.aalines(screen, self.line_color, True, points)
+        else:
+            pygame.draw.lines(screen, self.line_color, True, points, self.line_width)
+
+    def __rasterize(self, key):
+        """
+        Draws this shape on a transparent Surface just big enough for it.
+        Returns the Surface, where to blit it and `key`.
+        """
+        box = self.collision_box
+        pad = self.line_width + 1
+        # Shift by whole pixels so that the points land on the same pixels
+        # as when drawn straight on the screen.
+        left = int(math.floor(box.upper_left.x)) - pad
+        top = int(math.floor(box.upper_left.y)) - pad
+        width = int(math.ceil(box.lower_right.x)) + pad - left + 1
+        height = int(math.ceil(box.lower_right.y)) + pad - top + 1
+
+        surface = pygame.Surface((width, height), pygame.SRCALPHA)
+        self.__draw_points(surface, [Point(p.x - left, p.y - top) for p in self.point_list])
+        return (surface, (left, top), key)
     
     def __x_set(self, point, scale_trans):
         point.x = scale_trans
@@ -254,12 +352,18 @@ class CollisionBox(Collidable):
         return self.upper_left.__eq__(another_box.upper_left) and \
             self.lower_right.__eq__(another_box.lower_right)
     
-class Point:
+class Point(object):
     """
     Represents a point in 2D-space.
+
+    Points have no per-instance `__dict__`, which matters when there are many
+    of them. They also behave like an (x, y) sequence, so they can be passed
+    to pygame as they are, without building a list first.
     
     @author Chad Estioco
     """
+
+    __slots__ = ("x", "y")
     
     def __init__(self, x, y):
         self.x = x
@@ -267,6 +371,23 @@ class Point:
     
     def get_list(self):
         return [self.x, self.y]
+
+    def __len__(self):
+        return 2
+
+    def __iter__(self):
+        yield self.x
+        yield self.y
+
+    def __getitem__(self, index):
+        if index == 0 or index == -2:
+            return self.x
+        elif index == 1 or index == -1:
+            return self.y
+        elif isinstance(index, slice):
+            return (self.x, self.y)[index]
+
+        raise IndexError("Point index out of range")
     
     def distance(self, another_point, take_root=True):
         """
@@ -288,3 +409,27 @@ class Point:
     
     def __str__(self):
         return "(" + str(self.x) + ", " + str(self.y) + ")"
+
+class FrozenPoint(Point):
+    """
+    A Point that cannot be changed once made. Unlike Points, FrozenPoints are
+    hashable, so they can be used as dict keys or put in sets.
+
+    Methods that modify Points in place, like PointShape.set_scale, do not
+    work on FrozenPoints.
+    """
+
+    __slots__ = ()
+
+    def __init__(self, x, y):
+        object.__setattr__(self, "x", x)
+        object.__setattr__(self, "y", y)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("FrozenPoints cannot be changed.")
+
+    def __delattr__(self, name):
+        raise AttributeError("FrozenPoints cannot be changed.")
+
+    def __hash__(self):
+        return hash((self.x, self.y))
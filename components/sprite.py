@@ -29,6 +29,14 @@ class PyRoSprite(pygame.sprite.Sprite, Observer):
         self.rect.y = img.position.y
         self.rect.x = img.position.x
     
+    # pygame.sprite.Sprite.__init__ does not chain up to Subscriber, so there
+    # is no id to compare. Sprite Groups need hashable sprites anyway.
+    def __eq__(self, other):
+        return self is other
+
+    def __hash__(self):
+        return id(self)
+
     def notify(self, observed, arg_bundle = None):
         self.image = self.screen_draw.img
         self.rect.x = self.screen_draw.position.x
@@ -23,15 +23,14 @@ class Publisher(object):
         self.__observers.append(observer)
     
     def unsubscribe(self, observer):
-        i = 0
-        
-        for o in self.__observers:
+        for i, o in enumerate(self.__observers):
             if o.__eq__(observer):
                 self.__observers.pop(i)
                 return
     
     def notify_subscribers(self, **arg_bundle):
-        for o in self.__observers:
+        # Observers may unsubscribe while being notified.
+        for o in list(self.__observers):
             o.notify(self, arg_bundle)
 
 class Subscriber(object):
@@ -40,7 +39,12 @@ class Subscriber(object):
         self.id = uuid.uuid1()
 
     def __eq__(self, subscriber_):
-        return self.id == subscriber_.id
+        # Subclasses like GameScreen do not call Subscriber.__init__, so they
+        # have no id. Those are only equal to themselves.
+        try:
+            return self.id == subscriber_.id
+        except AttributeError:
+            return self is subscriber_
     
     def notify(self, observed, **arg_bundle):
         """
@@ -49,6 +49,9 @@ class ColorBlocksScreen(GameScreen):
         )
         self.rect_list = []
         self.color_list = []
+        # The (row, col) of the cells to redraw on the next frame, or None to
+        # redraw the whole screen.
+        self.changed_cells = None
     
     def setup(self):
         self.represent_tiles()
@@ -65,8 +68,37 @@ class ColorBlocksScreen(GameScreen):
           offset=ColorBlocksScreen.GRID_OFFSET
         )
     
+    @property
+    def score_area(self):
+        """
+        The rect above the grid where the score is shown.
+        """
+        return (0, 0, self.screen_dimensions[0], ColorBlocksScreen.GRID_OFFSET[0])
+
+    def redraw_cells(self, cells):
+        """
+        Redraw only `cells`, and the score, on the next frame.
+        """
+        self.changed_cells = list(cells)
+        self.mark_dirty(self.score_area)
+
+    def redraw_all(self):
+        self.changed_cells = None
+        self.mark_dirty()
+
     def draw_screen(self, window):
-        self.grid_model.draw(window, self)
+        # With dirty rendering, the board stays on the window between frames
+        # and only changes on clicks, so only repaint on frames marked dirty.
+        if self.config.get_config_val("dirty_rendering") and not self.is_dirty:
+            return
+
+        if self.changed_cells is None:
+            window.fill(Colors.MAX_WHITE)
+        else:
+            window.fill(Colors.MAX_WHITE, self.score_area)
+        self.grid_model.draw(window, self, cells=self.changed_cells)
+        self.changed_cells = None
+
         score_font = pygame.font.Font(None, 25)
         score = score_font.render("Score: " + str(self.game_model.score), True, Colors.HUMAN_RED)
         window.blit(score, [10, 10])
@@ -83,30 +115,34 @@ class ColorBlocksEvents(GameLoopEvents):
         row_index, col_index = self.game_screen.grid_model.get_clicked_cell(
             self.game_screen, pos
         )
-        self.game_screen.game_model.score += self.game_screen.game_model.toggle(row_index, col_index)
-        self.game_screen.game_model.falldown()
-        self.game_screen.game_model.collapse()
+        game_model = self.game_screen.game_model
+        before = [list(row) for row in game_model.grid]
+        game_model.score += game_model.toggle(row_index, col_index)
+        game_model.falldown()
+        game_model.collapse()
         self.game_screen.represent_tiles()
+        self.game_screen.redraw_cells(
+            (i, j) for i, row in enumerate(before) for j, block in enumerate(row)
+            if game_model.grid[i][j] != block
+        )
     
     def __trigger_new_game(self):
         self.game_screen.game_model.new_game()
         self.game_screen.represent_tiles()
+        self.game_screen.redraw_all()
     
     def attach_event_handlers(self):
         button_down_event = pygame.event.Event(pygame.MOUSEBUTTONDOWN)
         self.add_event_handler(button_down_event, self.__mouse_click)
         
         self.add_event_handler(pygame.event.Event(pygame.KEYDOWN), self.key_control.handle)
-    
-    def loop_event(self):
-        self.window.fill(Colors.MAX_WHITE)
-        super(ColorBlocksEvents, self).loop_event()
 
 def main():
     config = GameConfig()
     config.set_config_val("clock_rate", 12)
     config.set_config_val("window_size", [500, 500 + ColorBlocksScreen.GRID_OFFSET[0]])
     config.set_config_val("window_title", "Color Blocks Game")
+    config.set_config_val("dirty_rendering", True)
     
     screen = ColorBlocksScreen(config, [10, 10])
     loop_events = ColorBlocksEvents(screen)
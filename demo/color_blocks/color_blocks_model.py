@@ -1,8 +1,12 @@
 #! usr/bin/env python
 
 from components.core import Colors, GameModel
+from components.helpers.array_grid import ArrayGrid
 from components.helpers.grid import QuadraticGrid, DimensionException
 
+from . import gravity
+from .regions import ColorRegions
+
 import random
 
 class ColorBlocksModel(GameModel):
@@ -17,7 +21,7 @@ class ColorBlocksModel(GameModel):
     BLOCKS = "01234"
     UNTAKEN = "."
     
-    def __init__(self, grid_width, grid_height, min_score = 1):
+    def __init__(self, grid_width, grid_height, min_score = 1, array_backed=False):
         """
         Initializes a Color Blocks game with the given parameters. Randomly
         assigns colors to the grid.
@@ -26,6 +30,10 @@ class ColorBlocksModel(GameModel):
         @param grid_height
         @param min_score
           The minimum number of blocks required to make a score.
+        @param array_backed
+          If set, the grid is a NumPy array (see ArrayGrid) and blocks fall and
+          collapse through vectorized operations. Worth it for large boards.
+          Requires NumPy.
         """
         super(ColorBlocksModel, self).__init__()
         
@@ -33,6 +41,7 @@ class ColorBlocksModel(GameModel):
         if grid_width < 3 or grid_height < 3:
             raise DimensionException("Minimum grid dimensions is 3x3.")
 
+        self.__array_backed = array_backed
         self.__self_setup(grid_width, grid_height, min_score)
     
     @property
@@ -43,6 +52,29 @@ class ColorBlocksModel(GameModel):
     def quadratic_grid(self):
         return self.__quadratic_grid
     
+    @property
+    def regions(self):
+        """
+        A ColorRegions labelling of the current grid. It is kept until the
+        next move; if you edit `grid` directly, call `invalidate_regions`.
+        """
+        if self.__regions is None:
+            self.__regions = ColorRegions(
+                self.grid, self.quadratic_grid.hv_neighbors,
+                self.quadratic_grid.diag_neighbors, ColorBlocksModel.UNTAKEN
+            )
+        return self.__regions
+
+    def invalidate_regions(self):
+        self.__regions = None
+
+    def cluster_size(self, row, col):
+        """
+        The number of blocks that toggling (row, col) would remove, ignoring
+        `min_score`.
+        """
+        return self.regions.cluster_size(row, col)
+    
     @property
     def min_score(self):
         return self.__min_score
@@ -70,10 +102,17 @@ class ColorBlocksModel(GameModel):
                 self.grid[i][j] = block
     
     def __self_setup(self, width, height, min_score):
-        self.__quadratic_grid = QuadraticGrid(width, height, True, False)
+        if self.__array_backed:
+            self.__quadratic_grid = ArrayGrid(
+                width, height, True, False, dtype="U1",
+                fill_value=ColorBlocksModel.UNTAKEN
+            )
+        else:
+            self.__quadratic_grid = QuadraticGrid(width, height, True, False)
         self.__populate()
         self.min_score = min_score
         self.score = 0
+        self.__regions = None
     
     def new_game(self):
         """
@@ -113,167 +152,61 @@ class ColorBlocksModel(GameModel):
         if original == ColorBlocksModel.UNTAKEN:
             return False
         
-        adjacent_stack = [(row, col)]
+        # Flood fill over flat cell indices, `row * width + col`. Every block
+        # enters `seen` once, so this is linear in the size of the group.
+        grid = self.grid
+        width = len(grid[0])
+        adjacency = self.quadratic_grid.adjacency
+        start = row * width + col
+        adjacent_stack = [start]
+        seen = set(adjacent_stack)
         adj_same_color = []
-        inspected = []
         
-        while len(adjacent_stack):
+        while adjacent_stack:
             cur_block = adjacent_stack.pop()
-            inspected.append(cur_block)
             adj_same_color.append(cur_block)
-            adjacent_blocks = self.quadratic_grid.get_adjacent(cur_block[0], cur_block[1])
-            adj_count = len(adjacent_blocks)
-            
-            for i in range(adj_count):
-                block = adjacent_blocks[i]
-                if self.grid[block[0]][block[1]] == original and \
-                  block not in adjacent_stack and block not in inspected:
-                    adjacent_stack.append(adjacent_blocks[i])
+
+            if adjacency is not None:
+                neighbors = adjacency.flat_neighbors(cur_block)
+            else:
+                neighbors = [
+                    r * width + c for r, c in
+                    self.quadratic_grid.neighbors(cur_block // width, cur_block % width)
+                ]
+
+            for block in neighbors:
+                if block not in seen and grid[block // width][block % width] == original:
+                    seen.add(block)
+                    adjacent_stack.append(block)
         
         if len(adj_same_color) >= self.min_score:
             for cur_block in adj_same_color:
-                self.grid[cur_block[0]][cur_block[1]] = ColorBlocksModel.UNTAKEN
+                grid[cur_block // width][cur_block % width] = ColorBlocksModel.UNTAKEN
                 points += 1
+            self.invalidate_regions()
         
         return points
     
-    def __find_empty_column(self, startat = 0):
-        """
-        Looks for empty columns in the grid. Returns the index of an
-        empty column. If there are multiple empty columns, only the
-        first one is returned. If there are no empty columns in the
-        grid, the value -1 is returned.
-        """
-        col_limit = len(self.grid[0])
-        col = startat
-        
-        while col < col_limit:
-            if self.__is_empty_col(col):
-                return col
-            
-            col += 1
-        
-        return -1
-    
-    def __is_empty_col(self, col_index):
-        """
-        Checks whether the column described by col_index is empty.
-        """
-        for row in self.grid:
-            if row[col_index] != ColorBlocksModel.UNTAKEN:
-                return False
-        
-        return True
-    
-    def __find_empty_column_block(self, start_index):
-        """
-        Returns a tuple indicating the start and end of an empty column
-        block. start_index is the index in which we start searching.
-        
-        Assume start_index is an empty column already (for sure!)
-        
-        Yes, if there is only one empty column, the return tuple will
-        be (start_index, start_index)
-        """
-        empty_range = [start_index, None]
-        limit = len(self.grid[0])
-        col_index = start_index + 1
-        
-        while col_index < limit:
-            if not self.__is_empty_col(col_index):
-                break
-            
-            col_index += 1
-        
-        empty_range[1] = col_index - 1
-        
-        return tuple(empty_range)
-    
-    def __translate_empty_block(self, col_index, block_length):
-        """
-        Performs the actual collapsing of an empty column block.
-        
-        @param col_index
-          The upper bound of the range of empty columns which we are
-          collapsing.
-        @param block_length
-          The length of the empty column block.
-        """
-        limit = len(self.grid[0])
-        
-        for row in self.grid:
-            non_empty = col_index + 1
-            
-            while non_empty < limit:
-                row[non_empty - block_length] = row[non_empty]
-                non_empty += 1
-    
-    def __untake_last_block(self, block_length):
-        limit = len(self.grid[0])
-        last_block_start = limit - block_length
-        
-        for row in self.grid:
-            cell_index = last_block_start
-            
-            while cell_index < limit:
-                row[cell_index] = ColorBlocksModel.UNTAKEN
-                cell_index += 1
-    
     def collapse(self):
         """
         Removes empty columns by "collapsing" the space leftwards.
         """
-        col_start = 0
-        col_limit = len(self.grid[0])
-        
-        while col_start < col_limit:
-            empty_col = self.__find_empty_column(col_start)
-            
-            if empty_col != -1:
-                empty_block = self.__find_empty_column_block(empty_col)
-                block_length = empty_block[1] - empty_block[0] + 1
-                self.__translate_empty_block(empty_block[1], block_length)
-                self.__untake_last_block(block_length)
-                
-                col_start = empty_block[1] + 1
-            else:
-                break
-        
+        self.invalidate_regions()
+        if self.__array_backed:
+            gravity.collapse_array(self.grid, ColorBlocksModel.UNTAKEN)
+        else:
+            gravity.collapse_lists(self.grid, ColorBlocksModel.UNTAKEN)
     
     def falldown(self):
         """
         Scans each column of the grid and looks for unsupported (i.e.,
         UNTAKEN cells below) blocks and makes them "fall down".
-        
-        TODO: Rewrite? Logic seems too complicated and can be broken down
-        further.
         """
-        col_limit = len(self.grid[0])
-        row_limit = len(self.grid)
-        
-        for col in range(col_limit):
-            row = row_limit - 1
-            
-            while not self.__is_empty_col(col) and row >= 0:
-                if self.grid[row][col] == ColorBlocksModel.UNTAKEN:
-                    row_runner = row - 1
-                    
-                    while row_runner >= 0:
-                        if self.grid[row_runner][col] != ColorBlocksModel.UNTAKEN:
-                            # Move everything!
-                            skip = row - row_runner
-                            fall = row_runner
-                            
-                            while fall >= 0 and self.grid[fall][col] != ColorBlocksModel.UNTAKEN:
-                                self.grid[fall + skip][col] = self.grid[fall][col]
-                                self.grid[fall][col] = ColorBlocksModel.UNTAKEN
-                                fall -= 1
-                            
-                            break
-                        else:
-                            row_runner -= 1
-                
-                row -= 1
+        self.invalidate_regions()
+        if self.__array_backed:
+            gravity.fall_array(self.grid, ColorBlocksModel.UNTAKEN)
+        else:
+            gravity.fall_lists(self.grid, ColorBlocksModel.UNTAKEN)
     
     def __str__(self):
         board = "  "
@@ -0,0 +1,66 @@
+#! usr/bin/env python
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+"""
+Block gravity for Color Blocks boards. Every function here works in place and
+touches each cell a constant number of times.
+
+The `_lists` functions take a list of rows, as in ColorBlocksModel.grid. The
+`_array` functions take a 2D NumPy array and need NumPy.
+"""
+
+def fall_lists(grid, empty):
+    """
+    Make every block fall to the bottom of its column, keeping the order of
+    the blocks within the column.
+    """
+    height = len(grid)
+
+    for col in range(len(grid[0])):
+        blocks = [row[col] for row in grid if row[col] != empty]
+        gap = height - len(blocks)
+
+        if gap == 0:
+            continue
+
+        for row_index in range(gap):
+            grid[row_index][col] = empty
+
+        for offset, block in enumerate(blocks):
+            grid[gap + offset][col] = block
+
+def collapse_lists(grid, empty):
+    """
+    Remove the columns with no blocks by shifting the rest of the columns to
+    the left. The columns freed on the right are filled with `empty`.
+    """
+    width = len(grid[0])
+    keep = [col for col in range(width) if any(row[col] != empty for row in grid)]
+
+    if len(keep) == width:
+        return
+
+    padding = [empty] * (width - len(keep))
+    for row in grid:
+        row[:] = [row[col] for col in keep] + padding
+
+def fall_array(grid, empty):
+    """
+    fall_lists for NumPy arrays. Each column is stably partitioned into its
+    empty cells followed by its blocks.
+    """
+    order = numpy.argsort(grid != empty, axis=0, kind="stable")
+    grid[...] = numpy.take_along_axis(grid, order, axis=0)
+
+def collapse_array(grid, empty):
+    """
+    collapse_lists for NumPy arrays.
+    """
+    kept = grid[:, (grid != empty).any(axis=0)]
+    kept_width = kept.shape[1]
+    grid[:, :kept_width] = kept
+    grid[:, kept_width:] = empty
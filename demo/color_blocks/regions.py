@@ -0,0 +1,113 @@
+#! usr/bin/env python
+
+"""
+Connected-component labelling for Color Blocks grids.
+"""
+
+class ColorRegions(object):
+    """
+    Labels the groups of same-colored, adjacent blocks of a grid with a single
+    union-find pass, after which the size and the members of the group any
+    block belongs to are available in constant time.
+
+    This is a snapshot: it does not follow changes to the grid it was built
+    from.
+    """
+
+    def __init__(self, grid, hv_neighbors=True, diag_neighbors=True, empty=None):
+        """
+        @param grid
+          A list of rows, as in ColorBlocksModel.grid.
+        @param hv_neighbors
+          Whether blocks above, below, left and right of a block are adjacent
+          to it.
+        @param diag_neighbors
+          Whether diagonal blocks are adjacent to each other.
+        @param empty
+          The value of cells with no block. These are never labelled.
+        """
+        self.height = len(grid)
+        self.width = len(grid[0])
+        self.empty = empty
+        self.__parent = list(range(self.height * self.width))
+        self.__size = [1] * (self.height * self.width)
+
+        # Only the neighbors that come before a cell in row-major order; the
+        # others will get their turn to link back to it.
+        back_offsets = []
+        if hv_neighbors:
+            back_offsets.extend(((0, -1), (-1, 0)))
+        if diag_neighbors:
+            back_offsets.extend(((-1, -1), (-1, 1)))
+
+        for row in range(self.height):
+            for col in range(self.width):
+                color = grid[row][col]
+                if color == empty:
+                    continue
+
+                for drow, dcol in back_offsets:
+                    nrow = row + drow
+                    ncol = col + dcol
+                    if 0 <= nrow and 0 <= ncol < self.width and grid[nrow][ncol] == color:
+                        self.__union(row * self.width + col, nrow * self.width + ncol)
+
+        self.__labels = [None] * (self.height * self.width)
+        self.__members = {}
+        for row in range(self.height):
+            for col in range(self.width):
+                if grid[row][col] == empty:
+                    continue
+
+                index = row * self.width + col
+                root = self.__find(index)
+                self.__labels[index] = root
+                self.__members.setdefault(root, []).append((row, col))
+
+    def __find(self, index):
+        parent = self.__parent
+        while parent[index] != index:
+            # Path halving
+            parent[index] = parent[parent[index]]
+            index = parent[index]
+        return index
+
+    def __union(self, a, b):
+        root_a = self.__find(a)
+        root_b = self.__find(b)
+        if root_a == root_b:
+            return
+
+        if self.__size[root_a] < self.__size[root_b]:
+            root_a, root_b = root_b, root_a
+        self.__parent[root_b] = root_a
+        self.__size[root_a] += self.__size[root_b]
+
+    def label(self, row, col):
+        """
+        An identifier shared by all blocks in the same group, or None for
+        empty cells.
+        """
+        return self.__labels[row * self.width + col]
+
+    def cluster_size(self, row, col):
+        """
+        The number of blocks in the group of the block at (row, col). Empty
+        cells have a cluster size of 0.
+        """
+        label = self.label(row, col)
+        return 0 if label is None else len(self.__members[label])
+
+    def cluster_cells(self, row, col):
+        """
+        The (row, col) tuples of the blocks in the same group as the block at
+        (row, col). Do not modify the returned list.
+        """
+        label = self.label(row, col)
+        return [] if label is None else self.__members[label]
+
+    def clusters(self):
+        """
+        Returns a list of all the groups, each a list of (row, col) tuples.
+        """
+        return list(self.__members.values())
@@ -0,0 +1,372 @@
+#! usr/bin/env python
+
+from components.helpers.grid import AdjacencyIndex
+
+from .color_blocks_model import ColorBlocksModel
+
+import random
+import time
+
+"""
+Move search for Color Blocks, for hints and for auto-playing games.
+
+Boards are encoded compactly (see Board) so that simulating a move is a few
+byte-string operations instead of a walk over a ColorBlocksModel grid.
+"""
+
+class Board(object):
+    """
+    An immutable Color Blocks board. `cells` is a bytes object of
+    `width * height` cells in row-major order: 0 is an empty cell and every
+    color is a number from 1 up, mapped back to the grid values through
+    `palette`.
+
+    Boards are hashable, so they can be used as transposition table keys.
+    """
+
+    EMPTY = 0
+
+    def __init__(self, width, height, cells, palette):
+        self.width = width
+        self.height = height
+        self.cells = bytes(cells)
+        self.palette = palette
+
+    @staticmethod
+    def from_grid(grid, empty=ColorBlocksModel.UNTAKEN):
+        """
+        Encode a list of rows (or a 2D NumPy array), as in
+        ColorBlocksModel.grid. At most 255 colors are supported.
+        """
+        codes = {}
+        palette = [empty]
+        cells = bytearray()
+
+        for row in grid:
+            for value in row:
+                if value == empty:
+                    cells.append(Board.EMPTY)
+                    continue
+
+                code = codes.get(value)
+                if code is None:
+                    code = len(palette)
+                    codes[value] = code
+                    palette.append(value)
+                cells.append(code)
+
+        if len(palette) > 256:
+            raise ValueError("Board supports at most 255 colors.")
+
+        return Board(len(grid[0]), len(grid), cells, tuple(palette))
+
+    @staticmethod
+    def from_model(model):
+        return Board.from_grid(model.grid, ColorBlocksModel.UNTAKEN)
+
+    def to_grid(self):
+        """
+        Decode this board back into a list of rows.
+        """
+        return [
+            [self.palette[code] for code in self.cells[row * self.width:(row + 1) * self.width]]
+            for row in range(self.height)
+        ]
+
+    @property
+    def block_count(self):
+        return len(self.cells) - self.cells.count(Board.EMPTY)
+
+    def __eq__(self, other):
+        return isinstance(other, Board) and self.width == other.width and self.cells == other.cells
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash(self.cells)
+
+class ColorBlocksSolver(object):
+    """
+    Finds good sequences of moves on a Board. A move is the (row, col) of a
+    block, just like the arguments of ColorBlocksModel.toggle, and scores as
+    many points as the blocks it removes.
+
+    Searching is done by beam search, where each level keeps the
+    `beam_width` most promising boards. Setting `rollouts` makes
+    `best_move` rank the moves by Monte Carlo instead: each move is followed
+    by `rollouts` random games and the move with the best average wins.
+
+    Boards reached through different move orders are only expanded once,
+    thanks to a transposition table of up to `table_size` boards.
+
+    If `time_budget` (in seconds) is set, searches return the best they found
+    once the budget runs out.
+    """
+
+    def __init__(
+        self, hv_neighbors=True, diag_neighbors=True, min_score=1, beam_width=8,
+        rollouts=0, time_budget=None, table_size=100000, seed=None
+    ):
+        """
+        @param hv_neighbors
+        @param diag_neighbors
+          Which blocks are adjacent, as in QuadraticGrid.
+        @param min_score
+          The smallest group of blocks that can be removed, as in
+          ColorBlocksModel.
+        @param beam_width
+          The number of boards kept at each level of the beam search.
+        @param rollouts
+          The number of random games played per move by `best_move`. 0 means
+          use beam search instead.
+        @param time_budget
+          The number of seconds a search may take, or None for no limit.
+        @param table_size
+          The maximum number of boards kept in the transposition table.
+        @param seed
+          Seed for the random number generator of the rollouts.
+        """
+        self.hv_neighbors = hv_neighbors
+        self.diag_neighbors = diag_neighbors
+        self.min_score = min_score
+        self.beam_width = beam_width
+        self.rollouts = rollouts
+        self.time_budget = time_budget
+        self.table_size = table_size
+        self.__random = random.Random(seed)
+        self.__table = {}
+        self.__deadline = None
+
+    @staticmethod
+    def for_model(model, **kwargs):
+        """
+        A solver that follows the rules of the given ColorBlocksModel. Keyword
+        arguments are passed on to the constructor.
+        """
+        return ColorBlocksSolver(
+            model.quadratic_grid.hv_neighbors, model.quadratic_grid.diag_neighbors,
+            model.min_score, **kwargs
+        )
+
+    def clusters(self, board):
+        """
+        Returns every group of same-colored adjacent blocks in the board as a
+        list of flat cell indices, in row-major order of their first cell.
+        """
+        adjacency = AdjacencyIndex.get(
+            board.width, board.height, self.hv_neighbors, self.diag_neighbors
+        )
+        cells = board.cells
+        seen = bytearray(len(cells))
+        clusters = []
+
+        for start, color in enumerate(cells):
+            if color == Board.EMPTY or seen[start]:
+                continue
+
+            seen[start] = 1
+            cluster = [start]
+            # The cluster doubles as the BFS queue.
+            head = 0
+            while head < len(cluster):
+                for neighbor in adjacency.flat_neighbors(cluster[head]):
+                    if not seen[neighbor] and cells[neighbor] == color:
+                        seen[neighbor] = 1
+                        cluster.append(neighbor)
+                head += 1
+
+            clusters.append(cluster)
+
+        return clusters
+
+    def moves(self, board):
+        """
+        Returns a list of (move, cluster) tuples, one per group of blocks that
+        can be removed. The move is the (row, col) of the first block of the
+        group.
+        """
+        width = board.width
+        return [
+            (divmod(cluster[0], width), cluster)
+            for cluster in self.clusters(board) if len(cluster) >= self.min_score
+        ]
+
+    def play(self, board, move):
+        """
+        Returns the board after toggling `move` (a (row, col) tuple), letting
+        the blocks fall and collapsing empty columns, along with the points
+        scored.
+        """
+        row, col = move
+        for cluster in self.clusters(board):
+            if row * board.width + col in cluster:
+                if len(cluster) < self.min_score:
+                    break
+                return self.__play_cluster(board, cluster), len(cluster)
+
+        return board, 0
+
+    def __play_cluster(self, board, cluster):
+        width = board.width
+        height = board.height
+        cells = bytearray(board.cells)
+
+        for index in cluster:
+            cells[index] = Board.EMPTY
+
+        # Only the columns the cluster touched need to fall.
+        for col in set(index % width for index in cluster):
+            blocks = cells[col::width].translate(None, b"\0")
+            cells[col::width] = bytes(height - len(blocks)) + blocks
+
+        # After falling, a column is empty iff its bottom cell is.
+        bottom = (height - 1) * width
+        keep = [col for col in range(width) if cells[bottom + col] != Board.EMPTY]
+        if len(keep) < width:
+            collapsed = bytearray(len(cells))
+            for new_col, col in enumerate(keep):
+                collapsed[new_col::width] = cells[col::width]
+            cells = collapsed
+
+        return Board(width, height, cells, board.palette)
+
+    def __start_search(self):
+        if self.time_budget is None:
+            self.__deadline = None
+        else:
+            self.__deadline = time.monotonic() + self.time_budget
+
+        if len(self.__table) > self.table_size:
+            self.__table.clear()
+
+    def __out_of_time(self):
+        return self.__deadline is not None and time.monotonic() > self.__deadline
+
+    def __remember(self, board, score):
+        """
+        Record that `board` was reached with `score` points. Returns False if
+        it was already reached with at least as many points.
+        """
+        best = self.__table.get(board.cells)
+        if best is not None and best >= score:
+            return False
+
+        if len(self.__table) >= self.table_size:
+            self.__table.clear()
+        self.__table[board.cells] = score
+        return True
+
+    def __evaluate(self, score, moves):
+        """
+        How promising a board is for the beam: the points scored so far plus
+        the blocks that can still be removed right away.
+        """
+        return score + sum(len(cluster) for move, cluster in moves)
+
+    def __beam_search(self, board):
+        """
+        Returns (path, score) for the best line found from `board`.
+        """
+        self.__start_search()
+        self.__table.clear()
+        # Beam entries are (evaluation, score, board, path, moves).
+        moves = self.moves(board)
+        beam = [(self.__evaluate(0, moves), 0, board, [], moves)]
+        best_score, best_path = 0, []
+
+        # Always expand the root, so that there is a first move to suggest
+        # even when the time is up right away.
+        while beam:
+            children = []
+            for evaluation, score, parent, path, parent_moves in beam:
+                for move, cluster in parent_moves:
+                    child = self.__play_cluster(parent, cluster)
+                    child_score = score + len(cluster)
+                    if not self.__remember(child, child_score):
+                        continue
+
+                    child_path = path + [move]
+                    if child_score > best_score:
+                        best_score, best_path = child_score, child_path
+
+                    child_moves = self.moves(child)
+                    if child_moves:
+                        children.append((
+                            self.__evaluate(child_score, child_moves), child_score,
+                            child, child_path, child_moves
+                        ))
+
+            children.sort(key=lambda entry: entry[0], reverse=True)
+            beam = children[:self.beam_width]
+            if self.__out_of_time():
+                break
+
+        return best_path, best_score
+
+    def rollout(self, board):
+        """
+        Plays random moves on `board` until none are left. Returns the points
+        scored.
+        """
+        score = 0
+        moves = self.moves(board)
+        while moves:
+            move, cluster = self.__random.choice(moves)
+            board = self.__play_cluster(board, cluster)
+            score += len(cluster)
+            moves = self.moves(board)
+        return score
+
+    def __monte_carlo(self, board):
+        self.__start_search()
+        moves = self.moves(board)
+        totals = [0] * len(moves)
+        played = 0
+
+        # Round-robin over the moves so that running out of time leaves every
+        # move with about the same number of rollouts.
+        while played < self.rollouts and not self.__out_of_time():
+            for idx, (move, cluster) in enumerate(moves):
+                child = self.__play_cluster(board, cluster)
+                totals[idx] += len(cluster) + self.rollout(child)
+            played += 1
+
+        best_idx = max(range(len(moves)), key=lambda idx: totals[idx])
+        return moves[best_idx][0]
+
+    def best_move(self, board):
+        """
+        The suggested next move, or None if there are no moves left.
+        """
+        moves = self.moves(board)
+        if not moves:
+            return None
+        elif len(moves) == 1:
+            return moves[0][0]
+        elif self.rollouts:
+            return self.__monte_carlo(board)
+        else:
+            path, score = self.__beam_search(board)
+            return path[0]
+
+    def solve(self, board):
+        """
+        Searches for a full game from `board`. Returns the list of moves and
+        the points they score. Play the moves in order, each followed by
+        `falldown` and `collapse`.
+        """
+        path, score = self.__beam_search(board)
+
+        # If the search ran out of time, finish its line greedily.
+        for move in path:
+            board, points = self.play(board, move)
+        moves = self.moves(board)
+        while moves:
+            move, cluster = max(moves, key=lambda move_cluster: len(move_cluster[1]))
+            board = self.__play_cluster(board, cluster)
+            path.append(move)
+            score += len(cluster)
+            moves = self.moves(board)
+
+        return path, score
@@ -1,7 +1,9 @@
 #! usr/bin/env python
 
+from components import batch_collision
 from components.core import Colors, GameConfig, GameLoop, GameLoopEvents, GameModel, GameScreen
 from components.image import Image
+from components.preloader import AssetManifest, LoadingScreen, PreloadingEvents, Preloader
 from components.shapes import Point
 
 from .sprites import Zombie, Shooter, Bullet
@@ -111,7 +113,7 @@ class PVZEvents(GameLoopEvents):
             self.game_screen.add_monster(monster)
         
         super(PVZEvents, self).loop_event()
-        bullet_hits = pygame.sprite.groupcollide(self.game_screen.bullet_sprite_group, \
+        bullet_hits = batch_collision.groupcollide(self.game_screen.bullet_sprite_group, \
             self.game_screen.monster_sprite_group, True, True)
         
         self.game_screen.score += len(bullet_hits)
@@ -142,6 +144,14 @@ class PVZEvents(GameLoopEvents):
         
         self.add_event_handler(keydown_event, self.key_controls.handle)
 
+def asset_manifest():
+    manifest = AssetManifest()
+    for name in ("meteormon_clueless", "bakemon_attack", "lalamon_clueless",
+      "tentacly_angry", "seahomon_hero"):
+        manifest.add_image(name, os.path.join("sample_sprites", "notmine", name + ".png"))
+    manifest.add_image("bullet", os.path.join("sample_sprites", "bullet.png"))
+    return manifest
+
 if __name__ == "__main__":
     config = GameConfig()
     config.set_config_val("window_size", [500, 500])
@@ -151,5 +161,6 @@ if __name__ == "__main__":
     screen = PVZMainScreen(config)
     
     image_gle = PVZEvents(config, screen)
-    gl = GameLoop(image_gle)
+    loading_screen = LoadingScreen(config, Preloader(asset_manifest()))
+    gl = GameLoop(PreloadingEvents(loading_screen, image_gle))
     gl.go()
@@ -1,34 +1,92 @@
 from components.framework_exceptions import VectorDirectionException
 from components.helpers.grid import QuadraticGrid
+from components.subscriber_pattern import Subscriber
 
+import collections
 import heapq
 import random
 import time
 
 class WindowedCount(object):
+    """
+    Counts keys over the latest `window` increments and, optionally, only
+    those made in the last `duration` seconds. Increments are kept in a
+    deque, oldest first, so evicting them is O(1) each.
+    """
     
-    def __init__(self, window=8):
+    def __init__(self, window=8, duration=None, clock=time.monotonic):
+        """
+        @param window
+          The number of increments counted.
+        @param duration
+          If given, increments older than this many seconds are not counted
+          either.
+        @param clock
+          Where the time of the increments comes from. Only called when
+          `duration` is given.
+        """
         self.window_size = window
+        self.duration = duration
+        self.clock = clock
         self.counts = {}
         self.record_size = 0
-        self.timeheap = []
+        self.records = collections.deque()
+
+    def __drop_oldest(self):
+        oldest_entry = self.records.popleft()
+        if self.duration is not None:
+            oldest_entry = oldest_entry[1]
+
+        count = self.counts[oldest_entry] - 1
+        if count:
+            self.counts[oldest_entry] = count
+        else:
+            del self.counts[oldest_entry]
+        self.record_size -= 1
+
+    def evict(self, now=None):
+        """
+        Stop counting the increments that are older than `duration`. This is
+        done on every `incr`; call it before querying the counts if there
+        might not have been any increments for a while.
+        """
+        if self.duration is None:
+            return
+
+        if now is None:
+            now = self.clock()
+        while self.records and now - self.records[0][0] > self.duration:
+            self.__drop_oldest()
 
     def incr(self, count_key):
         assert self.record_size <= self.window_size
-        if self.record_size == self.window_size:
-            oldest_entry = heapq.heappop(self.timeheap)[1]
-            self.counts[oldest_entry] -= 1
-            self.record_size -= 1
-
-        count = self.counts.get(count_key)
-        
-        if count: self.counts[count_key] += 1
+        if self.duration is None:
+            record = count_key
         else:
-            self.counts[count_key] = 1
+            now = self.clock()
+            self.evict(now)
+            record = (now, count_key)
 
+        if self.record_size == self.window_size:
+            self.__drop_oldest()
+
+        self.counts[count_key] = self.counts.get(count_key, 0) + 1
         self.record_size += 1
+        self.records.append(record)
 
-        heapq.heappush(self.timeheap, (time.time(), count_key))
+    def top_k(self, k):
+        """
+        The (at most) `k` keys with the highest counts, highest first.
+        """
+        return heapq.nlargest(k, self.counts, key=self.counts.__getitem__)
+
+    def distribution(self):
+        """
+        The fraction of the counted increments that went to each key.
+        """
+        if not self.record_size:
+            return {}
+        return dict((key, count / float(self.record_size)) for key, count in self.counts.items())
 
 class SpawnManager(object):
     
@@ -38,7 +96,7 @@ class SpawnManager(object):
     
     def __init__(self, grid_width, grid_height, window=8):
         self.global_counts = {}
-        self.window_counts = WindowedCount()
+        self.window_counts = WindowedCount(window)
         self.grid_width = grid_width
         self.grid_height = grid_height
 
@@ -80,23 +138,17 @@ class SimpleRankSpawnManager(SpawnManager):
             raise VectorDirectionException("Proposed food position is not a cardinal direction.")
 
     def get_spawn(self, snake):
-        ranker = []
-        snake_squares = snake.enumerate_snake_squares()
+        # The two directions the player moved in the most lately.
+        unchosen = set(self.window_counts.top_k(2))
 
-        for k in list(self.global_counts.keys()):
-            heapq.heappush(ranker, (self.global_counts[k], k))
-
-        if len(ranker) < 2:
+        if len(unchosen) < 2:
             candidate = (random.randint(0, self.grid_width - 1), random.randint(0, self.grid_height - 1))
 
-            while candidate in snake_squares:
+            while snake.occupies(candidate):
                 candidate = (random.randint(0, self.grid_width - 1), random.randint(0, self.grid_height - 1))
 
             return candidate
 
-        top1 = heapq.heappop(ranker)
-        top2 = heapq.heappop(ranker)
-        unchosen = set((top1, top2))
         bottom = SpawnManager.QUADRATIC_DIRECTIONS - unchosen
         chosen = random.choice(list(bottom))
         
@@ -108,7 +160,7 @@ class SimpleRankSpawnManager(SpawnManager):
 
         food = snake.head
 
-        while food in snake_squares:
+        while snake.occupies(food):
             food = (food[0] + chosen[0], food[1] + chosen[1])
 
         return food
@@ -119,12 +171,386 @@ class SpawnManagerIgnoramus(SpawnManager):
         super(SpawnManagerIgnoramus, self).__init__(grid_width, grid_height, window)
 
     def get_spawn(self, snake):
-        snake_squares = snake.enumerate_snake_squares()
         food_point = (random.randint(0, self.grid_height - 1),
           random.randint(0, self.grid_width - 1))
 
-        while food_point in snake_squares:
+        while snake.occupies(food_point):
             food_point = (random.randint(0, self.grid_height - 1),
               random.randint(0, self.grid_width - 1))
 
         return food_point
+
+class FreeCellIndex(Subscriber):
+    """
+    The squares of a grid that a snake is not on, kept in a list so that one
+    can be picked at random in constant time. A map from each free square to
+    its position in the list allows removing squares in constant time too:
+    the last square of the list takes the place of the removed one.
+
+    The index follows the snake through its notifications. When the snake is
+    reset, the index is rebuilt the next time it is used.
+    """
+
+    def __init__(self, grid_width, grid_height):
+        super(FreeCellIndex, self).__init__()
+        self.grid_width = grid_width
+        self.grid_height = grid_height
+        self.snake = None
+        self.__cells = []
+        self.__positions = {}
+        self.__stale = True
+
+    def track(self, snake):
+        """
+        Follow `snake` instead of the snake currently followed, if any.
+        """
+        if self.snake is not None:
+            self.snake.unsubscribe(self)
+
+        self.snake = snake
+        self.__stale = True
+        if snake is not None:
+            snake.subscribe(self)
+
+    def notify(self, observed, arg_bundle=None):
+        if self.__stale or not arg_bundle:
+            return
+
+        event = arg_bundle.get("snake_event")
+        if event == "occupied":
+            self.__remove(arg_bundle["square"])
+        elif event == "vacated":
+            self.__add(arg_bundle["square"])
+        elif event == "reset":
+            self.__stale = True
+
+    def __in_grid(self, square):
+        return 0 <= square[0] < self.grid_height and 0 <= square[1] < self.grid_width
+
+    def __add(self, square):
+        if self.__in_grid(square) and square not in self.__positions:
+            self.__positions[square] = len(self.__cells)
+            self.__cells.append(square)
+
+    def __remove(self, square):
+        position = self.__positions.pop(square, None)
+        if position is None:
+            return
+
+        last = self.__cells.pop()
+        if last != square:
+            self.__cells[position] = last
+            self.__positions[last] = position
+
+    def __rebuild(self):
+        self.__cells = []
+        self.__positions = {}
+        for row in range(self.grid_height):
+            for col in range(self.grid_width):
+                if self.snake is None or not self.snake.occupies((row, col)):
+                    self.__positions[(row, col)] = len(self.__cells)
+                    self.__cells.append((row, col))
+        self.__stale = False
+
+    def __len__(self):
+        if self.__stale:
+            self.__rebuild()
+        return len(self.__cells)
+
+    def __contains__(self, square):
+        if self.__stale:
+            self.__rebuild()
+        return square in self.__positions
+
+    def choice(self, rng=random):
+        """
+        Returns a free square picked uniformly at random, or None if there are
+        none.
+        """
+        if self.__stale:
+            self.__rebuild()
+        if not self.__cells:
+            return None
+        return self.__cells[rng.randrange(len(self.__cells))]
+
+class FreeCellSpawnManager(SpawnManager):
+    """
+    Spawns food on a uniformly random free square in constant time, however
+    full the board is. Returns None when the snake fills the whole board.
+    """
+
+    def __init__(self, grid_width, grid_height, window=8):
+        super(FreeCellSpawnManager, self).__init__(grid_width, grid_height, window)
+        self.free_cells = FreeCellIndex(grid_width, grid_height)
+
+    def get_spawn(self, snake):
+        if snake is not self.free_cells.snake:
+            self.free_cells.track(snake)
+
+        return self.free_cells.choice()
+
+class Autopilot(object):
+    """
+    Steers a snake towards the food, for unattended games.
+
+    Paths to the food are found with A* over the grid, taking into account
+    that the squares near the tail become free as the snake moves: a path
+    may go through a square of the body if the tail will have left it by the
+    time the head gets there. A path is only taken if, once the food is
+    eaten, the head can still reach the tail. If the shortest path is not
+    safe, the path along a Hamiltonian cycle of the grid (if there is one) is
+    tried. If neither is, the snake goes round the cycle until it gets to the
+    food, or makes any move that keeps its tail within reach if the cycle is
+    blocked.
+
+    On grids with a cycle, once the snake is long, paths are only taken if
+    they leave the body lying along the cycle. Going round the cycle is then
+    always safe, so the snake gets to every food within one lap.
+
+    A path is followed until the food moves or the snake strays from it, so
+    the search only happens when there is new food.
+    """
+
+    DIRECTIONS = (QuadraticGrid.Movements.UP, QuadraticGrid.Movements.DOWN,
+      QuadraticGrid.Movements.LEFT, QuadraticGrid.Movements.RIGHT)
+
+    def __init__(self, grid_width, grid_height, seed=None):
+        """
+        @param grid_width
+        @param grid_height
+        @param seed
+          Seed for breaking ties between equally safe moves.
+        """
+        self.grid_width = grid_width
+        self.grid_height = grid_height
+        self.__random = random.Random(seed)
+        self.cycle = Autopilot.hamiltonian_cycle(grid_width, grid_height)
+        self.__cycle_next = {}
+        self.__cycle_index = {}
+        if self.cycle:
+            for idx, square in enumerate(self.cycle):
+                self.__cycle_next[square] = self.cycle[(idx + 1) % len(self.cycle)]
+                self.__cycle_index[square] = idx
+
+        self.__plan = collections.deque()
+        self.__plan_food = None
+        self.__plan_head = None
+        # The food the snake is going round the cycle for, if it is.
+        self.__cycle_food = None
+        """
+        The number of times a path to the food had to be searched.
+        """
+        self.searches = 0
+
+    @staticmethod
+    def hamiltonian_cycle(grid_width, grid_height):
+        """
+        Returns a list of (row, col) squares that visits every square of the
+        grid once and ends next to where it starts. There is none if both
+        dimensions are odd, in which case this returns None.
+        """
+        if grid_height % 2 and grid_width % 2:
+            return None
+        elif grid_height % 2:
+            transposed = Autopilot.hamiltonian_cycle(grid_height, grid_width)
+            return [(col, row) for row, col in transposed]
+
+        # Zigzag through every column but the first, then go back up the
+        # first column.
+        cycle = []
+        for row in range(grid_height):
+            cols = range(1, grid_width) if row % 2 == 0 else range(grid_width - 1, 0, -1)
+            cycle.extend((row, col) for col in cols)
+        cycle.extend((row, 0) for row in range(grid_height - 1, -1, -1))
+        return cycle
+
+    def __neighbors(self, square):
+        for drow, dcol in Autopilot.DIRECTIONS:
+            row = square[0] + drow
+            col = square[1] + dcol
+            if 0 <= row < self.grid_height and 0 <= col < self.grid_width:
+                yield (row, col)
+
+    @staticmethod
+    def __vacancy(body):
+        """
+        Maps every square of `body` (head first) to the number of moves after
+        which the tail will have left it.
+        """
+        length = len(body)
+        vacancy = {}
+        for idx in range(length - 1, -1, -1):
+            vacancy[body[idx]] = length - idx
+        return vacancy
+
+    def __find_path(self, start, goal, vacancy):
+        """
+        The shortest list of squares leading from `start` (exclusive) to
+        `goal` (inclusive) such that each square is free by the time the head
+        gets to it. None if there is no such path.
+        """
+        heap = [(0, 0, start)]
+        arrival = {start: 0}
+        came_from = {start: None}
+
+        while heap:
+            estimate, moves, square = heapq.heappop(heap)
+            if square == goal:
+                path = []
+                while square != start:
+                    path.append(square)
+                    square = came_from[square]
+                path.reverse()
+                return path
+
+            if moves > arrival[square]:
+                continue
+
+            for neighbor in self.__neighbors(square):
+                next_moves = moves + 1
+                if vacancy.get(neighbor, 0) > next_moves:
+                    continue
+
+                if neighbor not in arrival or next_moves < arrival[neighbor]:
+                    arrival[neighbor] = next_moves
+                    came_from[neighbor] = square
+                    distance = abs(neighbor[0] - goal[0]) + abs(neighbor[1] - goal[1])
+                    heapq.heappush(heap, (next_moves + distance, next_moves, neighbor))
+
+        return None
+
+    def __cycle_path(self, start, goal, vacancy):
+        """
+        Like __find_path, but the path follows the Hamiltonian cycle.
+        """
+        if start not in self.__cycle_next:
+            return None
+
+        path = []
+        square = start
+        while square != goal:
+            square = self.__cycle_next[square]
+            path.append(square)
+            if vacancy.get(square, 0) > len(path):
+                return None
+
+        return path
+
+    def __along_cycle(self, body):
+        """
+        Whether the squares of `body` come in the order of the cycle, from
+        the tail to the head, within less than one lap. Then every square
+        from the head to the tail going round the cycle is free, so the snake
+        can always follow the cycle.
+        """
+        if not self.cycle:
+            return False
+
+        if any(square not in self.__cycle_index for square in body):
+            return False
+
+        laps = 0
+        for ahead, behind in zip(body, body[1:]):
+            step = (self.__cycle_index[ahead] - self.__cycle_index[behind]) % len(self.cycle)
+            if step == 0:
+                return False
+            laps += step
+        return laps < len(self.cycle)
+
+    def __can_reach_tail(self, body):
+        if len(body) >= self.grid_width * self.grid_height:
+            return True
+        return self.__find_path(body[0], body[-1], Autopilot.__vacancy(body)) is not None
+
+    @staticmethod
+    def __moved_body(body, path, grows):
+        """
+        The body after the head follows `path`, growing by one at the end of
+        it if `grows` is set.
+        """
+        length = len(body) + (1 if grows else 0)
+        moved = list(reversed(path)) + body
+        return moved[:length]
+
+    def __direction(self, head, square):
+        return (square[0] - head[0], square[1] - head[1])
+
+    def next_move(self, snake, food_point):
+        """
+        The direction the snake should move towards next, as one of the
+        QuadraticGrid.Movements.
+
+        @param snake
+          A Snake, or anything with `head` and `body` like it.
+        @param food_point
+          The (row, col) of the food, or None if there is none.
+        """
+        head = snake.head
+        if self.__plan and head == self.__plan_head and food_point == self.__plan_food:
+            square = self.__plan.popleft()
+            self.__plan_head = square
+            return self.__direction(head, square)
+
+        self.__plan.clear()
+        body = list(snake.body)
+        vacancy = Autopilot.__vacancy(body)
+
+        if self.__cycle_food is not None and food_point == self.__cycle_food:
+            cycle_next = self.__cycle_next[head]
+            # Until the body lies along the cycle, the cycle may lead into it.
+            if vacancy.get(cycle_next, 0) <= 1 and (self.__along_cycle(body) or self.__can_reach_tail(
+              Autopilot.__moved_body(body, [cycle_next], cycle_next == food_point))):
+                return self.__direction(head, cycle_next)
+        self.__cycle_food = None
+
+        if food_point is not None:
+            self.searches += 1
+            # Past a short length, or once the body lies along the cycle, only
+            # take paths that leave it along the cycle, so that going round
+            # the cycle is always safe afterwards.
+            keep_along_cycle = self.cycle and (
+                len(body) >= max(self.grid_width, self.grid_height) or self.__along_cycle(body)
+            )
+            # The shortest path first, then the long way round the cycle.
+            for path in (self.__find_path(head, food_point, vacancy),
+              self.__cycle_path(head, food_point, vacancy)):
+                if not path:
+                    continue
+                moved = Autopilot.__moved_body(body, path, True)
+                if keep_along_cycle and not self.__along_cycle(moved):
+                    continue
+                if self.__can_reach_tail(moved):
+                    self.__plan.extend(path[1:])
+                    self.__plan_food = food_point
+                    self.__plan_head = path[0]
+                    return self.__direction(head, path[0])
+
+        return self.__fallback_move(head, body, vacancy, food_point)
+
+    def __fallback_move(self, head, body, vacancy, food_point):
+        candidates = [square for square in self.__neighbors(head) if vacancy.get(square, 0) <= 1]
+        cycle_next = self.__cycle_next.get(head)
+        if cycle_next in candidates:
+            moved = Autopilot.__moved_body(body, [cycle_next], cycle_next == food_point)
+            if self.__can_reach_tail(moved):
+                # Go round the cycle, which passes by the food, until the food
+                # is eaten or the way is blocked. Once the body lies along the
+                # cycle, the way never is.
+                self.__cycle_food = food_point
+                return self.__direction(head, cycle_next)
+
+        # Shuffled so that the snake does not go around in the same circle
+        # forever when it cannot get to the food.
+        self.__random.shuffle(candidates)
+        for square in candidates:
+            moved = Autopilot.__moved_body(body, [square], square == food_point)
+            if self.__can_reach_tail(moved):
+                return self.__direction(head, square)
+
+        if candidates:
+            return self.__direction(head, candidates[0])
+        elif len(body) > 1:
+            # Trapped. Keep going straight.
+            return self.__direction(body[1], head)
+        else:
+            return QuadraticGrid.Movements.RIGHT
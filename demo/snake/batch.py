@@ -0,0 +1,356 @@
+from components.helpers.grid import QuadraticGrid
+from components.subscriber_pattern import Publisher
+
+from .ai import Autopilot
+from .model import SnakeGameModel
+
+import concurrent.futures
+import random
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+"""
+Headless Snake for evaluating spawn managers and autopilots over many games.
+
+BatchSnakeSimulator steps any number of independent games in lockstep, with
+the state of all of them held in NumPy arrays. `run_batches` spreads batches
+over a process pool. The rules are those of SnakeGameModel, minus the
+reversible moves.
+"""
+
+UP, DOWN, LEFT, RIGHT = range(4)
+"""
+Directions are indices into DIRECTIONS.
+"""
+DIRECTIONS = (QuadraticGrid.Movements.UP, QuadraticGrid.Movements.DOWN,
+  QuadraticGrid.Movements.LEFT, QuadraticGrid.Movements.RIGHT)
+OPPOSITES = (DOWN, UP, RIGHT, LEFT)
+
+class GameView(Publisher):
+    """
+    Presents one game of a BatchSnakeSimulator with the interface of Snake
+    that the spawn managers use.
+
+    It does not notify subscribers square by square. Instead, the simulator
+    notifies a "reset" before every spawn, so spawn managers that follow a
+    snake (like FreeCellSpawnManager) rebuild their state from `occupies`
+    each time.
+    """
+
+    def __init__(self, simulator, game):
+        super(GameView, self).__init__()
+        self.simulator = simulator
+        self.game = game
+
+    @property
+    def head(self):
+        return (int(self.simulator.head_row[self.game]), int(self.simulator.head_col[self.game]))
+
+    @property
+    def body(self):
+        width = self.simulator.width
+        return [divmod(int(cell), width) for cell in self.simulator.body_cells(self.game)]
+
+    def occupies(self, square, include_head=True):
+        if not include_head and square == self.head:
+            return False
+        return self.simulator.occupies(self.game, square)
+
+    def enumerate_snake_squares(self, include_head=True):
+        squares = set(self.body)
+        if not include_head:
+            squares.discard(self.head)
+        return squares
+
+    def get_orientation(self):
+        return DIRECTIONS[self.simulator.direction[self.game]]
+
+class BatchSnakeSimulator(object):
+    """
+    Runs `n_games` games of Snake on a `width` x `height` board in lockstep.
+
+    Each game has its own clock, the number of moves it made. The board of a
+    game is stored as the time at which its head last entered each square: a
+    square is occupied iff the head entered it less than `length` moves ago.
+    This way a move only writes the new head square, and growing is just
+    incrementing `length`. The last moves of the head are also kept in a ring
+    buffer, from which the body can be listed.
+
+    Food is spawned uniformly on a free square unless a
+    `spawn_manager_factory` is given. It is called as
+    `spawn_manager_factory(width, height)` once per game, and the spawn
+    managers it returns are given a GameView of their game.
+
+    A game ends when the snake hits a wall or itself or when there is no
+    square left for food, in which case it is won.
+    """
+
+    def __init__(
+        self, n_games, width, height, spawn_manager_factory=None, seed=None,
+        snake_size=SnakeGameModel.DEFAULT_SNAKE_SIZE
+    ):
+        """
+        @param seed
+          Seed for the NumPy random number generator of the simulator. It
+          does not seed the spawn managers; seed `random` for those.
+        """
+        if numpy is None:
+            raise ImportError("BatchSnakeSimulator requires NumPy.")
+
+        if width < (snake_size + 1) or height < snake_size:
+            raise ValueError("Please give enough room for the snake to move")
+
+        self.n_games = n_games
+        self.width = width
+        self.height = height
+        self.rng = numpy.random.default_rng(seed)
+        self.directions = numpy.array(DIRECTIONS, dtype=numpy.int64)
+        self.opposites = numpy.array(OPPOSITES, dtype=numpy.int64)
+        self.capacity = width * height + 1
+
+        games = numpy.arange(n_games)
+        row = height // 2
+        col = width // 2
+        self.head_row = numpy.full(n_games, row, dtype=numpy.int64)
+        self.head_col = numpy.full(n_games, col, dtype=numpy.int64)
+        self.direction = numpy.full(n_games, RIGHT, dtype=numpy.int64)
+        self.length = numpy.full(n_games, snake_size + 1, dtype=numpy.int64)
+        self.clock = numpy.zeros(n_games, dtype=numpy.int64)
+        self.alive = numpy.ones(n_games, dtype=bool)
+        self.won = numpy.zeros(n_games, dtype=bool)
+        self.score = numpy.zeros(n_games, dtype=numpy.int64)
+
+        self.entered = numpy.full((n_games, width * height), -self.capacity, dtype=numpy.int64)
+        self.history = numpy.zeros((n_games, self.capacity), dtype=numpy.int64)
+        for age in range(snake_size + 1):
+            cell = row * width + col - age
+            self.entered[:, cell] = -age
+            self.history[:, -age % self.capacity] = cell
+
+        if spawn_manager_factory is None:
+            self.spawn_managers = None
+        else:
+            self.spawn_managers = [spawn_manager_factory(width, height) for _ in games]
+        self.__views = {}
+
+        self.food = numpy.full(n_games, -1, dtype=numpy.int64)
+        self.__spawn(games)
+
+    def view(self, game):
+        """
+        The GameView of `game`.
+        """
+        view = self.__views.get(game)
+        if view is None:
+            view = GameView(self, game)
+            self.__views[game] = view
+        return view
+
+    def occupies(self, game, square):
+        row, col = square
+        if not (0 <= row < self.height and 0 <= col < self.width):
+            return False
+        age = self.clock[game] - self.entered[game, row * self.width + col]
+        return bool(age < self.length[game])
+
+    def free_mask(self, rows, cols):
+        """
+        For every game, whether the snake can move to the square
+        (rows[game], cols[game]) on the next step: it must be inside the board
+        and free, although the square the tail is about to leave will do.
+        """
+        inside = (rows >= 0) & (rows < self.height) & (cols >= 0) & (cols < self.width)
+        cells = numpy.where(inside, rows * self.width + cols, 0)
+        games = numpy.arange(self.n_games)
+        age = self.clock + 1 - self.entered[games, cells]
+        return inside & (age >= self.length)
+
+    def body_cells(self, game):
+        """
+        The flat indices (row * width + col) of the squares of the snake of
+        `game`, from the head to the tail.
+        """
+        ages = numpy.arange(self.length[game])
+        return self.history[game, (self.clock[game] - ages) % self.capacity]
+
+    def step(self, actions):
+        """
+        Moves the snake of every live game towards its direction in
+        `actions`, an array of UP, DOWN, LEFT or RIGHT. Turning around is
+        ignored: the snake keeps going straight instead.
+        """
+        alive = self.alive
+        actions = numpy.asarray(actions, dtype=numpy.int64)
+        actions = numpy.where(actions == self.opposites[self.direction], self.direction, actions)
+        turned = numpy.flatnonzero(alive & (actions != self.direction))
+        self.direction = numpy.where(alive, actions, self.direction)
+
+        rows = self.head_row + self.directions[self.direction, 0]
+        cols = self.head_col + self.directions[self.direction, 1]
+        moves = alive & self.free_mask(rows, cols)
+        moving = numpy.flatnonzero(moves)
+        cells = rows[moving] * self.width + cols[moving]
+
+        self.alive = moves
+        self.head_row[moving] = rows[moving]
+        self.head_col[moving] = cols[moving]
+        self.clock[moving] += 1
+        self.entered[moving, cells] = self.clock[moving]
+        self.history[moving, self.clock[moving] % self.capacity] = cells
+
+        eating = moving[cells == self.food[moving]]
+        self.length[eating] += 1
+        self.score[eating] += 1
+        self.__spawn(eating)
+
+        if self.spawn_managers is not None:
+            for game in turned:
+                self.spawn_managers[game].note_movement(DIRECTIONS[self.direction[game]])
+
+    def __spawn(self, games):
+        if not len(games):
+            return
+
+        if self.spawn_managers is None:
+            age = self.clock[games, numpy.newaxis] - self.entered[games]
+            free = age >= self.length[games, numpy.newaxis]
+            # The free square with the highest random weight is a uniform pick.
+            weights = self.rng.random(free.shape) * free
+            self.food[games] = numpy.where(free.any(axis=1), weights.argmax(axis=1), -1)
+        else:
+            for game in games:
+                view = self.view(game)
+                view.notify_subscribers(snake_event="reset")
+                food = self.spawn_managers[game].get_spawn(view)
+                if food is None or not (0 <= food[0] < self.height and 0 <= food[1] < self.width):
+                    self.food[game] = -1
+                else:
+                    self.food[game] = food[0] * self.width + food[1]
+
+        full = games[self.length[games] >= self.width * self.height]
+        self.won[full] = True
+        self.alive[full] = False
+
+    def run(self, policy, max_steps):
+        """
+        Steps the games with the actions returned by `policy(simulator)`
+        until they all end or `max_steps` steps are made.
+        """
+        steps = 0
+        while steps < max_steps and self.alive.any():
+            self.step(policy(self))
+            steps += 1
+
+    def results(self):
+        return {
+            "score": self.score.tolist(),
+            "moves": self.clock.tolist(),
+            "won": self.won.tolist()
+        }
+
+class RandomTurnPolicy(object):
+    """
+    Keeps going straight, turning to a random direction with probability
+    `turn_probability` on every move.
+    """
+
+    def __init__(self, turn_probability=0.1):
+        self.turn_probability = turn_probability
+
+    def __call__(self, simulator):
+        turns = simulator.rng.random(simulator.n_games) < self.turn_probability
+        directions = simulator.rng.integers(0, 4, simulator.n_games)
+        return numpy.where(turns, directions, simulator.direction)
+
+class GreedyPolicy(object):
+    """
+    Moves to the free neighboring square closest to the food, by Manhattan
+    distance. If none is free, keeps going straight.
+    """
+
+    def __call__(self, simulator):
+        food_row, food_col = numpy.divmod(simulator.food, simulator.width)
+        best = simulator.direction.copy()
+        best_distance = numpy.full(simulator.n_games, numpy.iinfo(numpy.int64).max)
+
+        for direction, (drow, dcol) in enumerate(DIRECTIONS):
+            rows = simulator.head_row + drow
+            cols = simulator.head_col + dcol
+            distance = numpy.abs(rows - food_row) + numpy.abs(cols - food_col)
+            better = simulator.free_mask(rows, cols) & (distance < best_distance)
+            best = numpy.where(better, direction, best)
+            best_distance = numpy.where(better, distance, best_distance)
+
+        return best
+
+class AutopilotPolicy(object):
+    """
+    Steers every game with its own ai.Autopilot.
+    """
+
+    def __init__(self):
+        self.__autopilots = {}
+
+    def __call__(self, simulator):
+        actions = simulator.direction.copy()
+        for game in numpy.flatnonzero(simulator.alive):
+            autopilot = self.__autopilots.get(game)
+            if autopilot is None:
+                seed = int(simulator.rng.integers(2 ** 31))
+                autopilot = Autopilot(simulator.width, simulator.height, seed)
+                self.__autopilots[game] = autopilot
+
+            food = simulator.food[game]
+            food_point = divmod(int(food), simulator.width) if food >= 0 else None
+            direction = autopilot.next_move(simulator.view(game), food_point)
+            actions[game] = DIRECTIONS.index(direction)
+
+        return actions
+
+def simulate(policy, n_games, width, height, max_steps, seed=None, spawn_manager_factory=None):
+    """
+    Runs one batch of games to completion and returns its results. `seed`
+    seeds both the simulator and `random`, for the spawn managers.
+    """
+    random.seed(seed)
+    simulator = BatchSnakeSimulator(n_games, width, height, spawn_manager_factory, seed)
+    simulator.run(policy, max_steps)
+    return simulator.results()
+
+def run_batches(
+    policy, n_batches, n_games, width, height, max_steps, seed=0,
+    spawn_manager_factory=None, max_workers=None
+):
+    """
+    Runs `n_batches` batches of `n_games` games each across a process pool.
+    Every batch gets its own seed derived from `seed`, so the results only
+    depend on the arguments and not on how the batches were scheduled.
+
+    `policy` and `spawn_manager_factory` are sent to the worker processes and
+    so must be picklable: use classes or module-level functions.
+
+    Returns the results of all the games, batch after batch.
+    """
+    if numpy is None:
+        raise ImportError("run_batches requires NumPy.")
+
+    seeds = [
+        int(child.generate_state(1)[0])
+        for child in numpy.random.SeedSequence(seed).spawn(n_batches)
+    ]
+    results = {"score": [], "moves": [], "won": []}
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers) as pool:
+        futures = [
+            pool.submit(simulate, policy, n_games, width, height, max_steps,
+              batch_seed, spawn_manager_factory)
+            for batch_seed in seeds
+        ]
+        for future in futures:
+            for key, values in future.result().items():
+                results[key].extend(values)
+
+    return results
@@ -2,6 +2,7 @@ from components.core import Colors, GameConfig, GameLoop, GameLoopEvents, GameSc
 from components.framework_exceptions import VectorDirectionException
 from components.helpers.grid import QuadraticGrid
 from components.helpers.scheduler import Scheduler
+from . import ai
 from .model import SnakeGameModel
 
 import logging
@@ -25,14 +26,20 @@ class SnakeScreen(GameScreen):
         self.automove_schedule = Scheduler(config.get_config_val("clock_rate"),
           1, self.__automove_snake)
 
+        if config.get_config_val("autopilot"):
+            self.autopilot = ai.Autopilot(grid_size[0], grid_size[1])
+        else:
+            self.autopilot = None
+
     def __automove_snake(self):
-        current_direction = self.game_model.snake.get_orientation()
-        self.game_model.move_snake(current_direction)
+        if self.autopilot:
+            direction = self.autopilot.next_move(self.game_model.snake, self.game_model.food_point)
+        else:
+            direction = self.game_model.snake.get_orientation()
+        self.game_model.move_snake(direction)
 
     def draw_screen(self, window):
-        snake_squares = self.game_model.snake.enumerate_snake_squares()
-
-        for snake_pos in snake_squares:
+        for snake_pos in self.game_model.snake.body:
             color = Colors.DIM_GRAY if snake_pos == self.game_model.snake.head else Colors.EBONY
             snake_pos = QuadraticGrid.make_rect(snake_pos, self.block_width, self.block_height)
             pygame.draw.rect(window, color, snake_pos, 0) 
@@ -94,7 +101,7 @@ class SnakeGameEvents(GameLoopEvents):
             try:
                 self.game_screen.model.move_snake(movement, True)
                 self.debug_queue.log("snake head now at %s" % str(self.game_screen.model.snake.head))
-                self.debug_queue.log(str(self.game_screen.model.snake.enumerate_snake_squares()))
+                self.debug_queue.log(str(list(self.game_screen.model.snake.body)))
                 new_head = self.game_screen.model.snake.head
             except VectorDirectionException:
                 self.debug_queue.log("attempted 180 turn", logging.WARNING)
@@ -3,13 +3,32 @@
 from components.core import GameModel
 from components.framework_exceptions import VectorDirectionException
 from components.helpers.grid import QuadraticGrid
+from components.subscriber_pattern import Publisher
 
 from . import ai
+import collections
 import random
 
-class Snake(object):
+class Snake(Publisher):
+    """
+    The squares of the snake are described by its head and its joints. For
+    quick lookups, the snake also keeps `body`, the list of its squares, and a
+    count of how many times it occupies each square. Both are built from the
+    joints the first time they are needed and then updated as the snake moves
+    and grows.
+
+    Because of this, replace `head` and `joints` instead of mutating them
+    directly; assigning either discards the body and occupancy counts.
+
+    Subscribers are notified with `snake_event` "occupied" or "vacated" and
+    the `square` in question whenever the snake moves onto a square it was
+    not on or leaves a square entirely. Assigning `head` or `joints` notifies
+    them with `snake_event` "reset" instead; they should then read the
+    squares anew.
+    """
     
     def __init__(self):
+        super(Snake, self).__init__()
         self.head = None
         """
         Sorted (row, col) tuples of the snake joints. Notice that joints can
@@ -25,28 +44,174 @@ class Snake(object):
         """
         self.joints = []
 
+    @property
+    def head(self):
+        return self.__head
+
+    @head.setter
+    def head(self, head):
+        self.__head = head
+        self.__reset()
+
+    @property
+    def joints(self):
+        return self.__joints
+
+    @joints.setter
+    def joints(self, joints):
+        self.__joints = collections.deque(joints)
+        self.__reset()
+
+    @property
+    def body(self):
+        """
+        A deque of the squares of the snake, from the head to the tail.
+        """
+        self.__sync()
+        return self.__body
+
+    def __reset(self):
+        self.__body = None
+        self.notify_subscribers(snake_event="reset")
+
+    def __sync(self):
+        if self.__body is None:
+            self.__cons_body()
+
+    def __cons_body(self):
+        body = collections.deque()
+        occupancy = {}
+
+        if self.head is not None:
+            body.append(self.head)
+            c_origin = self.head
+            for c_end in self.joints:
+                c_direction = QuadraticGrid.Movements.compute_direction(c_origin, c_end)
+                square = c_origin
+
+                while square != c_end:
+                    square = (square[0] + c_direction[0], square[1] + c_direction[1])
+                    body.append(square)
+
+                c_origin = c_end
+
+        for square in body:
+            occupancy[square] = occupancy.get(square, 0) + 1
+
+        self.__body = body
+        self.__occupancy = occupancy
+
+    def __occupy(self, square):
+        count = self.__occupancy.get(square, 0)
+        self.__occupancy[square] = count + 1
+        if not count:
+            self.notify_subscribers(snake_event="occupied", square=square)
+
+    def __vacate(self, square):
+        count = self.__occupancy[square] - 1
+        if count:
+            self.__occupancy[square] = count
+        else:
+            del self.__occupancy[square]
+            self.notify_subscribers(snake_event="vacated", square=square)
+
+    # The following keep the body in sync with the joints but only if it has
+    # already been built.
+
+    def __push_head(self, square):
+        if self.__body is not None:
+            self.__body.appendleft(square)
+            self.__occupy(square)
+
+    def __pop_head(self):
+        if self.__body is not None:
+            self.__vacate(self.__body.popleft())
+
+    def __push_tail(self, square):
+        if self.__body is not None:
+            self.__body.append(square)
+            self.__occupy(square)
+
+    def __pop_tail(self):
+        if self.__body is not None:
+            self.__vacate(self.__body.pop())
+
+    def occupies(self, square, include_head=True):
+        """
+        Whether the snake is on the given square. If include_head is False,
+        the head counts only if some other part of the snake is on it too.
+        """
+        self.__sync()
+        count = self.__occupancy.get(square, 0)
+        if not include_head and square == self.head:
+            count -= 1
+        return count > 0
+
     def enumerate_snake_squares(self, include_head=True):
         """
         Returns a set of tuples indicating the squares the snake is occupying.
         This does not take into account the grid in which the snake is moving.
         """
-        snake_squares = set()
-        c_origin = self.head
-        if include_head:
-            snake_squares.add(self.head)
+        self.__sync()
+        snake_squares = set(self.__occupancy)
+        if not include_head and not self.occupies(self.head, False):
+            snake_squares.discard(self.head)
+
+        return snake_squares
+
+    def advance(self, direction):
+        """
+        Moves the head one square towards `direction`, leaving a joint where
+        it was. The tail stays put; see `retract_tail`.
+        """
+        self.__joints.appendleft(self.__head)
+        self.__head = (self.__head[0] + direction[0], self.__head[1] + direction[1])
+        self.__push_head(self.__head)
 
-        for c_end in self.joints:
-            c_direction = QuadraticGrid.Movements.compute_direction(c_origin, c_end)
-            square = (c_origin[0] + c_direction[0], c_origin[1] + c_direction[1])
-            snake_squares.add(square)
+    def retreat(self, direction, last_tail):
+        """
+        Undoes the last `advance` and `retract_tail`: the head moves back
+        towards `direction`, onto the joint `advance` left, and the tail goes
+        back to `last_tail`.
+        """
+        self.__pop_head()
+        self.__head = (self.__head[0] + direction[0], self.__head[1] + direction[1])
+        if self.__joints[0] == self.__head:
+            self.__joints.popleft()
+
+        # Move the tail joint back if `retract_tail` only moved it, or bring
+        # back the one it dropped.
+        if len(self.__joints) == 1:
+            towards = self.__head
+        else:
+            towards = self.__joints[-2]
+        tail_direction = QuadraticGrid.Movements.compute_direction(last_tail, self.__joints[-1])
+        if tail_direction == QuadraticGrid.Movements.compute_direction(self.__joints[-1], towards):
+            self.__joints[-1] = last_tail
+        else:
+            self.__joints.append(last_tail)
+        self.__push_tail(last_tail)
 
-            while square != c_end:
-                square = (square[0] + c_direction[0], square[1] + c_direction[1])
-                snake_squares.add(square)
+    def retract_tail(self):
+        """
+        Moves the tail one square towards the head.
+        """
+        if len(self.__joints) == 1:
+            towards = self.__head
+        else:
+            towards = self.__joints[-2]
 
-            c_origin = c_end
+        snake_tail_vector = QuadraticGrid.Movements.compute_direction(
+          self.__joints[-1], towards
+        )
+        self.__joints[-1] = (self.__joints[-1][0] + snake_tail_vector[0],
+          self.__joints[-1][1] + snake_tail_vector[1])
+        self.__pop_tail()
+        self.__drop_empty_tail_joint()
 
-        return snake_squares
+    def __drop_empty_tail_joint(self):
+        if len(self.__joints) > 1 and self.__joints[-1] == self.__joints[-2]:
+            self.__joints.pop()
 
     def grow(self):
         current_tail = None
@@ -59,6 +224,7 @@ class Snake(object):
         new_tail_location = (self.joints[-1][0] + direction[0],
           self.joints[-1][1] + direction[1])
         self.joints[-1] = new_tail_location
+        self.__push_tail(new_tail_location)
     
     def get_orientation(self):
         """
@@ -84,7 +250,8 @@ class SnakeGameModel(GameModel):
         self.last_move_reversible = False
         self.last_tail = None
         self.endgame = False
-        self.food_spawn_manager = ai.SpawnManagerIgnoramus(width, height)
+        self.board_full = False
+        self.food_spawn_manager = ai.FreeCellSpawnManager(width, height)
 
     def is_endgame(self):
         return self.endgame
@@ -101,7 +268,7 @@ class SnakeGameModel(GameModel):
         row = int(self.height / 2)
         col = int(self.width / 2)
         self.snake.head = (row, col)
-        self.snake_joints.append((row, col - SnakeGameModel.DEFAULT_SNAKE_SIZE))
+        self.snake.joints = [(row, col - SnakeGameModel.DEFAULT_SNAKE_SIZE)]
         self.__generate_food_point()
 
     def __generate_food_point(self):
@@ -109,6 +276,7 @@ class SnakeGameModel(GameModel):
         Assumes that the snake is already present and initialized.
         """
         self.food_point = self.food_spawn_manager.get_spawn(self.snake)
+        self.board_full = self.food_point is None
 
     def move_snake(self, direction, reversible=False):
         if self.endgame:
@@ -128,40 +296,35 @@ class SnakeGameModel(GameModel):
         if movector == inverse_direction and not self.last_move_reversible:
             raise VectorDirectionException("Impossible to reverse last movement.")
 
-        if movector == inverse_direction and self.last_move_reversible:
-            self.snake.joints.append(self.last_tail)
-
-        if movector != inverse_direction:
-            self.snake_joints.insert(0, self.snake_head)
-
-        self.snake.head = (self.snake_head[0] + movector[0], self.snake_head[1] + movector[1])
+        if movector == inverse_direction:
+            self.snake.retreat(movector, self.last_tail)
+        else:
+            self.snake.advance(movector)
 
-        if self.snake.head == self.food_point:
+        ate_food = self.snake.head == self.food_point
+        if ate_food:
             self.snake.grow()
-            self.__generate_food_point()
 
         self.last_tail = self.snake_joints[-1]
 
         if movector != inverse_direction:
-            snake_tail_vector = QuadraticGrid.Movements.compute_direction(
-              self.snake_joints[-1], self.snake_joints[-2]
-            )
+            self.snake.retract_tail()
 
-            self.snake_joints[-1] = (self.snake_joints[-1][0] + snake_tail_vector[0],
-              self.snake_joints[-1][1] + snake_tail_vector[1])
-
-        if self.snake_joints[-1] == self.snake_joints[-2]:
-            self.snake_joints.pop()
+        # Only now that the tail has moved do we know which squares are free.
+        if ate_food:
+            self.__generate_food_point()
 
-        self.last_move_reversible = reversible
-        self.endgame = self.__collides_with_walls() or self.__collides_with_self()
+        # There is no last tail to go back to after undoing a move.
+        self.last_move_reversible = reversible and movector != inverse_direction
+        self.endgame = (self.__collides_with_walls() or self.__collides_with_self() or
+          self.board_full)
 
     def __collides_with_walls(self):
         return (self.snake.head[0] >= self.height or self.snake.head[1] >= self.width or
           self.snake.head[0] < 0 or self.snake.head[1] < 0)
     
     def __collides_with_self(self):
-        return self.snake_head in self.snake.enumerate_snake_squares(False)
+        return self.snake.occupies(self.snake_head, False)
 
     def render(self, **kwargs):
         pass
@@ -1,4 +1,4 @@
-from distutils.core import setup
+from setuptools import setup
 from components import __version__
 
 import os
@@ -20,6 +20,8 @@ setup(
     packages=["components", "components.helpers"],
     data_files=[("pygame-fonts", get_font_paths())],
     install_requires=["pygame"],
+    # For ArrayGrid, ArrayShape and the batch_collision module.
+    extras_require={"numpy": ["numpy>=1.17"]},
     license="MIT",
     description="PyGame Framework"
 )
@@ -1,5 +1,6 @@
-from components.core import GameLoop
-from demo.color_blocks.color_blocks_game import main
+from components.core import GameConfig, GameLoop
+from demo.color_blocks.color_blocks_game import ColorBlocksEvents, ColorBlocksScreen, main
+from mock import patch
 
 import pygame
 import sched
@@ -16,3 +17,52 @@ class ColorBlocksGameTests(unittest.TestCase):
         self.scheduler.enter(1, 1, loop_events.stop_main, (pygame.QUIT,))
         self.scheduler.run()
         GameLoop(loop_events).go()
+
+    def test_click_redraws_changed_cells(self):
+        loop_events = main()
+        screen = loop_events.game_screen
+        model = screen.game_model
+        window = pygame.Surface(screen.screen_dimensions)
+        screen.setup()
+        screen.consume_dirty_rects()
+
+        # Give the bottom left block a neighbor of the same color.
+        model.grid[-1][1] = model.grid[-1][0]
+        before = [list(row) for row in model.grid]
+        # The center of the bottom left block.
+        block_width, block_height = screen.block_width, screen.block_height
+        pos = (block_width // 2, screen.screen_dimensions[1] - block_height // 2)
+        with patch("demo.color_blocks.color_blocks_game.pygame.mouse.get_pos", return_value=pos):
+            loop_events._ColorBlocksEvents__mouse_click(None)
+
+        changed = set(
+            (i, j) for i, row in enumerate(before) for j, block in enumerate(row)
+            if model.grid[i][j] != block
+        )
+        self.assertTrue(changed)
+        self.assertEqual(changed, set(screen.changed_cells))
+        self.assertTrue(screen.is_dirty)
+
+        with patch.object(screen.grid_model, "draw") as draw:
+            screen.draw_screen(window)
+        self.assertEqual(changed, set(draw.call_args[1]["cells"]))
+        self.assertIsNone(screen.changed_cells)
+
+    def run_frames(self, dirty_rendering):
+        config = GameConfig(
+            clock_rate=50, window_size=(500, 600), headless=True,
+            dirty_rendering=dirty_rendering
+        )
+        loop_events = ColorBlocksEvents(ColorBlocksScreen(config, [10, 10]))
+        loop_events.debug_queue.log("spam")
+        with patch.object(loop_events.game_screen.grid_model, "draw") as draw:
+            with patch.object(loop_events.debug_queue, "display_logs") as display_logs:
+                GameLoop(loop_events, frame_limit=3).go()
+        return draw.call_count, display_logs.call_count
+
+    def test_redraws_every_frame(self):
+        self.assertEqual((3, 3), self.run_frames(False))
+
+    def test_dirty_rendering_skips_clean_frames(self):
+        # Only the first frame, marked dirty by the setup, draws the board.
+        self.assertEqual((1, 3), self.run_frames(True))
@@ -1,11 +1,20 @@
 #! usr/bin/env python
 
-from components.helpers.grid import DimensionException
+from components.helpers.grid import AdjacencyIndex, DimensionException
 
+from demo.color_blocks import gravity
 from demo.color_blocks.color_blocks_model import ColorBlocksModel
 
+from mock import patch
+
+import random
 import unittest
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 class color_blocks_model_tests(unittest.TestCase):
     
     def setUp(self):
@@ -57,6 +66,20 @@ class color_blocks_model_tests(unittest.TestCase):
         self.assertEqual(points, 4)
         self.assertEqual(self.color_game.grid, game_grid)
     
+    def test_toggle_unindexed_grid(self):
+        random.seed(5)
+        indexed = ColorBlocksModel(12, 9)
+        with patch.object(AdjacencyIndex, "MAX_CELLS", 0):
+            unindexed = ColorBlocksModel(12, 9)
+            self.assertIsNone(unindexed.quadratic_grid.adjacency)
+        self.assertIsNotNone(indexed.quadratic_grid.adjacency)
+
+        for row in range(9):
+            unindexed.grid[row][:] = indexed.grid[row]
+        for row, col in ((0, 0), (4, 6), (8, 11), (8, 0)):
+            self.assertEqual(indexed.toggle(row, col), unindexed.toggle(row, col))
+            self.assertEqual(indexed.grid, unindexed.grid)
+    
     def __collapse(self, *untake_ranges):
         """
         Auto script for collapse unit tests that will actually collapse.
@@ -173,6 +196,76 @@ class color_blocks_model_tests(unittest.TestCase):
         
         self.assertEqual(test_board, self.color_game.grid)
 
+class gravity_tests(unittest.TestCase):
+
+    def __random_board(self, width, height, density):
+        board = []
+        for row in range(height):
+            board.append([
+                random.choice("01234") if random.random() < density else ColorBlocksModel.UNTAKEN
+                for col in range(width)
+            ])
+        return board
+
+    def test_fall_lists(self):
+        board = [
+            ["1", ".", "2"],
+            [".", "3", "."],
+            ["4", ".", "."]
+        ]
+        gravity.fall_lists(board, ColorBlocksModel.UNTAKEN)
+        self.assertEqual(board, [
+            [".", ".", "."],
+            ["1", ".", "."],
+            ["4", "3", "2"]
+        ])
+
+    def test_collapse_lists(self):
+        board = [
+            [".", "1", ".", "2"],
+            [".", "3", ".", "4"]
+        ]
+        gravity.collapse_lists(board, ColorBlocksModel.UNTAKEN)
+        self.assertEqual(board, [
+            ["1", "2", ".", "."],
+            ["3", "4", ".", "."]
+        ])
+
+    @unittest.skipIf(numpy is None, "NumPy is not installed")
+    def test_array_matches_lists(self):
+        random.seed(9)
+        for density in (0.0, 0.3, 0.7, 1.0):
+            board = self.__random_board(12, 7, density)
+            array_board = numpy.array(board, dtype="U1")
+
+            gravity.fall_lists(board, ColorBlocksModel.UNTAKEN)
+            gravity.fall_array(array_board, ColorBlocksModel.UNTAKEN)
+            self.assertEqual(board, array_board.tolist())
+
+            gravity.collapse_lists(board, ColorBlocksModel.UNTAKEN)
+            gravity.collapse_array(array_board, ColorBlocksModel.UNTAKEN)
+            self.assertEqual(board, array_board.tolist())
+
+    @unittest.skipIf(numpy is None, "NumPy is not installed")
+    def test_array_backed_model(self):
+        random.seed(3)
+        list_model = ColorBlocksModel(9, 9)
+        array_model = ColorBlocksModel(9, 9, array_backed=True)
+        for row in range(9):
+            for col in range(9):
+                array_model.grid[row][col] = list_model.grid[row][col]
+
+        for row, col in ((8, 0), (8, 4), (8, 8), (8, 2)):
+            self.assertEqual(list_model.toggle(row, col), array_model.toggle(row, col))
+            list_model.falldown()
+            array_model.falldown()
+            list_model.collapse()
+            array_model.collapse()
+            self.assertEqual(list_model.grid, array_model.grid.tolist())
+            self.assertEqual(
+                list_model.regions.clusters(), array_model.regions.clusters()
+            )
+
 if __name__ == "__main__":
     tests = unittest.TestLoader().loadTestsFromTestCase(color_blocks_model_tests)
     unittest.TextTestRunner(verbosity=2).run(tests)
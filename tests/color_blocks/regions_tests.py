@@ -0,0 +1,61 @@
+from demo.color_blocks.color_blocks_model import ColorBlocksModel
+from demo.color_blocks.regions import ColorRegions
+
+import unittest
+
+class ColorRegionsTests(unittest.TestCase):
+
+    def setUp(self):
+        self.grid = [
+            list("0011"),
+            list("0.21"),
+            list("2231"),
+            list("0323"),
+        ]
+
+    def test_hv_regions(self):
+        regions = ColorRegions(self.grid, True, False, ".")
+        self.assertEqual(3, regions.cluster_size(0, 0))
+        self.assertEqual(3, regions.cluster_size(1, 0))
+        self.assertEqual(4, regions.cluster_size(0, 3))
+        self.assertEqual(2, regions.cluster_size(2, 0))
+        self.assertEqual(1, regions.cluster_size(1, 2))
+        self.assertEqual(0, regions.cluster_size(1, 1))
+        self.assertEqual(regions.label(0, 2), regions.label(2, 3))
+        self.assertNotEqual(regions.label(0, 0), regions.label(0, 2))
+        self.assertIsNone(regions.label(1, 1))
+        self.assertEqual(set([(0, 0), (0, 1), (1, 0)]), set(regions.cluster_cells(0, 1)))
+        self.assertEqual([], regions.cluster_cells(1, 1))
+        self.assertEqual(15, sum(len(cluster) for cluster in regions.clusters()))
+
+    def test_diag_regions(self):
+        regions = ColorRegions(self.grid, True, True, ".")
+        # (1, 2) now touches (2, 1), which touches (3, 2).
+        self.assertEqual(4, regions.cluster_size(1, 2))
+        self.assertEqual(4, regions.cluster_size(3, 2))
+        self.assertEqual(3, regions.cluster_size(3, 1))
+        # Anti-diagonal links count too.
+        self.assertEqual(regions.label(3, 1), regions.label(2, 2))
+
+class ModelRegionsTests(unittest.TestCase):
+
+    def setUp(self):
+        self.model = ColorBlocksModel(4, 4)
+        for row in range(4):
+            for col in range(4):
+                self.model.grid[row][col] = "1"
+        self.model.grid[0][0] = "0"
+        self.model.invalidate_regions()
+
+    def test_cluster_size(self):
+        self.assertEqual(1, self.model.cluster_size(0, 0))
+        self.assertEqual(15, self.model.cluster_size(3, 3))
+
+    def test_moves_invalidate(self):
+        regions = self.model.regions
+        self.assertTrue(regions is self.model.regions)
+        self.assertEqual(15, self.model.toggle(3, 3))
+        self.assertEqual(0, self.model.cluster_size(3, 3))
+        self.model.falldown()
+        self.assertEqual(1, self.model.cluster_size(3, 0))
+        self.assertEqual(0, self.model.cluster_size(0, 0))
@@ -0,0 +1,159 @@
+#! usr/bin/env python
+
+from demo.color_blocks.color_blocks_model import ColorBlocksModel
+from demo.color_blocks.solver import Board, ColorBlocksSolver
+
+import random
+import unittest
+
+class BoardTests(unittest.TestCase):
+
+    def test_round_trip(self):
+        grid = [
+            ["1", ".", "3"],
+            ["1", "2", "3"]
+        ]
+        board = Board.from_grid(grid)
+        self.assertEqual(board.cells, bytes([1, 0, 2, 1, 3, 2]))
+        self.assertEqual(board.block_count, 5)
+        self.assertEqual(board.to_grid(), grid)
+
+    def test_equality(self):
+        grid = [["1", "2", "."]] * 3
+        self.assertEqual(Board.from_grid(grid), Board.from_grid(grid))
+        self.assertEqual(hash(Board.from_grid(grid)), hash(Board.from_grid(grid)))
+        self.assertNotEqual(Board.from_grid(grid), Board.from_grid([["1", "1", "."]] * 3))
+
+class ColorBlocksSolverTests(unittest.TestCase):
+
+    def setUp(self):
+        self.grid = [
+            ["1", "2", "2"],
+            ["2", "1", "1"],
+            ["1", "1", "2"]
+        ]
+        self.board = Board.from_grid(self.grid)
+
+    def test_clusters(self):
+        hv_solver = ColorBlocksSolver(diag_neighbors=False)
+        clusters = sorted(sorted(cluster) for cluster in hv_solver.clusters(self.board))
+        self.assertEqual(clusters, [[0], [1, 2], [3], [4, 5, 6, 7], [8]])
+
+        diag_solver = ColorBlocksSolver()
+        clusters = sorted(sorted(cluster) for cluster in diag_solver.clusters(self.board))
+        self.assertEqual(clusters, [[0, 4, 5, 6, 7], [1, 2, 3], [8]])
+
+    def test_moves_min_score(self):
+        solver = ColorBlocksSolver(diag_neighbors=False, min_score=2)
+        moves = [move for move, cluster in solver.moves(self.board)]
+        self.assertEqual(moves, [(0, 1), (1, 1)])
+
+    def test_play(self):
+        solver = ColorBlocksSolver(diag_neighbors=False)
+        board, points = solver.play(self.board, (1, 1))
+        self.assertEqual(points, 4)
+        self.assertEqual(board.to_grid(), [
+            [".", ".", "."],
+            ["1", ".", "2"],
+            ["2", "2", "2"]
+        ])
+
+        board, points = solver.play(board, (2, 1))
+        self.assertEqual(points, 4)
+        self.assertEqual(board.to_grid(), [
+            [".", ".", "."],
+            [".", ".", "."],
+            ["1", ".", "."]
+        ])
+
+    def test_play_collapse(self):
+        solver = ColorBlocksSolver(diag_neighbors=False)
+        board = Board.from_grid([
+            ["1", "2", "3"],
+            ["1", "2", "3"],
+            ["1", "2", "3"]
+        ])
+        board, points = solver.play(board, (0, 1))
+        self.assertEqual(points, 3)
+        self.assertEqual(board.to_grid(), [["1", "3", "."]] * 3)
+
+    def test_play_below_min_score(self):
+        solver = ColorBlocksSolver(diag_neighbors=False, min_score=2)
+        board, points = solver.play(self.board, (0, 0))
+        self.assertEqual(points, 0)
+        self.assertEqual(board, self.board)
+
+    def test_play_matches_model(self):
+        random.seed(10)
+        model = ColorBlocksModel(8, 6, 2)
+        solver = ColorBlocksSolver.for_model(model)
+        board = Board.from_model(model)
+
+        move = solver.best_move(board)
+        while move is not None:
+            board, points = solver.play(board, move)
+            self.assertEqual(model.toggle(*move), points)
+            model.falldown()
+            model.collapse()
+            self.assertEqual(Board.from_model(model).to_grid(), board.to_grid())
+            move = solver.best_move(board)
+
+    def test_solve(self):
+        solver = ColorBlocksSolver(diag_neighbors=False)
+        path, score = solver.solve(self.board)
+        self.assertEqual(score, 9)
+
+        board = self.board
+        for move in path:
+            board, points = solver.play(board, move)
+        self.assertEqual(board.block_count, 0)
+
+    def test_solve_min_score(self):
+        # The 2s can only be removed once the 1s between them are gone.
+        board = Board.from_grid([
+            ["2", "1", "1", "2"],
+            ["1", "1", "1", "1"],
+            ["2", "1", "1", "2"]
+        ])
+        solver = ColorBlocksSolver(diag_neighbors=False, min_score=2)
+        path, score = solver.solve(board)
+        self.assertEqual(score, 12)
+
+    def test_time_budget(self):
+        random.seed(4)
+        model = ColorBlocksModel(12, 12, 2)
+        solver = ColorBlocksSolver.for_model(model, beam_width=50, time_budget=0)
+        path, score = solver.solve(Board.from_model(model))
+
+        board = Board.from_model(model)
+        for move in path:
+            board, points = solver.play(board, move)
+        self.assertEqual(solver.moves(board), [])
+
+    def test_best_move_no_time(self):
+        random.seed(10)
+        model = ColorBlocksModel(12, 12, 2)
+        solver = ColorBlocksSolver.for_model(model, beam_width=50, time_budget=0)
+        board = Board.from_model(model)
+        self.assertGreater(len(solver.moves(board)), 1)
+
+        move = solver.best_move(board)
+        self.assertIn(move, [move for move, cluster in solver.moves(board)])
+
+    def test_monte_carlo(self):
+        board = Board.from_grid([
+            ["2", "1", "1", "2"],
+            ["1", "1", "1", "1"],
+            ["2", "1", "1", "2"]
+        ])
+        solver = ColorBlocksSolver(diag_neighbors=False, min_score=2, rollouts=5, seed=1)
+        checkered = Board.from_grid([
+            ["1", "2", "1"],
+            ["2", "1", "2"],
+            ["1", "2", "1"]
+        ])
+        self.assertIsNone(solver.best_move(checkered))
+        self.assertIn(solver.best_move(board), [move for move, cluster in solver.moves(board)])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+from components.aabb_tree import AABBTree
+from components.broadphase import bounds_overlap
+from components.shapes import Point, PointShape
+
+import math
+import pygame
+import random
+import unittest
+
+class AABBTreeTests(unittest.TestCase):
+
+    def setUp(self):
+        random.seed(17)
+        # Mix small and huge objects.
+        self.rects = [
+            pygame.Rect(random.randint(0, 500), random.randint(0, 500),
+              random.choice((2, 5, 200)), random.choice((3, 8, 150)))
+            for _ in range(200)
+        ]
+        self.tree = AABBTree(margin=4)
+        for rect in self.rects:
+            self.tree.insert(rect)
+
+    def __ids(self, objs):
+        return sorted(id(obj) for obj in objs)
+
+    def __bounds(self, rect):
+        return (rect.left, rect.top, rect.right, rect.bottom)
+
+    def test_balanced(self):
+        self.assertEqual(200, len(self.tree))
+        # An AVL tree of n leaves is at most about 1.44 log2(n) high.
+        self.assertLessEqual(self.tree.height, 1.45 * math.log(2 * len(self.tree), 2))
+
+    def test_query(self):
+        for _ in range(50):
+            x, y = random.randint(0, 600), random.randint(0, 600)
+            region = (x, y, x + random.randint(1, 80), y + random.randint(1, 80))
+            expected = [rect for rect in self.rects if bounds_overlap(self.__bounds(rect), region)]
+            self.assertEqual(self.__ids(expected), self.__ids(self.tree.query(region)))
+
+    def test_query_point(self):
+        for _ in range(50):
+            x, y = random.randint(0, 600), random.randint(0, 600)
+            expected = [
+                rect for rect in self.rects
+                if rect.left <= x <= rect.right and rect.top <= y <= rect.bottom
+            ]
+            self.assertEqual(self.__ids(expected), self.__ids(self.tree.query_point(x, y)))
+
+    def test_move(self):
+        rect = self.rects[0]
+        rect.move_ip(3, -2)
+        self.assertFalse(self.tree.move(rect))
+        self.assertTrue(rect in self.tree.query_point(rect.right, rect.top))
+
+        for rect in self.rects[::2]:
+            rect.move_ip(random.randint(-100, 100), random.randint(-100, 100))
+            self.tree.move(rect)
+
+        self.test_query_point()
+        self.test_balanced()
+
+    def test_remove(self):
+        for rect in self.rects[:150]:
+            self.tree.remove(rect)
+        self.assertEqual(50, len(self.tree))
+        self.assertFalse(self.rects[0] in self.tree)
+        self.rects = self.rects[150:]
+        self.test_query()
+
+        for rect in self.rects:
+            self.tree.remove(rect)
+        self.assertEqual(0, self.tree.height)
+        self.assertEqual([], self.tree.query((0, 0, 1000, 1000)))
+
+    def test_ray_cast(self):
+        tree = AABBTree()
+        near = pygame.Rect(10, -5, 10, 10)
+        far = pygame.Rect(50, -5, 10, 10)
+        above = pygame.Rect(30, -40, 10, 10)
+        for rect in (far, near, above):
+            tree.insert(rect)
+
+        hits = tree.ray_cast((0, 0), (1, 0))
+        self.assertEqual([(10, near), (50, far)], hits)
+        self.assertEqual([(10, near)], tree.ray_cast((0, 0), (5, 0), max_distance=30))
+        self.assertEqual([], tree.ray_cast((0, 0), (-1, 0)))
+
+        hits = tree.ray_cast((35, 0), (0, -1))
+        self.assertEqual([(30, above)], hits)
+        self.assertRaises(ValueError, tree.ray_cast, (0, 0), (0, 0))
+
+    def test_point_shapes(self):
+        tree = AABBTree()
+        shape = PointShape([Point(0, 0), Point(10, 0), Point(5, 8)])
+        tree.insert(shape)
+        self.assertEqual([shape], tree.query_point(5, 4))
+
+        shape.translate(100, 100)
+        self.assertTrue(tree.move(shape))
+        self.assertEqual([], tree.query_point(5, 4))
+        self.assertEqual([shape], tree.query_point(105, 104))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,147 @@
+from components.shapes import CollisionBox, FrozenPoint, Point, PointShape
+from mock import patch
+
+import math
+import pygame
+import unittest
+
+try:
+    import numpy
+    from components import array_shapes
+    from components.array_shapes import ArrayShape, PointArray
+except ImportError:
+    numpy = None
+
+@unittest.skipIf(numpy is None, "NumPy is not installed")
+class ArrayShapeTests(unittest.TestCase):
+
+    def setUp(self):
+        self.shape = ArrayShape([Point(0, 0), Point(4, 0), Point(4, 2), Point(0, 2)])
+
+    def assert_box(self, expected, shape):
+        numpy.testing.assert_allclose(expected, shape.bounds, atol=1e-9)
+        points = shape.points
+        numpy.testing.assert_allclose(
+            expected, (points[:, 0].min(), points[:, 1].min(), points[:, 0].max(), points[:, 1].max()),
+            atol=1e-9
+        )
+
+    def test_construction(self):
+        self.assertEqual(4, len(self.shape))
+        self.assertEqual(self.shape.points.shape, (4, 2))
+        same = ArrayShape([(0, 0), (4, 0), (4, 2), (0, 2)])
+        self.assertTrue(numpy.array_equal(self.shape.points, same.points))
+
+        point_shape = PointShape([Point(1, 1), Point(3, 5), Point(2, 7)])
+        from_points = ArrayShape.from_point_shape(point_shape)
+        self.assertEqual(point_shape.collision_box, from_points.collision_box)
+        self.assertEqual([(1, 1), (3, 5), (2, 7)], [(p.x, p.y) for p in from_points.point_list])
+
+        empty = ArrayShape()
+        self.assertIsNone(empty.bounds)
+        self.assertEqual(CollisionBox(Point(-1, -1), Point(-1, -1)), empty.collision_box)
+
+    def test_translate(self):
+        self.shape.translate(3, -1)
+        self.assertEqual([3, -1], self.shape.points[0].tolist())
+        self.assert_box((3, -1, 7, 1), self.shape)
+
+    def test_scale(self):
+        self.shape.scale(2, 3)
+        self.assert_box((0, 0, 8, 6), self.shape)
+
+        self.shape.scale(-1, 1, origin=(4, 0))
+        self.assert_box((0, 0, 8, 6), self.shape)
+        self.assertEqual([8, 0], self.shape.points[0].tolist())
+
+        self.shape.invariant_scale(0.5)
+        self.assert_box((0, 0, 4, 3), self.shape)
+
+    def test_rotate(self):
+        self.shape.rotate(math.pi / 2)
+        self.assert_box((-2, 0, 0, 4), self.shape)
+
+        self.shape.rotate(math.pi / 4, origin=(-1, 2))
+        numpy.testing.assert_allclose(self.shape.points.mean(axis=0), (-1, 2), atol=1e-9)
+        self.assert_box(self.shape.bounds, self.shape)
+
+    def test_compose(self):
+        transform = array_shapes.compose(
+            array_shapes.translation(-2, -1),
+            array_shapes.rotation(math.pi),
+            array_shapes.scaling(2),
+            array_shapes.translation(2, 1)
+        )
+        self.shape.transform(transform)
+        numpy.testing.assert_allclose(
+            self.shape.points, [(6, 3), (-2, 3), (-2, -1), (6, -1)], atol=1e-9
+        )
+        self.assert_box((-2, -1, 6, 3), self.shape)
+
+    def test_transform_in_place(self):
+        points = self.shape.points
+        self.shape.rotate(0.3)
+        self.shape.translate(1, 1)
+        self.assertTrue(points is self.shape.points)
+
+    def test_add_points(self):
+        self.shape.add_points([Point(10, 10)])
+        self.assertEqual(5, len(self.shape))
+        self.assert_box((0, 0, 10, 10), self.shape)
+
+    @patch("components.array_shapes.pygame.draw.lines", autospec=True)
+    def test_draw(self, draw_lines):
+        window = pygame.Surface((10, 10))
+        self.shape.draw(window)
+        draw_lines.assert_called_once_with(
+            window, self.shape.line_color, True, [[0, 0], [4, 0], [4, 2], [0, 2]]
+        )
+
+        ArrayShape([(1, 1)]).draw(window)
+        self.assertEqual(1, draw_lines.call_count)
+
+@unittest.skipIf(numpy is None, "NumPy is not installed")
+class PointArrayTests(unittest.TestCase):
+
+    def setUp(self):
+        self.points = [Point(0, 0), Point(3, 4), Point(-6, 8)]
+        self.array = PointArray(self.points)
+
+    def test_access(self):
+        self.assertEqual(3, len(self.array))
+        self.assertEqual(FrozenPoint(3, 4), self.array[1])
+        self.assertTrue(isinstance(self.array[1], FrozenPoint))
+        self.assertEqual(self.points, self.array.to_points())
+        self.assertEqual(self.points, list(self.array))
+        self.assertEqual([3, -6], self.array[1:].xs.tolist())
+        self.assertEqual([4], self.array[self.array.xs > 0].ys.tolist())
+        self.assertEqual(self.array.array.tolist(), PointArray(self.array.array).array.tolist())
+
+    def test_distance(self):
+        origin = Point(0, 0)
+        self.assertEqual([0, 5, 10], self.array.distance(origin).tolist())
+        self.assertEqual([0, 25, 100], self.array.distance((0, 0), False).tolist())
+        self.assertEqual(
+            [p.distance(Point(1, 1)) for p in self.points],
+            self.array.distance(Point(1, 1)).tolist()
+        )
+        self.assertEqual(1, self.array.nearest(Point(2, 2)))
+        self.assertIsNone(PointArray().nearest(origin))
+
+        others = PointArray([Point(0, 0), Point(0, 4)])
+        numpy.testing.assert_allclose(
+            self.array.pairwise_distances(others),
+            [[0, 4], [5, 3], [10, math.hypot(6, 4)]]
+        )
+
+    def test_transform(self):
+        self.array.translate(1, 2)
+        self.assertEqual([[1, 2], [4, 6], [-5, 10]], self.array.array.tolist())
+        self.array.transform(array_shapes.scaling(2, origin=(1, 2)))
+        self.assertEqual([[1, 2], [7, 10], [-11, 18]], self.array.array.tolist())
+
+        shape = ArrayShape(self.array)
+        self.assertEqual((-11, 2, 7, 18), shape.bounds)
+
+if __name__ == "__main__":
+    unittest.main()
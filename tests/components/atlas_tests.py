@@ -0,0 +1,147 @@
+from components.atlas import SkylinePacker, TextureAtlas
+from components.image import Image
+from components.shapes import Point
+from components.sprite import PyRoSprite
+
+import os
+import pygame
+import random
+import shutil
+import tempfile
+import unittest
+
+TILES = os.path.join(
+    os.path.dirname(__file__), os.pardir, os.pardir, "sample_sprites", "tiles", "png"
+)
+
+def solid(size, color):
+    surface = pygame.Surface(size, pygame.SRCALPHA)
+    surface.fill(color)
+    return surface
+
+class SkylinePackerTests(unittest.TestCase):
+
+    def test_no_overlaps(self):
+        random.seed(25)
+        packer = SkylinePacker(64, 64)
+        placed = []
+        for _ in range(200):
+            size = (random.randint(1, 12), random.randint(1, 12))
+            spot = packer.pack(*size)
+            if spot is not None:
+                placed.append(pygame.Rect(spot, size))
+
+        self.assertGreater(len(placed), 20)
+        for idx, rect in enumerate(placed):
+            self.assertTrue(pygame.Rect(0, 0, 64, 64).contains(rect))
+            self.assertEqual(-1, rect.collidelist(placed[idx + 1:]))
+        self.assertEqual(max(rect.bottom for rect in placed), packer.used_height)
+
+    def test_bottom_left(self):
+        packer = SkylinePacker(10, 10)
+        self.assertEqual((0, 0), packer.pack(4, 6))
+        self.assertEqual((4, 0), packer.pack(6, 2))
+        # Lower on top of the short one than on top of the tall one.
+        self.assertEqual((4, 2), packer.pack(3, 3))
+        self.assertEqual((7, 2), packer.pack(3, 3))
+        self.assertEqual((0, 6), packer.pack(10, 4))
+        self.assertIsNone(packer.pack(1, 1))
+
+class TextureAtlasTests(unittest.TestCase):
+
+    def setUp(self):
+        self.surfaces = {
+            "red": solid((5, 3), (255, 0, 0, 255)),
+            "green": solid((2, 7), (0, 255, 0, 255)),
+            "blue": solid((4, 4), (0, 0, 255, 128)),
+        }
+
+    def test_regions(self):
+        atlas = TextureAtlas.from_surfaces(self.surfaces, width=16, padding=1)
+        self.assertEqual(3, len(atlas))
+        self.assertEqual((16, 8), atlas.surface.get_size())
+        for name, surface in self.surfaces.items():
+            region = atlas[name]
+            self.assertEqual(surface.get_size(), region.get_size())
+            self.assertTrue(region.get_parent() is atlas.surface)
+            self.assertEqual(surface.get_at((0, 0)), region.get_at((0, 0)))
+            self.assertTrue(atlas[name] is region)
+
+    def test_full(self):
+        atlas = TextureAtlas(8, 8)
+        atlas.add("red", self.surfaces["red"])
+        self.assertRaises(ValueError, atlas.add, "red", self.surfaces["blue"])
+        self.assertRaises(ValueError, atlas.add, "big", solid((9, 2), (0, 0, 0, 255)))
+
+    def test_save_load(self):
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, "atlas.png")
+            atlas = TextureAtlas.from_surfaces(self.surfaces, width=16)
+            atlas.save(path)
+            loaded = TextureAtlas.load(path)
+        finally:
+            shutil.rmtree(directory)
+
+        self.assertEqual(atlas.regions, loaded.regions)
+        self.assertEqual(atlas.padding, loaded.padding)
+        for name in self.surfaces:
+            self.assertEqual(atlas[name].get_at((1, 1)), loaded[name].get_at((1, 1)))
+
+    def assert_no_overlaps(self, atlas):
+        rects = list(atlas.regions.values())
+        for idx, rect in enumerate(rects):
+            self.assertTrue(atlas.surface.get_rect().contains(rect))
+            self.assertEqual(-1, rect.collidelist(rects[idx + 1:]))
+
+    def test_add_after_trim_and_load(self):
+        atlas = TextureAtlas.from_surfaces(self.surfaces, width=16, height=32)
+        trimmed = atlas.trimmed()
+        self.assertRaises(ValueError, trimmed.add, "tall", solid((16, 2), (0, 0, 0, 255)))
+        trimmed.add("small", solid((2, 2), (9, 9, 9, 255)))
+        self.assert_no_overlaps(trimmed)
+
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, "atlas.png")
+            atlas = TextureAtlas(16, 32)
+            for name, surface in self.surfaces.items():
+                atlas.add(name, surface)
+            atlas.save(path)
+            loaded = TextureAtlas.load(path)
+        finally:
+            shutil.rmtree(directory)
+
+        loaded.add("wide", solid((15, 3), (9, 9, 9, 255)))
+        loaded.add("small", solid((2, 2), (9, 9, 9, 255)))
+        self.assert_no_overlaps(loaded)
+        self.assertEqual((0, 0, 255, 128), tuple(loaded["blue"].get_at((0, 0))))
+
+    def test_sample_tiles(self):
+        atlas = TextureAtlas.from_directory(TILES)
+        tiles = sorted(name for name in os.listdir(TILES) if name.endswith(".png"))
+        self.assertEqual(len(tiles), len(atlas))
+
+        grass = pygame.image.load(os.path.join(TILES, "grass.png"))
+        region = atlas["grass"]
+        for pos in ((0, 0), (123, 45), (399, 399)):
+            self.assertEqual(grass.get_at(pos), region.get_at(pos))
+
+    def test_image_from_atlas(self):
+        atlas = TextureAtlas.from_surfaces(self.surfaces, width=16)
+        image = Image.from_atlas(atlas, "green", Point(3, 4))
+        self.assertTrue(image.img is atlas["green"])
+        self.assertEqual((2, 7), (image.width, image.height))
+
+        sprite = PyRoSprite(image)
+        self.assertEqual(pygame.Rect(3, 4, 2, 7), sprite.rect)
+        group = pygame.sprite.Group(sprite)
+        screen = pygame.Surface((10, 12))
+        group.draw(screen)
+        self.assertEqual((0, 255, 0, 255), tuple(screen.get_at((4, 10))))
+
+        image.flip(True, False)
+        self.assertFalse(sprite.image is atlas["green"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+from components import broadphase
+from components.shapes import CollisionBox, Point
+
+import itertools
+import pygame
+import random
+import unittest
+
+try:
+    import numpy
+    from components import batch_collision
+except ImportError:
+    numpy = None
+
+def brute_force(boxes_a, boxes_b=None):
+    if boxes_b is None:
+        return [
+            (i, j) for i, j in itertools.combinations(range(len(boxes_a)), 2)
+            if broadphase.bounds_overlap(boxes_a[i], boxes_a[j])
+        ]
+    return [
+        (i, j) for i in range(len(boxes_a)) for j in range(len(boxes_b))
+        if broadphase.bounds_overlap(boxes_a[i], boxes_b[j])
+    ]
+
+def random_boxes(count):
+    boxes = []
+    for _ in range(count):
+        # Small integer coordinates make for many shared and touching edges.
+        left, top = random.randint(0, 40), random.randint(0, 40)
+        boxes.append((left, top, left + random.randint(0, 8), top + random.randint(0, 8)))
+    return boxes
+
+@unittest.skipIf(numpy is None, "NumPy is not installed")
+class BoxPairsTests(unittest.TestCase):
+
+    def setUp(self):
+        random.seed(22)
+
+    def pairs(self, *args, **kwargs):
+        idx_a, idx_b = batch_collision.box_pairs(*args, **kwargs)
+        return list(zip(idx_a.tolist(), idx_b.tolist()))
+
+    def test_two_groups(self):
+        for _ in range(20):
+            boxes_a = random_boxes(random.randint(0, 60))
+            boxes_b = random_boxes(random.randint(0, 60))
+            expected = brute_force(boxes_a, boxes_b)
+            for method in ("broadcast", "sweep"):
+                self.assertEqual(expected, self.pairs(boxes_a, boxes_b, method=method))
+
+    def test_self_group(self):
+        for _ in range(20):
+            boxes = random_boxes(random.randint(0, 80))
+            expected = brute_force(boxes)
+            for method in ("broadcast", "sweep"):
+                self.assertEqual(expected, self.pairs(boxes, method=method))
+
+    def test_auto(self):
+        boxes = random_boxes(400)
+        self.assertEqual(brute_force(boxes), self.pairs(boxes))
+        self.assertRaises(ValueError, batch_collision.box_pairs, boxes, method="quadtree")
+
+    def test_boxes_array(self):
+        objs = [pygame.Rect(1, 2, 3, 4), CollisionBox(Point(5, 9), Point(7, 6))]
+        self.assertEqual(
+            [[1, 2, 4, 6], [5, 6, 7, 9]], batch_collision.boxes_array(objs).tolist()
+        )
+        self.assertEqual((0, 4), batch_collision.boxes_array([]).shape)
+
+class GroupCollideTests(unittest.TestCase):
+
+    def make_group(self, rects):
+        group = pygame.sprite.Group()
+        for rect in rects:
+            sprite = pygame.sprite.Sprite()
+            sprite.rect = pygame.Rect(rect)
+            group.add(sprite)
+        return group
+
+    def hits(self, collisions):
+        return [
+            (tuple(a.rect), [tuple(b.rect) for b in hits])
+            for a, hits in collisions.items()
+        ]
+
+    def check_groupcollide(self, groupcollide):
+        random.seed(23)
+        for dokill_a, dokill_b in ((False, False), (True, False), (False, True), (True, True)):
+            rects_a = [(x, y, x2 - x, y2 - y) for x, y, x2, y2 in random_boxes(50)]
+            rects_b = [(x, y, x2 - x, y2 - y) for x, y, x2, y2 in random_boxes(50)]
+            expected_a, expected_b = self.make_group(rects_a), self.make_group(rects_b)
+            group_a, group_b = self.make_group(rects_a), self.make_group(rects_b)
+
+            expected = pygame.sprite.groupcollide(expected_a, expected_b, dokill_a, dokill_b)
+            found = groupcollide(group_a, group_b, dokill_a, dokill_b)
+
+            self.assertEqual(sorted(self.hits(expected)), sorted(self.hits(found)))
+            self.assertEqual(len(expected_a), len(group_a))
+            self.assertEqual(len(expected_b), len(group_b))
+
+    @unittest.skipIf(numpy is None, "NumPy is not installed")
+    def test_batch_groupcollide(self):
+        self.check_groupcollide(batch_collision.groupcollide)
+
+    def test_broadphase_groupcollide(self):
+        self.check_groupcollide(broadphase.groupcollide)
+
+if __name__ == "__main__":
+    unittest.main()
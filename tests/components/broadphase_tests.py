@@ -0,0 +1,136 @@
+from components.broadphase import SpatialHash, bounds_of, bounds_overlap, groupcollide
+from components.shapes import CollisionBox, Point, PointShape
+
+import itertools
+import pygame
+import random
+import unittest
+
+class BoundsTests(unittest.TestCase):
+
+    def test_bounds_of(self):
+        self.assertEqual((1, 2, 4, 6), bounds_of(pygame.Rect(1, 2, 3, 4)))
+
+        sprite = pygame.sprite.Sprite()
+        sprite.rect = pygame.Rect(5, 5, 10, 10)
+        self.assertEqual((5, 5, 15, 15), bounds_of(sprite))
+
+        box = CollisionBox(Point(3, 9), Point(7, 2))
+        self.assertEqual((3, 2, 7, 9), bounds_of(box))
+
+        shape = PointShape([Point(0, 0), Point(10, 0), Point(5, 8)])
+        self.assertEqual((0, 0, 10, 8), bounds_of(shape))
+
+        self.assertRaises(TypeError, bounds_of, object())
+
+    def test_bounds_overlap(self):
+        self.assertTrue(bounds_overlap((0, 0, 10, 10), (5, 5, 15, 15)))
+        self.assertFalse(bounds_overlap((0, 0, 10, 10), (10, 0, 20, 10)))
+        self.assertFalse(bounds_overlap((0, 0, 10, 10), (0, 11, 10, 20)))
+
+class SpatialHashTests(unittest.TestCase):
+
+    def setUp(self):
+        self.index = SpatialHash(10)
+
+    def test_insert_query(self):
+        small = pygame.Rect(1, 1, 2, 2)
+        big = pygame.Rect(5, 5, 30, 30)
+        far = pygame.Rect(100, 100, 5, 5)
+        for rect in (small, big, far):
+            self.index.insert(rect)
+
+        self.assertEqual(3, len(self.index))
+        self.assertEqual([small], self.index.query((0, 0, 4, 4)))
+        self.assertEqual(set([id(small), id(big)]),
+          set(id(obj) for obj in self.index.query((0, 0, 8, 8))))
+        self.assertEqual([big], self.index.query((30, 30, 40, 40)))
+        self.assertEqual([far], self.index.query_point(102, 104))
+        self.assertEqual([], self.index.query_point(50, 50))
+
+    def test_move_remove(self):
+        rect = pygame.Rect(0, 0, 5, 5)
+        self.index.insert(rect)
+        rect.x = 50
+        self.index.move(rect)
+        self.assertEqual([], self.index.query((0, 0, 5, 5)))
+        self.assertEqual([rect], self.index.query((50, 0, 55, 5)))
+
+        self.index.remove(rect)
+        self.assertFalse(rect in self.index)
+        self.assertEqual([], self.index.query((50, 0, 55, 5)))
+        # Removing twice is fine.
+        self.index.remove(rect)
+
+    def test_unhashable(self):
+        box = CollisionBox(Point(0, 0), Point(5, 5))
+        self.index.insert(box)
+        self.assertTrue(box in self.index)
+        self.assertEqual([box], self.index.query_point(1, 1))
+
+    def test_pairs_match_brute_force(self):
+        random.seed(16)
+        rects = [
+            pygame.Rect(random.randint(0, 200), random.randint(0, 200),
+              random.randint(1, 30), random.randint(1, 30))
+            for _ in range(150)
+        ]
+        for rect in rects:
+            self.index.insert(rect)
+
+        # Move some of them around
+        for rect in rects[::3]:
+            rect.move_ip(random.randint(-20, 20), random.randint(-20, 20))
+            self.index.move(rect)
+
+        expected = set(
+            frozenset((id(a), id(b))) for a, b in itertools.combinations(rects, 2)
+            if a.colliderect(b)
+        )
+        found = [frozenset((id(a), id(b))) for a, b in self.index.colliding_pairs()]
+        self.assertEqual(len(found), len(set(found)))
+        self.assertEqual(expected, set(found))
+
+        candidates = set(frozenset((id(a), id(b))) for a, b in self.index.candidate_pairs())
+        self.assertTrue(expected <= candidates)
+
+    def test_narrowphase(self):
+        a = pygame.Rect(0, 0, 10, 10)
+        b = pygame.Rect(5, 5, 10, 10)
+        self.index.insert(a)
+        self.index.insert(b)
+        self.assertEqual(1, len(self.index.colliding_pairs()))
+        self.assertEqual([], self.index.colliding_pairs(lambda x, y: False))
+
+class GroupCollideTests(unittest.TestCase):
+
+    def __make_group(self, rects):
+        group = pygame.sprite.Group()
+        for rect in rects:
+            sprite = pygame.sprite.Sprite()
+            sprite.rect = pygame.Rect(rect)
+            group.add(sprite)
+        return group
+
+    def test_same_as_pygame(self):
+        random.seed(17)
+        for dokill_a, dokill_b in ((False, False), (True, True)):
+            rects_a = [(random.randint(0, 300), random.randint(0, 300), 8, 8) for _ in range(60)]
+            rects_b = [(random.randint(0, 300), random.randint(0, 300), 40, 40) for _ in range(60)]
+            expected_a = self.__make_group(rects_a)
+            expected_b = self.__make_group(rects_b)
+            group_a = self.__make_group(rects_a)
+            group_b = self.__make_group(rects_b)
+
+            expected = pygame.sprite.groupcollide(expected_a, expected_b, dokill_a, dokill_b)
+            found = groupcollide(group_a, group_b, dokill_a, dokill_b)
+
+            self.assertEqual(
+                sorted((tuple(a.rect), sorted(tuple(b.rect) for b in hits)) for a, hits in expected.items()),
+                sorted((tuple(a.rect), sorted(tuple(b.rect) for b in hits)) for a, hits in found.items())
+            )
+            self.assertEqual(len(expected_a), len(group_a))
+            self.assertEqual(len(expected_b), len(group_b))
+
+if __name__ == "__main__":
+    unittest.main()
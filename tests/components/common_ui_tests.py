@@ -1,4 +1,4 @@
-from components.common_ui import Button, UnsupportedEventException
+from components.common_ui import Button, CommonUI, UnsupportedEventException
 from components.core import Colors, GameConfig, GameLoop, GameLoopEvents, GameModel, GameScreen
 from mock import patch
 from tests.components.core_tests import EventHandlerMock
@@ -41,6 +41,29 @@ class ButtonTests(unittest.TestCase):
         loop._GameLoop__handle_event(pygame.event.Event(pygame.MOUSEBUTTONDOWN))
         self.assertTrue(screen.evh.is_called)
 
+    def test_click_dispatch(self):
+        screen = SampleGameScreenUI(GameConfig(), GameModel())
+        loop_events = GameLoopEvents(screen)
+        loop_events.loop_setup()
+        loop = GameLoop(loop_events)
+
+        loop._GameLoop__handle_event(pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=(300, 300)))
+        self.assertFalse(screen.evh.is_called)
+        loop._GameLoop__handle_event(pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=(5, 5)))
+        self.assertTrue(screen.evh.is_called)
+
+    def test_unbounded_ui(self):
+        screen = GameScreen(GameConfig(), GameModel())
+        ui = CommonUI((0, 0))
+        ui._event_handlers[pygame.MOUSEBUTTONDOWN] = ui.dummy_event_handler
+        screen.ui_elements.add(ui)
+        loop_events = GameLoopEvents(screen)
+        loop_events.loop_setup()
+        self.assertEqual([], screen.clicked_drawables((0, 0)))
+        self.assertEqual(
+            [ui.dummy_event_handler], loop_events.event_handlers[pygame.MOUSEBUTTONDOWN]
+        )
+
     def test_unsupported_event(self):
         btn = Button("test", Colors.NIGHT_BLUE, (100, 88))
         self.assertRaises(
@@ -6,7 +6,9 @@ from io import StringIO
 from tests import make_mock_clock
 
 import json
+import os
 import pygame
+import tempfile
 import unittest
 
 # These are classes used by the tests, not actual tests themselves.
@@ -35,6 +37,16 @@ class LoopEventsMock(GameLoopEvents):
         self.times_called += 1
         return self.times_called < 10
 
+class SimTimeLoopEventsMock(GameLoopEvents):
+
+    def __init__(self, screen):
+        super(SimTimeLoopEventsMock, self).__init__(screen)
+        self.sim_times = []
+
+    def loop_event(self):
+        super(SimTimeLoopEventsMock, self).loop_event()
+        self.sim_times.append((self.sim_time, self.sim_timestep))
+
 class KeyboardHandlingLoopEventsMock(GameLoopEvents):
     """
     Technically this could be merged with LoopEventsMock above but it seemed
@@ -144,6 +156,26 @@ class GameScreenTest(unittest.TestCase):
         screen = GameScreen(cfg, GameModel())
         self.assertTrue(screen._is_drawable_clicked(sample_drawable, (90, 44)))
 
+    def test_clicked_drawables(self):
+        screen = GameScreen(GameConfig(window_size=(200, 160)), GameModel())
+        background = Drawable((0, 0), 200, 160)
+        button = Drawable((20, 30), 40, 10)
+        screen.add_clickable(background)
+        screen.add_clickable(button)
+
+        self.assertEqual([background], screen.clicked_drawables((10, 10)))
+        clicked = screen.clicked_drawables((50, 25))
+        self.assertEqual(2, len(clicked))
+        self.assertTrue(button in clicked)
+
+        button.draw_offset = (100, 100)
+        screen.update_clickable(button)
+        self.assertEqual([background], screen.clicked_drawables((50, 25)))
+        self.assertEqual(2, len(screen.clicked_drawables((120, 105))))
+
+        screen.remove_clickable(background)
+        self.assertEqual([], screen.clicked_drawables((10, 10)))
+
 class DebugQueueTest(unittest.TestCase):
     
     def test_log_q_growth(self):
@@ -232,3 +264,119 @@ class DryRunTest(unittest.TestCase):
         self.assertTrue(clock_tick.called)
         self.assertTrue(flip.called)
         self.assertTrue(quit.called)
+
+class HeadlessRunTest(unittest.TestCase):
+
+    @patch("components.core.pygame.display.flip", autospec=True)
+    @patch("components.core.pygame.time.Clock", new_callable=make_mock_clock)
+    def test_headless_run(self, clock, flip):
+        config = GameConfig(clock_rate=50, window_size=(40, 30), headless=True)
+        screen = GameScreen(config, GameModel())
+        loop_events = LoopEventsMock(config, screen)
+        loop = GameLoop(loop_events)
+        loop.go()
+
+        self.assertFalse(flip.called)
+        self.assertFalse(clock.return_value.tick.called)
+        self.assertEqual(9, loop.frame_count)
+        self.assertEqual(9 * 20, loop.sim_time)
+        self.assertEqual((40, 30), loop_events.window.get_size())
+
+    def test_headless_sim_timestep(self):
+        config = GameConfig(clock_rate=50, window_size=(40, 30), headless=True)
+        config.set_config_val("sim_timestep", 5)
+        screen = GameScreen(config, GameModel())
+        loop_events = LoopEventsMock(config, screen)
+        loop = GameLoop(loop_events, frame_limit=3)
+        loop.go()
+
+        self.assertEqual(3, loop.frame_count)
+        self.assertEqual(15, loop.sim_time)
+
+    def test_sim_time_on_loop_events(self):
+        config = GameConfig(clock_rate=50, window_size=(40, 30), headless=True)
+        config.set_config_val("sim_timestep", 5)
+        loop_events = SimTimeLoopEventsMock(GameScreen(config, GameModel()))
+        GameLoop(loop_events, frame_limit=3).go()
+
+        self.assertEqual([(5, 5), (10, 5), (15, 5)], loop_events.sim_times)
+
+class DirtyRenderingTest(unittest.TestCase):
+
+    def test_mark_dirty_disabled(self):
+        screen = GameScreen(GameConfig(window_size=(100, 100)), GameModel())
+        screen.mark_dirty((0, 0, 10, 10))
+        self.assertFalse(screen.is_dirty)
+        self.assertEqual([], screen.consume_dirty_rects())
+
+    def test_mark_dirty_whole_screen(self):
+        config = GameConfig(window_size=(100, 80), dirty_rendering=True)
+        screen = GameScreen(config, GameModel())
+        screen.mark_dirty()
+        self.assertTrue(screen.is_dirty)
+        self.assertEqual([pygame.Rect(0, 0, 100, 80)], screen.consume_dirty_rects())
+        self.assertFalse(screen.is_dirty)
+
+    def test_mark_dirty_drawable(self):
+        config = GameConfig(window_size=(100, 80), dirty_rendering=True)
+        screen = GameScreen(config, GameModel())
+        screen.mark_dirty(Drawable((10, 20), 30, 40))
+        self.assertEqual([pygame.Rect(20, 10, 30, 40)], screen.consume_dirty_rects())
+
+        screen.mark_dirty(Drawable((10, 20)))
+        self.assertEqual([pygame.Rect(0, 0, 100, 80)], screen.consume_dirty_rects())
+
+    def test_merge_rects(self):
+        merged = GameScreen.merge_rects([
+            (0, 0, 10, 10), (50, 50, 10, 10), (5, 5, 10, 10), (15, 0, 5, 5)
+        ])
+        self.assertEqual(2, len(merged))
+        self.assertIn(pygame.Rect(0, 0, 20, 15), merged)
+        self.assertIn(pygame.Rect(50, 50, 10, 10), merged)
+
+    def test_merge_rects_chain(self):
+        # The last rect bridges the first two.
+        merged = GameScreen.merge_rects([(0, 0, 10, 10), (30, 0, 10, 10), (8, 0, 24, 5)])
+        self.assertEqual([pygame.Rect(0, 0, 40, 10)], merged)
+
+    @patch("components.core.pygame.quit", autospec=True)
+    @patch("components.core.pygame.display.update", autospec=True)
+    @patch("components.core.pygame.display.flip", autospec=True)
+    @patch("components.core.pygame.time.Clock", new_callable=make_mock_clock)
+    def test_dirty_run(self, clock, flip, update, quit):
+        config = GameConfig(window_size=(60, 40), dirty_rendering=True)
+        screen = GameScreen(config, GameModel())
+        loop_events = LoopEventsMock(config, screen)
+        loop = GameLoop(loop_events)
+        loop.go()
+
+        self.assertFalse(flip.called)
+        # Only the initial fill damages anything.
+        update.assert_called_once_with([pygame.Rect(0, 0, 60, 40)])
+
+class ProfilingTest(unittest.TestCase):
+
+    def test_profiled_run(self):
+        config = GameConfig(clock_rate=50, window_size=(40, 30), headless=True)
+        config.set_config_val("profile_frames", True)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            export_path = os.path.join(tmpdir, "frames.json")
+            config.set_config_val("profile_export", export_path)
+            screen = GameScreen(config, GameModel())
+            loop_events = LoopEventsMock(config, screen)
+            GameLoop(loop_events).go()
+
+            with open(export_path) as export:
+                report = json.load(export)
+
+        self.assertEqual(9, loop_events.profiler.frame_count)
+        for phase in ("event_pump", "event_dispatch", "loop_event", "draw_screen", "present"):
+            self.assertEqual(9, report["phases"][phase]["count"])
+
+    def test_not_profiled(self):
+        config = GameConfig(clock_rate=50, window_size=(40, 30), headless=True)
+        screen = GameScreen(config, GameModel())
+        loop_events = LoopEventsMock(config, screen)
+        GameLoop(loop_events).go()
+        self.assertFalse(loop_events.profiler.enabled)
+        self.assertEqual(0, loop_events.profiler.frame_count)
@@ -0,0 +1,79 @@
+from components.core import GameConfig, GameModel, GameScreen
+from components.helpers import array_grid
+from components.helpers.array_grid import ArrayGrid
+from mock import patch
+
+import pygame
+import unittest
+
+@unittest.skipIf(array_grid.numpy is None, "NumPy is not installed")
+class ArrayGridTests(unittest.TestCase):
+
+    def setUp(self):
+        self.grid = ArrayGrid(4, 3)
+
+    def test_shape(self):
+        self.assertEqual((3, 4), self.grid.grid.shape)
+        self.assertEqual(3, len(self.grid.grid))
+        self.assertEqual(4, len(self.grid.grid[0]))
+        self.assertEqual(12, self.grid.count(0))
+
+    def test_dtype(self):
+        grid = ArrayGrid(2, 2, dtype="U1", fill_value=".")
+        grid.grid[0][1] = "3"
+        self.assertEqual("3", grid.grid[0][1])
+        self.assertEqual(3, grid.count("."))
+
+    def test_get_adjacent(self):
+        adj = self.grid.get_adjacent(0, 0)
+        self.assertEqual(set([(0, 1), (1, 0), (1, 1)]), set(adj))
+
+    def test_get_clicked_cell(self):
+        screen = GameScreen(GameConfig(window_size=(80, 60)), GameModel())
+        self.assertEqual((2, 1), self.grid.get_clicked_cell(screen, (25, 45)))
+
+    @patch("components.helpers.grid.pygame.draw.rect", autospec=True)
+    def test_draw(self, draw_rect):
+        screen = GameScreen(GameConfig(window_size=(80, 60)), GameModel())
+        window = pygame.Surface((80, 60))
+        self.grid.draw(window, screen)
+        self.assertEqual(12, draw_rect.call_count)
+
+    def test_fill_mask(self):
+        self.grid.fill(7)
+        self.assertEqual(12, self.grid.count(7))
+        self.grid.fill(1, self.grid.grid == 7)
+        self.assertEqual(12, self.grid.count(1))
+
+        self.grid.grid[1][2] = 5
+        self.assertEqual([(1, 2)], self.grid.cells(self.grid.mask(5)))
+        self.assertEqual(1, self.grid.count(mask=self.grid.mask(5)))
+
+    def test_shift(self):
+        self.grid.grid[0][0] = 1
+        self.grid.grid[2][3] = 2
+        self.grid.shift(1, 1)
+        self.assertEqual([(1, 1)], self.grid.cells(self.grid.mask(1)))
+        self.assertEqual(0, self.grid.count(2))
+
+        self.grid.shift(-1, -2, fill_value=9)
+        self.assertEqual(0, self.grid.count(1))
+        self.assertEqual(3 + 4 + 1, self.grid.count(9))
+
+        self.grid.shift(10, 0)
+        self.assertEqual(12, self.grid.count(0))
+
+    def test_neighbor_count(self):
+        self.grid.grid[1][1] = 1
+        counts = self.grid.neighbor_count(self.grid.mask(1))
+        self.assertEqual(0, counts[1][1])
+        self.assertEqual(1, counts[0][0])
+        self.assertEqual(1, counts[2][2])
+        self.assertEqual(0, counts[0][3])
+
+        hv_only = ArrayGrid(4, 3, diag_neighbors=False)
+        hv_only.grid[1][1] = 1
+        counts = hv_only.neighbor_count(hv_only.mask(1))
+        self.assertEqual(0, counts[0][0])
+        self.assertEqual(1, counts[0][1])
+        self.assertEqual(8, self.grid.neighbor_count(self.grid.mask(0))[1][1])
@@ -1,10 +1,17 @@
 from components.core import GameConfig, GameModel, GameScreen
 from components.framework_exceptions import VectorDirectionException
-from components.helpers.grid import BorderProperties, QuadraticGrid
+from components.helpers.grid import AdjacencyIndex, BorderProperties, QuadraticGrid
 from mock import patch
 
+import gc
 import pygame
 import unittest
+import weakref
+
+class WhiteModel(GameModel):
+
+    def render(self, **kwargs):
+        return (255, 255, 255)
 
 class QuadraticGridTests(unittest.TestCase):
     
@@ -63,6 +70,49 @@ class QuadraticGridTests(unittest.TestCase):
         
         self.assertRaises(IndexError, matrix.get_adjacent, 10, 10)
         self.assertRaises(TypeError, matrix.get_adjacent, 0.0, "zero")
+        self.assertRaises(IndexError, matrix.get_adjacent, 4, 0)
+        self.assertRaises(IndexError, matrix.get_adjacent, 0, 3)
+
+    def test_adjacent_list_hv_only(self):
+        matrix = QuadraticGrid(3, 4, diag_neighbors=False)
+        adj = matrix.get_adjacent(2, 1)
+        self.assertEqual(set(adj), set([(2, 0), (2, 2), (1, 1), (3, 1)]))
+
+    def test_adjacency_index(self):
+        matrix = QuadraticGrid(3, 4)
+        same_shape = QuadraticGrid(3, 4)
+        self.assertTrue(matrix.adjacency is same_shape.adjacency)
+        self.assertTrue(matrix.adjacency is AdjacencyIndex.get(3, 4, True, True))
+
+        matrix.diag_neighbors = False
+        self.assertFalse(matrix.adjacency is same_shape.adjacency)
+
+        index = same_shape.adjacency
+        for row in range(4):
+            for col in range(3):
+                flat = [(i // 3, i % 3) for i in index.flat_neighbors(row * 3 + col)]
+                self.assertEqual(list(index.neighbors(row, col)), flat)
+                self.assertEqual(same_shape.get_adjacent(row, col), flat)
+
+        self.assertEqual(len(index.indices), index.indptr[-1])
+        self.assertEqual(13, len(index.indptr))
+
+    def test_large_grid_not_indexed(self):
+        matrix = QuadraticGrid(300, 300)
+        self.assertIsNone(matrix.adjacency)
+        self.assertEqual(
+            set([(0, 1), (1, 0), (1, 1)]), set(matrix.get_adjacent(0, 0))
+        )
+        self.assertEqual(
+            AdjacencyIndex.get(3, 4, True, True).neighbors(2, 1),
+            QuadraticGrid(300, 300).neighbors(2, 1)
+        )
+
+    def test_adjacency_cache_bounded(self):
+        first = AdjacencyIndex.get(2, 2, True, False)
+        for size in range(AdjacencyIndex.CACHE_SIZE):
+            AdjacencyIndex.get(5, size + 1, True, False)
+        self.assertFalse(first is AdjacencyIndex.get(2, 2, True, False))
 
     @patch("components.helpers.grid.pygame.draw.line", autospec=True)
     @patch("components.helpers.grid.pygame.draw.rect", autospec=True)
@@ -95,31 +145,37 @@ class QuadraticGridTests(unittest.TestCase):
         qg.draw(window, game_screen)
         self.assertTrue(draw_rect.called)
 
+        # Python sorcery
+        layer = qg._QuadraticGrid__border_layer
+        # The layer is padded by the thickness on all sides.
+        pad = border_prop.thickness
+        self.assertEqual((400 + 2 * pad, 400 + 2 * pad), layer.get_size())
+
         # The vertical borders
         draw_line.assert_any_call(
-            window, border_prop.color, (0, 0), (0, 400),
+            layer, border_prop.color, (pad, pad), (pad, 400 + pad),
             border_prop.thickness
         )
         draw_line.assert_any_call(
-            window, border_prop.color, (200, 0), (200, 400),
+            layer, border_prop.color, (200 + pad, pad), (200 + pad, 400 + pad),
             border_prop.thickness
         )
         draw_line.assert_any_call(
-            window, border_prop.color, (400, 0), (400, 400),
+            layer, border_prop.color, (400 + pad, pad), (400 + pad, 400 + pad),
             border_prop.thickness
         )
 
         # The horizontal borders
         draw_line.assert_any_call(
-            window, border_prop.color, (0, 0), (400, 0),
+            layer, border_prop.color, (pad, pad), (400 + pad, pad),
             border_prop.thickness
         )
         draw_line.assert_any_call(
-            window, border_prop.color, (0, 200), (400, 200),
+            layer, border_prop.color, (pad, 200 + pad), (400 + pad, 200 + pad),
             border_prop.thickness
         )
         draw_line.assert_any_call(
-            window, border_prop.color, (0, 400), (400, 400),
+            layer, border_prop.color, (pad, 400 + pad), (400 + pad, 400 + pad),
             border_prop.thickness
         )
 
@@ -139,23 +195,60 @@ class QuadraticGridTests(unittest.TestCase):
         # Python sorcery
         self.assertEqual(block_dim, qg._QuadraticGrid__compute_block_dimension(config, "width"))
         self.assertEqual(block_dim, qg._QuadraticGrid__compute_block_dimension(config, "height"))
-        window_dimensions = config.get_config_val("window_size")
+        layer = qg._QuadraticGrid__border_layer
+        pad = border_prop.thickness
+        grid_dimensions = (500, 500)
         # The horizontal borders
-        for i in range(10):
-            y = i * block_dim + draw_offset[0]
+        for i in range(11):
+            y = i * block_dim + pad
             draw_line.assert_any_call(
-                window, border_prop.color, (0, y), (window_dimensions[0], y),
+                layer, border_prop.color, (pad, y), (grid_dimensions[0] + pad, y),
                 border_prop.thickness
             )
 
         # The vertical borders
-        for i in range(10):
-            x = i * block_dim
+        for i in range(11):
+            x = i * block_dim + pad
             draw_line.assert_any_call(
-                window, border_prop.color, (x, draw_offset[0]), (x, window_dimensions[1]),
+                layer, border_prop.color, (x, pad), (x, grid_dimensions[1] + pad),
                 border_prop.thickness
             )
 
+    @patch("components.helpers.grid.pygame.draw.line", autospec=True)
+    @patch("components.helpers.grid.pygame.draw.rect", autospec=True)
+    def test_border_layer_cache(self, draw_rect, draw_line):
+        config = GameConfig(window_size=(100, 100))
+        game_screen = GameScreen(config, GameModel())
+        window = pygame.Surface((100, 100))
+        border_prop = BorderProperties()
+        qg = QuadraticGrid(4, 4, border_properties=border_prop)
+        qg.draw(window, game_screen)
+        self.assertEqual(10, draw_line.call_count)
+        layer = qg._QuadraticGrid__border_layer
+
+        qg.draw(window, game_screen)
+        qg.draw(window, game_screen, cells=[(1, 1)])
+        self.assertEqual(10, draw_line.call_count)
+        self.assertTrue(layer is qg._QuadraticGrid__border_layer)
+
+        border_prop.thickness = 3
+        qg.draw(window, game_screen)
+        self.assertEqual(20, draw_line.call_count)
+
+        config.set_config_val("window_size", (200, 200))
+        qg.draw(window, game_screen)
+        self.assertEqual(30, draw_line.call_count)
+
+    def test_border_layer_pixels(self):
+        config = GameConfig(window_size=(40, 40))
+        game_screen = GameScreen(config, WhiteModel())
+        window = pygame.Surface((40, 40))
+        window.fill((255, 255, 255))
+        qg = QuadraticGrid(2, 2, border_properties=BorderProperties())
+        qg.draw(window, game_screen)
+        self.assertEqual((0, 0, 0, 255), tuple(window.get_at((20, 10))))
+        self.assertEqual((0, 0, 0, 255), tuple(window.get_at((10, 20))))
+
     def test_get_clicked_cell_squarefull(self):
         square_config = GameConfig(window_size=(80, 80))
         square_screen = GameScreen(square_config, GameModel())
@@ -187,3 +280,68 @@ class QuadraticGridTests(unittest.TestCase):
         screen = GameScreen(grid_config, GameModel())
         qg = QuadraticGrid(10, 10, 400, 400)
         self.assertIsNone(qg.get_clicked_cell(screen, (404, 404)))
+
+    @patch("components.helpers.grid.pygame.draw.rect", autospec=True)
+    def test_layout_cache(self, draw_rect):
+        config = GameConfig(window_size=(400, 400))
+        screen = GameScreen(config, GameModel())
+        window = pygame.Surface((400, 400))
+        qg = QuadraticGrid(4, 4)
+        qg.draw(window, screen)
+        layout = qg._QuadraticGrid__layout
+        qg.draw(window, screen)
+        self.assertTrue(layout is qg._QuadraticGrid__layout)
+        draw_rect.assert_any_call(window, None, (300, 300, 100, 100), 0)
+
+        config.set_config_val("window_size", (200, 200))
+        self.assertIsNone(qg._QuadraticGrid__layout)
+        qg.draw(window, screen)
+        draw_rect.assert_any_call(window, None, (150, 150, 50, 50), 0)
+        self.assertEqual((1, 1), qg.get_clicked_cell(screen, (60, 60)))
+
+        qg.draw_offset = (20, 10)
+        self.assertIsNone(qg._QuadraticGrid__layout)
+        qg.draw(window, screen)
+        draw_rect.assert_any_call(window, None, (10, 20, 47, 45), 0)
+
+    @patch("components.helpers.grid.pygame.draw.rect", autospec=True)
+    def test_layout_detach(self, draw_rect):
+        config = GameConfig(window_size=(400, 400))
+        screen = GameScreen(config, GameModel())
+        window = pygame.Surface((400, 400))
+        with patch.object(config, "unsubscribe", wraps=config.unsubscribe) as unsubscribe:
+            qg = QuadraticGrid(4, 4)
+            qg.draw(window, screen)
+            invalidator = qg._QuadraticGrid__layout_invalidator
+            qg.detach_layout()
+            unsubscribe.assert_called_once_with(invalidator)
+            self.assertIsNone(qg._QuadraticGrid__layout)
+
+            # Discarded grids are not kept alive by the config.
+            qg.draw(window, screen)
+            grid_ref = weakref.ref(qg)
+            del qg
+            gc.collect()
+            self.assertIsNone(grid_ref())
+            unsubscribe.reset_mock()
+            config.set_config_val("window_size", (200, 200))
+            unsubscribe.assert_called_once_with(invalidator)
+
+    @patch("components.helpers.grid.pygame.draw.rect", autospec=True)
+    def test_draw_cells(self, draw_rect):
+        config = GameConfig(window_size=(400, 400), dirty_rendering=True)
+        screen = GameScreen(config, GameModel())
+        window = pygame.Surface((400, 400))
+        qg = QuadraticGrid(4, 4)
+        qg.draw(window, screen, cells=[(0, 1), (3, 2)])
+        self.assertEqual(2, draw_rect.call_count)
+        draw_rect.assert_any_call(window, None, (100, 0, 100, 100), 0)
+        draw_rect.assert_any_call(window, None, (200, 300, 100, 100), 0)
+        self.assertEqual(
+            [pygame.Rect(100, 0, 100, 100), pygame.Rect(200, 300, 100, 100)],
+            screen.consume_dirty_rects()
+        )
+
+        qg.draw(window, screen)
+        self.assertEqual(18, draw_rect.call_count)
+        self.assertEqual([pygame.Rect(0, 0, 400, 400)], screen.consume_dirty_rects())
@@ -0,0 +1,89 @@
+from components.image import Image, SurfaceCache
+from components.shapes import Point
+from mock import patch
+
+import os
+import pygame
+import shutil
+import tempfile
+import unittest
+
+class SurfaceCacheTests(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.files = []
+        for idx, size in enumerate(((4, 4), (8, 4), (2, 2))):
+            path = os.path.join(self.directory, "image%s.png" % idx)
+            pygame.image.save(pygame.Surface(size), path)
+            self.files.append(path)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_load_once(self):
+        cache = SurfaceCache()
+        with patch("components.image.pygame.image.load", wraps=pygame.image.load) as load:
+            first = cache.load(self.files[0])
+            second = cache.load(os.path.relpath(self.files[0]))
+            self.assertTrue(first is second)
+            self.assertEqual(1, load.call_count)
+            self.assertEqual((1, 1), (cache.hits, cache.misses))
+
+    def test_byte_budget(self):
+        # Surfaces may be converted for the display, so measure them as cached.
+        measure = SurfaceCache()
+        measure.load(self.files[0])
+        measure.load(self.files[1])
+        budget = measure.bytes
+        cache = SurfaceCache(budget)
+        cache.load(self.files[0])
+        cache.load(self.files[1])
+        self.assertEqual(budget, cache.bytes)
+
+        # Touch the first so that the second is the least recently used.
+        cache.load(self.files[0])
+        cache.load(self.files[2])
+        self.assertEqual(2, len(cache))
+        self.assertLessEqual(cache.bytes, budget)
+
+        misses = cache.misses
+        cache.load(self.files[0])
+        self.assertEqual(misses, cache.misses)
+        cache.load(self.files[1])
+        self.assertEqual(misses + 1, cache.misses)
+
+    def test_oversized(self):
+        cache = SurfaceCache(1)
+        cache.load(self.files[0])
+        self.assertEqual(1, len(cache))
+        cache.load(self.files[1])
+        self.assertEqual(1, len(cache))
+
+        cache.clear()
+        self.assertEqual((0, 0), (len(cache), cache.bytes))
+
+    @patch("components.image.Image.surface_cache", new_callable=SurfaceCache)
+    def test_images_share_surfaces(self, cache):
+        first = Image(self.files[0])
+        second = Image(self.files[0], Point(3, 3))
+        self.assertTrue(first.img is second.img)
+        self.assertEqual(1, cache.misses)
+
+        first.flip(True, False)
+        self.assertFalse(first.img is second.img)
+        self.assertTrue(second.img is Image(self.files[0]).img)
+
+    @patch("components.image.Image.surface_cache", new_callable=SurfaceCache)
+    def test_clone(self, cache):
+        image = Image(self.files[1], Point(1, 2))
+        image.flip(True, False)
+        cloned = image.clone()
+        self.assertTrue(cloned.img is image.img)
+        self.assertEqual(Point(1, 2), cloned.position)
+        self.assertFalse(cloned.position is image.position)
+        self.assertEqual(Point(5, 6), image.clone(Point(5, 6)).position)
+        self.assertEqual(1, cache.misses)
+
+if __name__ == "__main__":
+    unittest.main()
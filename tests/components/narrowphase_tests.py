@@ -0,0 +1,132 @@
+from components import narrowphase
+from components.shapes import Point, PointShape
+from mock import patch
+
+import random
+import unittest
+
+def square(x, y, size):
+    return [(x, y), (x + size, y), (x + size, y + size), (x, y + size)]
+
+# An L made of a 2x1 bar on top of a 1x1 block, scaled by 10.
+L_SHAPE = [(0, 0), (20, 0), (20, 10), (10, 10), (10, 20), (0, 20)]
+
+class DecompositionTests(unittest.TestCase):
+
+    def test_is_convex(self):
+        self.assertTrue(narrowphase.is_convex(square(0, 0, 5)))
+        self.assertTrue(narrowphase.is_convex([(0, 0), (5, 0), (10, 0), (10, 10)]))
+        self.assertFalse(narrowphase.is_convex(L_SHAPE))
+
+    def test_triangulate(self):
+        for polygon in (L_SHAPE, list(reversed(L_SHAPE)), square(0, 0, 5)):
+            triangles = narrowphase.triangulate(polygon)
+            self.assertEqual(len(polygon) - 2, len(triangles))
+            area = sum(narrowphase.signed_area(triangle) for triangle in triangles)
+            self.assertAlmostEqual(abs(narrowphase.signed_area(polygon)), area)
+            for triangle in triangles:
+                self.assertGreater(narrowphase.signed_area(triangle), 0)
+
+    def test_triangulate_collinear(self):
+        polygon = [(0, 0), (5, 0), (10, 0), (10, 10), (0, 10)]
+        area = sum(narrowphase.signed_area(t) for t in narrowphase.triangulate(polygon))
+        self.assertAlmostEqual(100, area)
+
+    def test_convex_decomposition(self):
+        pieces = narrowphase.convex_decomposition(L_SHAPE)
+        self.assertEqual(2, len(pieces))
+        for piece in pieces:
+            self.assertTrue(narrowphase.is_convex(piece))
+        self.assertAlmostEqual(300, sum(abs(narrowphase.signed_area(piece)) for piece in pieces))
+
+        convex = square(0, 0, 5)
+        self.assertEqual([convex], narrowphase.convex_decomposition(convex))
+
+class SATTests(unittest.TestCase):
+
+    def test_polygons(self):
+        a = square(0, 0, 10)
+        contact = narrowphase.polygon_collision(a, square(8, 3, 10))
+        self.assertAlmostEqual(2, contact.depth)
+        self.assertEqual((1, 0), tuple(round(c, 9) + 0 for c in contact.normal))
+
+        contact = narrowphase.polygon_collision(square(8, 3, 10), a)
+        self.assertEqual((-1, 0), tuple(round(c, 9) + 0 for c in contact.normal))
+
+        self.assertIsNone(narrowphase.polygon_collision(a, square(10, 0, 10)))
+        self.assertIsNone(narrowphase.polygon_collision(a, square(11, 11, 10)))
+
+    def test_rotated(self):
+        # The boxes overlap but the diamond is clear of the square.
+        diamond = [(20, 10), (25, 15), (20, 20), (15, 15)]
+        self.assertIsNone(narrowphase.polygon_collision(square(0, 0, 12), diamond))
+        contact = narrowphase.polygon_collision(square(0, 0, 16), diamond)
+        self.assertIsNotNone(contact)
+        self.assertAlmostEqual(1, contact.depth)
+
+    def test_containment(self):
+        contact = narrowphase.polygon_collision(square(0, 0, 10), square(1, 4, 2))
+        # Pushing the small square out to the left is the shortest way.
+        self.assertAlmostEqual(3, contact.depth)
+        self.assertEqual((-1, 0), tuple(round(c, 9) + 0 for c in contact.normal))
+
+    def test_circle(self):
+        a = square(0, 0, 10)
+        contact = narrowphase.polygon_circle_collision(a, (5, 13), 4)
+        self.assertAlmostEqual(1, contact.depth)
+        self.assertEqual((0, 1), tuple(round(c, 9) + 0 for c in contact.normal))
+
+        # Near the corner, only the axis through the vertex separates them.
+        self.assertIsNone(narrowphase.polygon_circle_collision(a, (13, 13), 4))
+        contact = narrowphase.polygon_circle_collision(a, (12, 12), 4)
+        self.assertAlmostEqual(4 - 8 ** 0.5, contact.depth)
+
+class ShapeCollisionTests(unittest.TestCase):
+
+    def test_concave(self):
+        l_shape = PointShape([Point(x, y) for x, y in L_SHAPE])
+        # In the notch of the L: the boxes overlap but the shapes do not.
+        notch = PointShape([Point(x, y) for x, y in square(12, 12, 6)])
+        self.assertIsNone(l_shape.collides_with(notch))
+
+        notch.translate(-4, 0)
+        contact = l_shape.collides_with(notch)
+        self.assertAlmostEqual(2, contact.depth)
+
+        self.assertIsNone(narrowphase.shape_circle_collision(l_shape, (16, 16), 3))
+        self.assertIsNotNone(narrowphase.shape_circle_collision(l_shape, (16, 16), 9))
+
+    def test_pieces_cached(self):
+        shape = PointShape([Point(x, y) for x, y in L_SHAPE])
+        pieces = shape.convex_pieces
+        self.assertTrue(pieces is shape.convex_pieces)
+        with patch("components.narrowphase.convex_decomposition") as decompose:
+            shape.translate(1, 2)
+            moved = shape.convex_pieces
+            self.assertFalse(decompose.called)
+        self.assertEqual(
+            [[(x + 1, y + 2) for x, y in piece] for piece in pieces], moved
+        )
+        self.assertEqual(narrowphase.convex_decomposition(shape.point_list), moved)
+
+        shape.invalidate_cache()
+        self.assertFalse(moved is shape.convex_pieces)
+
+    def test_squares_match_box_overlap(self):
+        random.seed(21)
+        for _ in range(100):
+            a = square(random.randint(0, 20), random.randint(0, 20), random.randint(2, 10))
+            b = square(random.randint(0, 20), random.randint(0, 20), random.randint(2, 10))
+            overlap = (max(a[0][0], b[0][0]) < min(a[2][0], b[2][0]) and
+              max(a[0][1], b[0][1]) < min(a[2][1], b[2][1]))
+            contact = narrowphase.polygon_collision(a, b)
+            self.assertEqual(overlap, contact is not None)
+
+            if contact is not None:
+                # Moving b along the normal by the depth separates them.
+                moved = [(x + contact.normal[0] * (contact.depth + 1e-9),
+                  y + contact.normal[1] * (contact.depth + 1e-9)) for x, y in b]
+                self.assertIsNone(narrowphase.polygon_collision(a, moved))
+
+if __name__ == "__main__":
+    unittest.main()
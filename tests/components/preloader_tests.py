@@ -0,0 +1,147 @@
+from components.core import GameConfig, GameLoop, GameLoopEvents, GameModel, GameScreen
+from components.image import Image, SurfaceCache
+from components.preloader import AssetManifest, LoadingScreen, PreloadingEvents, Preloader
+from mock import patch
+
+import io
+import os
+import pygame
+import shutil
+import tempfile
+import threading
+import unittest
+
+class SetupCountingEvents(GameLoopEvents):
+
+    def __init__(self, screen):
+        super(SetupCountingEvents, self).__init__(screen)
+        self.setups = 0
+        self.events = 0
+
+    def loop_setup(self):
+        super(SetupCountingEvents, self).loop_setup()
+        self.setups += 1
+
+    def loop_event(self):
+        super(SetupCountingEvents, self).loop_event()
+        self.events += 1
+
+class PreloaderTests(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.manifest = AssetManifest()
+        for idx, size in enumerate(((4, 4), (8, 4), (2, 2))):
+            path = os.path.join(self.directory, "image%s.png" % idx)
+            pygame.image.save(pygame.Surface(size), path)
+            self.manifest.add_image("image%s" % idx, path)
+        self.manifest.add_font("default", None, 12)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_wait(self):
+        cache = SurfaceCache()
+        preloader = Preloader(self.manifest, max_workers=2, surface_cache=cache)
+        self.assertEqual(0, preloader.progress)
+        preloader.wait()
+
+        self.assertTrue(preloader.done)
+        self.assertEqual(1.0, preloader.poll())
+        self.assertEqual({}, preloader.errors)
+        self.assertEqual((8, 4), preloader.surfaces["image1"].get_size())
+        self.assertTrue(isinstance(preloader.fonts["default"], pygame.font.Font))
+        self.assertEqual(3, len(cache))
+
+    def test_poll(self):
+        preloader = Preloader(self.manifest, surface_cache=SurfaceCache())
+        progress = []
+        while not preloader.done:
+            progress.append(preloader.poll())
+
+        self.assertEqual(sorted(progress), progress)
+        self.assertEqual(1.0, progress[-1])
+        self.assertEqual(4, preloader.finished)
+
+    def test_missing_file(self):
+        self.manifest.add_image("missing", os.path.join(self.directory, "missing.png"))
+        preloader = Preloader(self.manifest, surface_cache=SurfaceCache())
+        preloader.wait()
+
+        self.assertTrue(preloader.done)
+        self.assertEqual(["missing"], list(preloader.errors))
+        self.assertFalse("missing" in preloader.surfaces)
+
+    @patch("components.image.Image.surface_cache", new_callable=SurfaceCache)
+    def test_images_hit_cache(self, cache):
+        Preloader(self.manifest).wait()
+        with patch("components.image.pygame.image.load") as load:
+            image = Image(self.manifest.images["image0"])
+            self.assertFalse(load.called)
+        self.assertEqual((4, 4), image.img.get_size())
+        self.assertEqual(0, cache.misses)
+
+    def test_manifest_from_file(self):
+        manifest = AssetManifest()
+        manifest.load_from_file(io.StringIO(
+            u'{"images": {"hero": "hero.png"}, "fonts": {"score": [null, 25]}}'
+        ))
+        self.assertEqual({"hero": "hero.png"}, manifest.images)
+        self.assertEqual({"score": (None, 25)}, manifest.fonts)
+        self.assertEqual(2, len(manifest))
+        self.assertEqual(1.0, Preloader(AssetManifest()).progress)
+
+    @patch("components.image.Image.surface_cache", new_callable=SurfaceCache)
+    def test_preloading_events(self, cache):
+        config = GameConfig(clock_rate=50, window_size=(40, 30), headless=True)
+        game_events = SetupCountingEvents(GameScreen(config, GameModel()))
+        loading_screen = LoadingScreen(config, Preloader(self.manifest))
+        loop_events = PreloadingEvents(loading_screen, game_events)
+        self.assertTrue(loop_events.game_screen is loading_screen)
+
+        GameLoop(loop_events, frame_limit=200).go()
+
+        self.assertTrue(loop_events.handed_over)
+        self.assertTrue(loop_events.game_screen is game_events.game_screen)
+        self.assertEqual(1, game_events.setups)
+        self.assertGreater(game_events.events, 0)
+        self.assertEqual(3, len(cache))
+
+    @patch("components.image.Image.surface_cache", new_callable=SurfaceCache)
+    def test_preloading_events_hand_over_profiler(self, cache):
+        config = GameConfig(clock_rate=50, window_size=(40, 30), headless=True)
+        config.set_config_val("profile_frames", True)
+        game_events = SetupCountingEvents(GameScreen(config, GameModel()))
+        loading_screen = LoadingScreen(config, Preloader(self.manifest))
+        loop_events = PreloadingEvents(loading_screen, game_events)
+        loading_profiler = loop_events.profiler
+        self.assertFalse(loading_profiler is game_events.profiler)
+
+        loop = GameLoop(loop_events, frame_limit=200)
+        loop.go()
+
+        self.assertTrue(loop_events.profiler is game_events.profiler)
+        self.assertEqual(game_events.events, len(game_events.profiler.samples("loop_event")))
+        self.assertEqual(
+            loop.frame_count,
+            len(loading_profiler.samples("loop_event")) + game_events.events
+        )
+        self.assertEqual(loop.sim_time, game_events.sim_time)
+
+    def test_fonts_built_on_main_thread(self):
+        threads = []
+        font = pygame.font.Font
+
+        def record_thread(*args):
+            threads.append(threading.current_thread())
+            return font(*args)
+
+        with patch("components.preloader.pygame.font.Font", side_effect=record_thread):
+            preloader = Preloader(self.manifest, surface_cache=SurfaceCache())
+            preloader.wait()
+
+        self.assertEqual({}, preloader.errors)
+        self.assertEqual([threading.main_thread()], threads)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+from components.profiler import FrameProfiler
+from io import StringIO
+
+import csv
+import json
+import unittest
+
+class FrameProfilerTests(unittest.TestCase):
+
+    def setUp(self):
+        self.profiler = FrameProfiler(window=100, frame_budget=10)
+        for millis in range(1, 101):
+            self.profiler.begin_frame()
+            self.profiler.record("draw_screen", millis)
+            self.profiler.end_frame()
+
+    def test_percentile(self):
+        samples = list(range(1, 101))
+        self.assertEqual(50, FrameProfiler.percentile(samples, 50))
+        self.assertEqual(95, FrameProfiler.percentile(samples, 95))
+        self.assertEqual(100, FrameProfiler.percentile(samples, 100))
+        self.assertEqual(0, FrameProfiler.percentile([], 50))
+
+    def test_summary(self):
+        stats = self.profiler.summary("draw_screen")
+        self.assertEqual(100, stats["count"])
+        self.assertEqual(50, stats["p50"])
+        self.assertEqual(95, stats["p95"])
+        self.assertEqual(99, stats["p99"])
+        self.assertEqual(100, stats["max"])
+        self.assertEqual(0, self.profiler.summary("present")["count"])
+
+    def test_window(self):
+        self.profiler.begin_frame()
+        self.profiler.record("draw_screen", 1000)
+        self.profiler.end_frame()
+
+        self.assertEqual(101, self.profiler.frame_count)
+        self.assertEqual(100, len(self.profiler.samples("draw_screen")))
+        self.assertEqual(1000, self.profiler.summary("draw_screen")["max"])
+
+    def test_dropped_frames(self):
+        # Real elapsed time is well below the budget...
+        self.assertEqual(0, self.profiler.dropped_frames)
+
+        # ...unless the budget is tiny.
+        profiler = FrameProfiler(frame_budget=1e-9)
+        profiler.begin_frame()
+        profiler.end_frame()
+        self.assertEqual(1, profiler.dropped_frames)
+
+    def test_record_outside_frame(self):
+        profiler = FrameProfiler()
+        profiler.record("draw_screen", 3)
+        self.assertEqual([], profiler.samples("draw_screen"))
+
+    def test_disabled(self):
+        profiler = FrameProfiler(enabled=False)
+        profiler.begin_frame()
+        profiler.begin("present")
+        profiler.end("present")
+        profiler.end_frame()
+        self.assertEqual(0, profiler.frame_count)
+
+    def test_histogram(self):
+        histogram = self.profiler.histogram("draw_screen", 10)
+        self.assertEqual(9, histogram[0])
+        self.assertEqual(10, histogram[50])
+        self.assertEqual(1, histogram[100])
+
+    def test_export_json(self):
+        out = StringIO()
+        self.profiler.export_json(out)
+        report = json.loads(out.getvalue())
+        self.assertEqual(100, report["frame_count"])
+        self.assertEqual(50, report["phases"]["draw_screen"]["p50"])
+        self.assertEqual(100, len(report["frames"]))
+
+    def test_export_csv(self):
+        out = StringIO()
+        self.profiler.export_csv(out)
+        rows = list(csv.reader(StringIO(out.getvalue())))
+        self.assertEqual(["frame", "draw_screen", "total"], rows[0])
+        self.assertEqual(101, len(rows))
+        self.assertEqual("0", rows[1][0])
+        self.assertEqual(1, float(rows[1][1]))
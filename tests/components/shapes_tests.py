@@ -1,9 +1,12 @@
 
 
 from components.shapes import PointShape
+from mock import patch
 from components.shapes import Point
 from components.shapes import CollisionBox
+from components.shapes import FrozenPoint
 
+import pygame
 import unittest
 
 """
@@ -101,6 +104,71 @@ class PointShapeTests(unittest.TestCase):
         expected = [Point(4, 6), Point(6, 3), Point(9, 12), Point(7, 11)]
         self.assertEqual(expected, translated)
 
+class PointShapeDrawTests(unittest.TestCase):
+
+    def setUp(self):
+        self.points = [Point(10, 5), Point(30, 12), Point(22, 40), Point(4, 33)]
+        self.window = pygame.Surface((60, 60))
+
+    def render(self, shape):
+        window = pygame.Surface((60, 60))
+        window.fill((255, 255, 255))
+        shape.draw(window)
+        return pygame.image.tostring(window, "RGB")
+
+    def assert_same_image(self, expected, actual):
+        # Antialiased edges blended through an alpha Surface may be off by a
+        # shade.
+        self.assertEqual(len(expected), len(actual))
+        self.assertTrue(all(abs(a - b) <= 2 for a, b in zip(expected, actual)))
+
+    @patch("components.shapes.pygame.draw.lines", autospec=True)
+    def test_single_call(self, draw_lines):
+        shape = PointShape(self.points)
+        shape.draw(self.window)
+        draw_lines.assert_called_once_with(self.window, shape.line_color, True, self.points, 1)
+
+        PointShape([Point(1, 1)]).draw(self.window)
+        self.assertEqual(1, draw_lines.call_count)
+
+    @patch("components.shapes.pygame.draw.polygon", autospec=True)
+    @patch("components.shapes.pygame.draw.aalines", autospec=True)
+    def test_draw_modes(self, draw_aalines, draw_polygon):
+        PointShape(self.points, draw_mode=PointShape.FILLED).draw(self.window)
+        self.assertEqual(1, draw_polygon.call_count)
+        PointShape(self.points, draw_mode=PointShape.ANTIALIASED).draw(self.window)
+        self.assertEqual(1, draw_aalines.call_count)
+
+    def test_cache(self):
+        for mode in (PointShape.OUTLINE, PointShape.FILLED, PointShape.ANTIALIASED):
+            direct = PointShape(self.points, draw_mode=mode, line_width=3)
+            cached = PointShape(self.points, draw_mode=mode, line_width=3, cache=True)
+            self.assert_same_image(self.render(direct), self.render(cached))
+
+            cached.translate(5, -2)
+            direct.translate(5, -2)
+            with patch("components.shapes.pygame.draw.lines", autospec=True) as draw_lines:
+                from_cache = self.render(cached)
+                self.assertEqual(0, draw_lines.call_count)
+            self.assert_same_image(self.render(direct), from_cache)
+
+    def test_cache_invalidation(self):
+        direct = PointShape(list(self.points))
+        cached = PointShape(list(self.points), cache=True)
+        self.render(cached)
+
+        for shape in (direct, cached):
+            shape.add_point(Point(50, 50))
+        self.assertEqual(self.render(direct), self.render(cached))
+
+        for shape in (direct, cached):
+            shape.line_color = (255, 0, 0)
+        self.assertEqual(self.render(direct), self.render(cached))
+
+        for shape in (direct, cached):
+            shape.translate(0.5, 0.5)
+        self.assertEqual(self.render(direct), self.render(cached))
+
 class CollisionBoxTests(unittest.TestCase):
     
     def setUp(self):
@@ -141,3 +209,23 @@ class PointTests(unittest.TestCase):
         self.assertEqual(20, origin.distance(p1, False))
         self.assertEqual(origin.distance(p1, False), p1.distance(origin, False))
         self.assertEqual(0, origin.distance(origin, False))
+
+    def test_sequence(self):
+        p = Point(4, 2)
+        self.assertEqual(2, len(p))
+        self.assertEqual((4, 2), tuple(p))
+        self.assertEqual(4, p[0])
+        self.assertEqual(2, p[-1])
+        self.assertEqual((4, 2), p[:])
+        self.assertRaises(IndexError, p.__getitem__, 2)
+
+        x, y = p
+        self.assertEqual((4, 2), (x, y))
+        self.assertRaises(AttributeError, setattr, p, "z", 1)
+
+    def test_frozen(self):
+        p = FrozenPoint(4, 2)
+        self.assertEqual(Point(4, 2), p)
+        self.assertRaises(AttributeError, setattr, p, "x", 1)
+        self.assertEqual(4, p.x)
+        self.assertEqual(1, len(set([p, FrozenPoint(4, 2)])))
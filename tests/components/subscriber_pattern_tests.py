@@ -0,0 +1,84 @@
+import unittest
+import uuid
+
+from components.core import GameConfig, GameModel, GameScreen
+from components.subscriber_pattern import Publisher, Subscriber
+
+class PublisherMock(Publisher):
+    
+    def __init__(self):
+        super(PublisherMock, self).__init__()
+
+class SubscriberMock(Subscriber):
+    
+    def __init__(self):
+        super(SubscriberMock, self).__init__()
+        self.notified = False
+
+    def notify(self, observed, arg_bundle=None):
+        self.notified = True
+
+class OneShotSubscriberMock(SubscriberMock):
+
+    def notify(self, observed, arg_bundle=None):
+        super(OneShotSubscriberMock, self).notify(observed, arg_bundle)
+        observed.unsubscribe(self)
+
+class SubscriberPatternTest(unittest.TestCase):
+    
+    def setUp(self):
+        self.publisher = PublisherMock()
+        self.subscriber = SubscriberMock()
+
+    def test_no_sub(self):
+        self.assertFalse(self.subscriber.notified)
+        self.publisher.notify_subscribers()
+        self.assertFalse(self.subscriber.notified)
+
+    def test_sub(self):
+        self.assertFalse(self.subscriber.notified)
+        self.publisher.subscribe(self.subscriber)
+        self.publisher.notify_subscribers()
+        self.assertTrue(self.subscriber.notified)
+
+    def test_unsubscribe(self):
+        self.assertFalse(self.subscriber.notified)
+        self.publisher.subscribe(self.subscriber)
+        self.publisher.notify_subscribers()
+        self.assertTrue(self.subscriber.notified)
+        self.subscriber.notified = False
+        self.publisher.unsubscribe(self.subscriber)
+        self.publisher.notify_subscribers()
+        self.assertFalse(self.subscriber.notified)
+
+    def test_unsubscribe_not_first(self):
+        first = SubscriberMock()
+        self.publisher.subscribe(first)
+        self.publisher.subscribe(self.subscriber)
+        self.publisher.unsubscribe(self.subscriber)
+        self.publisher.notify_subscribers()
+        self.assertTrue(first.notified)
+        self.assertFalse(self.subscriber.notified)
+
+    def test_unsubscribe_without_id(self):
+        # GameScreens are Subscribers that never get an id.
+        screen = GameScreen(GameConfig(), GameModel())
+        self.publisher.subscribe(screen)
+        self.publisher.subscribe(self.subscriber)
+        self.publisher.unsubscribe(self.subscriber)
+        self.publisher.unsubscribe(screen)
+        self.publisher.notify_subscribers()
+        self.assertFalse(self.subscriber.notified)
+        self.assertFalse(screen == SubscriberMock())
+
+    def test_unsubscribe_while_notified(self):
+        one_shot = OneShotSubscriberMock()
+        self.publisher.subscribe(one_shot)
+        self.publisher.subscribe(self.subscriber)
+        self.publisher.notify_subscribers()
+        self.assertTrue(one_shot.notified)
+        self.assertTrue(self.subscriber.notified)
+
+        one_shot.notified = False
+        self.publisher.notify_subscribers()
+        self.assertFalse(one_shot.notified)
@@ -1,8 +1,9 @@
 
 
 from components.helpers.grid import QuadraticGrid
-from demo.snake.model import Snake
-from demo.snake.ai import SimpleRankSpawnManager, SpawnManagerIgnoramus, WindowedCount
+from demo.snake.model import Snake, SnakeGameModel
+from demo.snake.ai import (Autopilot, FreeCellIndex, FreeCellSpawnManager,
+  SimpleRankSpawnManager, SpawnManagerIgnoramus, WindowedCount)
 
 import random
 import unittest
@@ -37,6 +38,41 @@ class WindowedCountTests(unittest.TestCase):
         self.assertEqual(half, self.windowed_count.counts["eggs"])
         self.assertEqual(1, self.windowed_count.counts["spam&eggs"])
 
+    def test_evicts_in_order(self):
+        windowed_count = WindowedCount(3)
+        for key in ("spam", "eggs", "spam", "ham", "ham"):
+            windowed_count.incr(key)
+
+        self.assertEqual({"spam": 1, "ham": 2}, windowed_count.counts)
+
+    def test_duration(self):
+        now = [0]
+        windowed_count = WindowedCount(8, duration=10, clock=lambda: now[0])
+        windowed_count.incr("spam")
+        now[0] = 5
+        windowed_count.incr("eggs")
+        now[0] = 12
+        windowed_count.incr("eggs")
+        self.assertEqual({"eggs": 2}, windowed_count.counts)
+        self.assertEqual(2, windowed_count.record_size)
+
+        windowed_count.evict(16)
+        self.assertEqual({"eggs": 1}, windowed_count.counts)
+
+    def test_top_k(self):
+        for key in ("spam", "eggs", "spam", "ham", "spam", "ham"):
+            self.windowed_count.incr(key)
+
+        self.assertEqual(["spam", "ham"], self.windowed_count.top_k(2))
+        self.assertEqual(["spam", "ham", "eggs"], self.windowed_count.top_k(5))
+
+    def test_distribution(self):
+        self.assertEqual({}, self.windowed_count.distribution())
+        for key in ("spam", "eggs", "spam", "spam"):
+            self.windowed_count.incr(key)
+
+        self.assertEqual({"spam": 0.75, "eggs": 0.25}, self.windowed_count.distribution())
+
 class SimpleRankSpawnManagerTests(unittest.TestCase):
     
     def setUp(self):
@@ -89,6 +125,37 @@ class SimpleRankSpawnManagerTests(unittest.TestCase):
             food_coords = self.spawn_manager_playtest.get_spawn(snake)
             self.assertTrue(food_coords not in snake_squares)
 
+    def test_avoids_favorite_directions(self):
+        for _ in range(5):
+            self.spawn_manager_playtest.note_movement(QuadraticGrid.Movements.UP)
+            self.spawn_manager_playtest.note_movement(QuadraticGrid.Movements.RIGHT)
+        self.spawn_manager_playtest.note_movement(QuadraticGrid.Movements.DOWN)
+
+        snake = Snake()
+        snake.head = (5, 5)
+        snake.joints = [(5, 3)]
+
+        for _ in range(20):
+            food = self.spawn_manager_playtest.get_spawn(snake)
+            self.assertTrue(food[0] > 5 or food[1] < 3)
+
+    def test_ranks_recent_movements(self):
+        for _ in range(20):
+            self.spawn_manager_playtest.note_movement(QuadraticGrid.Movements.DOWN)
+        for _ in range(4):
+            self.spawn_manager_playtest.note_movement(QuadraticGrid.Movements.UP)
+            self.spawn_manager_playtest.note_movement(QuadraticGrid.Movements.RIGHT)
+
+        snake = Snake()
+        snake.head = (5, 5)
+        snake.joints = [(5, 3)]
+
+        foods = set()
+        for _ in range(50):
+            foods.add(self.spawn_manager_playtest.get_spawn(snake))
+        # DOWN dropped out of the window, so it may be chosen again.
+        self.assertEqual(set([(6, 5), (5, 2)]), foods)
+
 class SpawnManagerIgnoramusTests(unittest.TestCase):
     
     def setUp(self):
@@ -103,3 +170,145 @@ class SpawnManagerIgnoramusTests(unittest.TestCase):
         for _ in range(100):
             food_coords = self.spawn_manager.get_spawn(snake)
             self.assertTrue(food_coords not in snake_squares)
+
+class FreeCellSpawnManagerTests(unittest.TestCase):
+
+    def setUp(self):
+        self.spawn_manager = FreeCellSpawnManager(10, 10)
+
+    def test_get_spawn(self):
+        snake = Snake()
+        snake.head = (3, 7)
+        snake.joints = [(6, 7), (6, 3), (5, 3), (5, 2), (7, 2), (7, 8), (3, 8)]
+        snake_squares = snake.enumerate_snake_squares()
+
+        for _ in range(100):
+            food_coords = self.spawn_manager.get_spawn(snake)
+            self.assertTrue(food_coords not in snake_squares)
+            self.assertTrue(0 <= food_coords[0] < 10 and 0 <= food_coords[1] < 10)
+
+        self.assertEqual(100 - len(snake_squares), len(self.spawn_manager.free_cells))
+
+    def test_follows_moves(self):
+        model = SnakeGameModel(6, 5)
+        model.initialize()
+        free_cells = model.food_spawn_manager.free_cells
+        movements = (QuadraticGrid.Movements.UP, QuadraticGrid.Movements.LEFT,
+          QuadraticGrid.Movements.LEFT, QuadraticGrid.Movements.DOWN,
+          QuadraticGrid.Movements.DOWN)
+
+        for movement in movements:
+            model.food_point = (model.snake_head[0] + movement[0],
+              model.snake_head[1] + movement[1])
+            model.move_snake(movement)
+
+            snake_squares = model.snake.enumerate_snake_squares()
+            for row in range(5):
+                for col in range(6):
+                    self.assertEqual((row, col) not in snake_squares, (row, col) in free_cells)
+
+    def test_reset(self):
+        snake = Snake()
+        snake.head = (0, 2)
+        snake.joints = [(0, 0)]
+        self.spawn_manager.get_spawn(snake)
+        self.assertEqual(97, len(self.spawn_manager.free_cells))
+
+        snake.joints = [(0, 1)]
+        self.assertEqual(98, len(self.spawn_manager.free_cells))
+        self.assertTrue((0, 0) in self.spawn_manager.free_cells)
+
+    def test_board_full(self):
+        spawn_manager = FreeCellSpawnManager(3, 2)
+        snake = Snake()
+        snake.head = (0, 0)
+        snake.joints = [(0, 2), (1, 2), (1, 0)]
+        self.assertIsNone(spawn_manager.get_spawn(snake))
+
+        snake.joints = [(0, 2), (1, 2), (1, 1)]
+        self.assertEqual((1, 0), spawn_manager.get_spawn(snake))
+
+    def test_track_other_snake(self):
+        free_cells = FreeCellIndex(4, 4)
+        first = Snake()
+        first.head = (0, 0)
+        first.joints = [(0, 3)]
+        free_cells.track(first)
+        self.assertEqual(12, len(free_cells))
+
+        second = Snake()
+        second.head = (3, 3)
+        second.joints = [(3, 2)]
+        free_cells.track(second)
+        self.assertEqual(14, len(free_cells))
+
+        # No longer following the first snake.
+        first.joints = [(0, 1)]
+        self.assertEqual(14, len(free_cells))
+
+class AutopilotTests(unittest.TestCase):
+
+    def test_hamiltonian_cycle(self):
+        for width, height in ((4, 3), (3, 4), (6, 6), (2, 5)):
+            cycle = Autopilot.hamiltonian_cycle(width, height)
+            self.assertEqual(width * height, len(set(cycle)))
+            for idx, square in enumerate(cycle):
+                self.assertTrue(0 <= square[0] < height and 0 <= square[1] < width)
+                following = cycle[(idx + 1) % len(cycle)]
+                self.assertEqual(1, abs(square[0] - following[0]) + abs(square[1] - following[1]))
+
+        self.assertIsNone(Autopilot.hamiltonian_cycle(5, 5))
+
+    def test_path_through_tail(self):
+        # The only way to the food is through the square the tail is leaving.
+        snake = Snake()
+        snake.head = (1, 1)
+        snake.joints = [(1, 0), (0, 0), (0, 2), (1, 2), (2, 2), (2, 1)]
+        autopilot = Autopilot(3, 4)
+        self.assertEqual(QuadraticGrid.Movements.DOWN, autopilot.next_move(snake, (3, 1)))
+
+    def test_follows_plan(self):
+        model = SnakeGameModel(10, 10)
+        model.initialize()
+        model.food_point = (0, 0)
+        autopilot = Autopilot(10, 10)
+
+        while model.snake_head != (0, 0):
+            model.move_snake(autopilot.next_move(model.snake, model.food_point))
+            self.assertFalse(model.is_endgame())
+
+        self.assertEqual(1, autopilot.searches)
+
+    def test_long_game(self):
+        random.seed(7)
+        model = SnakeGameModel(6, 6)
+        model.initialize()
+        autopilot = Autopilot(6, 6, 7)
+
+        for _ in range(1000):
+            if model.is_endgame():
+                break
+            model.move_snake(autopilot.next_move(model.snake, model.food_point))
+
+        # The autopilot never crashes, so the game can only end with a win.
+        self.assertEqual(model.is_endgame(), model.board_full)
+        self.assertTrue(len(model.snake.body) > 20)
+
+    def test_full_game(self):
+        for size, seed in ((8, 3), (10, 0)):
+            random.seed(seed)
+            model = SnakeGameModel(size, size)
+            model.initialize()
+            autopilot = Autopilot(size, size, seed)
+            cells = size * size
+
+            # Going round the cycle, every food takes at most one lap.
+            for _ in range(cells * cells):
+                if model.is_endgame():
+                    break
+                model.move_snake(autopilot.next_move(model.snake, model.food_point))
+
+            self.assertTrue(model.board_full)
+            # About one search per food, not one per move.
+            self.assertLess(autopilot.searches, 2 * cells)
+
@@ -0,0 +1,129 @@
+from demo.snake import ai
+from demo.snake.model import SnakeGameModel
+
+import random
+import unittest
+
+try:
+    import numpy
+    from demo.snake import batch
+except ImportError:
+    numpy = None
+
+@unittest.skipIf(numpy is None, "NumPy is not installed")
+class BatchSnakeSimulatorTests(unittest.TestCase):
+
+    def setUp(self):
+        self.simulator = batch.BatchSnakeSimulator(3, 10, 8, seed=1)
+
+    def __squares(self, game):
+        return set(self.simulator.view(game).body)
+
+    def test_initial_state(self):
+        model = SnakeGameModel(10, 8)
+        model.initialize()
+        for game in range(3):
+            self.assertEqual(model.snake.enumerate_snake_squares(), self.__squares(game))
+            food = divmod(int(self.simulator.food[game]), 10)
+            self.assertFalse(self.simulator.occupies(game, food))
+
+    def test_matches_model(self):
+        model = SnakeGameModel(10, 8)
+        model.initialize()
+        simulator = batch.BatchSnakeSimulator(1, 10, 8, seed=2)
+        moves = [batch.UP, batch.LEFT, batch.LEFT, batch.LEFT, batch.DOWN,
+          batch.DOWN, batch.RIGHT, batch.RIGHT, batch.UP]
+
+        for move in moves:
+            # Share the food so that both snakes grow at the same time.
+            model.food_point = divmod(int(simulator.food[0]), 10)
+            simulator.step([move])
+            model.move_snake(batch.DIRECTIONS[move])
+            self.assertEqual(model.snake.enumerate_snake_squares(), set(simulator.view(0).body))
+            self.assertEqual(model.snake.head, simulator.view(0).head)
+            self.assertEqual(model.is_endgame(), not simulator.alive[0])
+
+    def test_no_turning_around(self):
+        self.simulator.step([batch.LEFT, batch.UP, batch.RIGHT])
+        self.assertEqual(self.simulator.direction.tolist(), [batch.RIGHT, batch.UP, batch.RIGHT])
+        self.assertTrue(self.simulator.alive.all())
+
+    def test_walls(self):
+        # The heads start at (4, 5)
+        self.simulator.food[:] = 0
+        for _ in range(4):
+            self.simulator.step([batch.RIGHT, batch.UP, batch.DOWN])
+        self.assertEqual(self.simulator.alive.tolist(), [True, True, False])
+
+        self.simulator.step([batch.RIGHT, batch.UP, batch.DOWN])
+        self.assertEqual(self.simulator.alive.tolist(), [False, False, False])
+        self.assertEqual(self.simulator.clock.tolist(), [4, 4, 3])
+
+    def test_self_collision(self):
+        simulator = batch.BatchSnakeSimulator(1, 10, 8, snake_size=5)
+        # Keep the food out of the way.
+        simulator.food[0] = 0
+        for move in (batch.UP, batch.LEFT):
+            simulator.step([move])
+            self.assertTrue(simulator.alive[0])
+
+        simulator.step([batch.DOWN])
+        self.assertFalse(simulator.alive[0])
+
+    def test_follow_tail(self):
+        # A snake of four squares can chase its tail around a 2x2 block.
+        simulator = batch.BatchSnakeSimulator(1, 10, 8, snake_size=3)
+        simulator.food[0] = 0
+        for move in (batch.UP, batch.LEFT, batch.DOWN, batch.RIGHT) * 3:
+            simulator.step([move])
+            self.assertTrue(simulator.alive[0])
+
+    def test_eating(self):
+        head = (int(self.simulator.head_row[0]), int(self.simulator.head_col[0]))
+        self.simulator.food[0] = head[0] * 10 + head[1] + 1
+        self.simulator.step([batch.RIGHT] * 3)
+        self.assertEqual(self.simulator.length.tolist(), [5, 4, 4])
+        self.assertEqual(self.simulator.score.tolist(), [1, 0, 0])
+        self.assertEqual(len(self.__squares(0)), 5)
+        self.assertFalse(self.simulator.occupies(0, divmod(int(self.simulator.food[0]), 10)))
+
+    def test_spawn_managers(self):
+        random.seed(3)
+        for factory in (ai.SpawnManagerIgnoramus, ai.FreeCellSpawnManager, ai.SimpleRankSpawnManager):
+            simulator = batch.BatchSnakeSimulator(4, 10, 8, factory)
+            simulator.run(batch.GreedyPolicy(), 200)
+            self.assertTrue((simulator.score > 0).any())
+
+    def test_won(self):
+        simulator = batch.BatchSnakeSimulator(1, 5, 3, snake_size=3)
+        simulator.length[0] = 14
+        head = (int(simulator.head_row[0]), int(simulator.head_col[0]))
+        simulator.food[0] = head[0] * 5 + head[1] + 1
+        simulator.step([batch.RIGHT])
+        self.assertTrue(simulator.won[0])
+        self.assertFalse(simulator.alive[0])
+
+    def test_greedy_beats_random(self):
+        greedy = batch.BatchSnakeSimulator(32, 12, 12, seed=4)
+        greedy.run(batch.GreedyPolicy(), 300)
+        rand = batch.BatchSnakeSimulator(32, 12, 12, seed=4)
+        rand.run(batch.RandomTurnPolicy(), 300)
+        self.assertGreater(greedy.score.mean(), rand.score.mean())
+
+    def test_autopilot(self):
+        simulator = batch.BatchSnakeSimulator(4, 8, 8, seed=6)
+        simulator.run(batch.AutopilotPolicy(), 200)
+        self.assertTrue((simulator.alive | simulator.won).all())
+        self.assertTrue((simulator.score > 5).all())
+
+    def test_run_batches_reproducible(self):
+        first = batch.run_batches(batch.RandomTurnPolicy(0.2), 2, 4, 10, 8, 100, seed=5, max_workers=2)
+        second = batch.run_batches(batch.RandomTurnPolicy(0.2), 2, 4, 10, 8, 100, seed=5, max_workers=1)
+        self.assertEqual(first, second)
+        self.assertEqual(len(first["score"]), 8)
+
+        other = batch.run_batches(batch.RandomTurnPolicy(0.2), 2, 4, 10, 8, 100, seed=6, max_workers=1)
+        self.assertNotEqual(first, other)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,5 +1,6 @@
 from components.core import GameConfig, GameLoop
 from demo.snake.game import SnakeScreen, SnakeGameEvents
+from demo.snake.model import SnakeGameModel
 from mock import patch
 from tests import make_mock_clock
 
@@ -29,3 +30,21 @@ class GameTests(unittest.TestCase):
         self.assertTrue(clock_tick.called)
         self.assertTrue(flip.called)
         self.assertTrue(quit.called)
+
+    def test_autopilot(self):
+        config = GameConfig()
+        config.set_config_val("clock_rate", 60)
+        config.set_config_val("window_size", (600, 600))
+        config.set_config_val("autopilot", True)
+        screen = SnakeScreen(config, (10, 10))
+        model = screen.game_model
+        model.food_point = (0, 0)
+
+        for _ in range(20):
+            screen._SnakeScreen__automove_snake()
+            if model.snake_head == (0, 0):
+                break
+
+        self.assertEqual((0, 0), model.snake_head)
+        self.assertFalse(model.is_endgame())
+        self.assertEqual(SnakeGameModel.DEFAULT_SNAKE_SIZE + 2, len(model.snake.body))
@@ -77,15 +77,35 @@ class SnakeModelTests(unittest.TestCase):
 
     def test_reversible(self):
         original_head = self.gm.snake_head
-        original_joints = self.gm.snake_joints
+        original_joints = list(self.gm.snake_joints)
         original_squares = self.gm.snake.enumerate_snake_squares()
         self.gm.move_snake(QuadraticGrid.Movements.RIGHT, True)
         self.gm.move_snake(QuadraticGrid.Movements.LEFT)
         self.assertEqual(original_head, self.gm.snake.head)
-        self.assertEqual(original_joints, self.gm.snake.joints)
+        self.assertEqual(original_joints, list(self.gm.snake.joints))
         new_squares = self.gm.snake.enumerate_snake_squares()
         self.assertEqual(original_squares, new_squares)
 
+    def test_move_after_reverse(self):
+        self.gm.food_point = None
+        self.gm.snake.body
+        self.gm.move_snake(QuadraticGrid.Movements.UP, True)
+        self.gm.move_snake(QuadraticGrid.Movements.DOWN, True)
+        self.assertEqual((5, 5), self.gm.snake_head)
+        self.assertEqual([(5, 2)], list(self.gm.snake_joints))
+        self.assertEqual(QuadraticGrid.Movements.RIGHT, self.gm.snake.get_orientation())
+        self.__assert_body_consistent(self.gm.snake)
+        self.assertRaises(VectorDirectionException, self.gm.move_snake, QuadraticGrid.Movements.LEFT, True)
+
+        self.gm.move_snake(QuadraticGrid.Movements.UP)
+        self.assertEqual(QuadraticGrid.Movements.UP, self.gm.snake.get_orientation())
+        self.assertFalse(self.gm.is_endgame())
+        self.__assert_body_consistent(self.gm.snake)
+
+        self.gm.move_snake(QuadraticGrid.Movements.UP)
+        self.assertFalse(self.gm.is_endgame())
+        self.__assert_body_consistent(self.gm.snake)
+
     def test_bending(self):
         snake_head = self.gm.snake_head
         max_len = SnakeGameModel.DEFAULT_SNAKE_SIZE
@@ -135,3 +155,52 @@ class SnakeModelTests(unittest.TestCase):
         new_head = self.gm.snake.joints[-2] if len(self.gm.snake.joints) > 1 else self.gm.snake.head
         new_tail_vector = (self.gm.snake.joints[-1], new_head)
         self.assertEqual(original_tail_vector, new_tail_vector)
+    def __assert_body_consistent(self, snake):
+        rebuilt = Snake()
+        rebuilt.head = snake.head
+        rebuilt.joints = list(snake.joints)
+        self.assertEqual(list(rebuilt.body), list(snake.body))
+        self.assertEqual(rebuilt.enumerate_snake_squares(), snake.enumerate_snake_squares())
+
+    def test_body(self):
+        snake = Snake()
+        snake.head = (2, 3)
+        snake.joints = [(2, 1), (4, 1)]
+        self.assertEqual(list(snake.body), [(2, 3), (2, 2), (2, 1), (3, 1), (4, 1)])
+        self.assertTrue(snake.occupies((3, 1)))
+        self.assertFalse(snake.occupies((3, 2)))
+        self.assertTrue(snake.occupies((2, 3)))
+        self.assertFalse(snake.occupies((2, 3), False))
+
+        snake.joints = [(2, 2)]
+        self.assertEqual(list(snake.body), [(2, 3), (2, 2)])
+        self.assertFalse(snake.occupies((4, 1)))
+
+    def test_body_follows_moves(self):
+        # Build the body first so that it is updated rather than rebuilt.
+        self.gm.snake.body
+        self.gm.food_point = (self.gm.snake_head[0], self.gm.snake_head[1] + 1)
+        moves = (QuadraticGrid.Movements.RIGHT, QuadraticGrid.Movements.UP,
+          QuadraticGrid.Movements.LEFT, QuadraticGrid.Movements.LEFT,
+          QuadraticGrid.Movements.DOWN)
+
+        for movement in moves:
+            self.gm.move_snake(movement, True)
+            self.__assert_body_consistent(self.gm.snake)
+
+        self.assertEqual(len(self.gm.snake.body), SnakeGameModel.DEFAULT_SNAKE_SIZE + 2)
+        self.gm.move_snake(QuadraticGrid.Movements.UP)
+        self.__assert_body_consistent(self.gm.snake)
+
+    def test_self_collision(self):
+        snake = Snake()
+        snake.head = (2, 2)
+        snake.joints = [(2, 5), (4, 5), (4, 2)]
+        self.gm.snake = snake
+        self.gm.food_point = None
+        self.gm.move_snake(QuadraticGrid.Movements.DOWN)
+        self.gm.move_snake(QuadraticGrid.Movements.RIGHT)
+        self.gm.move_snake(QuadraticGrid.Movements.RIGHT)
+        self.assertFalse(self.gm.is_endgame())
+        self.gm.move_snake(QuadraticGrid.Movements.UP)
+        self.assertTrue(self.gm.is_endgame())